@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from addresses.services.zip_index import (
+    BUNDLED_INDEX_PATH,
+    build_zip_index,
+    open_zip_index,
+)
+
+
+class Command(BaseCommand):
+    help = "Compile a ZIP reference CSV into the memory-mapped lookup index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "source",
+            nargs="?",
+            default=str(settings.BASE_DIR / "addresses" / "data" / "zip_reference.csv"),
+            help="CSV with zip5,state,primary_city,acceptable_cities columns",
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.ADDRESS_ZIP_INDEX_PATH or str(BUNDLED_INDEX_PATH),
+            help="Index file to write (defaults to ADDRESS_ZIP_INDEX_PATH, or the "
+            "bundled sample index)",
+        )
+
+    def handle(self, *args, **options):
+        count = build_zip_index(options["source"], options["output"])
+        open_zip_index.cache_clear()
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {count} ZIP codes to {options['output']}")
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("addresses", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="verificationattempt",
+            name="created_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("addresses", "0002_attempt_created_at_default"),
+        ("shipments", "0004_address_preset_verification"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="verificationattempt",
+            name="shipment",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="verification_attempts",
+                to="shipments.shipment",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("addresses", "0003_attempt_optional_shipment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VerifiedAddress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("address_key", models.CharField(max_length=500, unique=True)),
+                ("address", models.JSONField(default=dict)),
+                ("status", models.CharField(max_length=20)),
+                ("details", models.JSONField(blank=True, default=dict)),
+                ("verified_at", models.DateTimeField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                (
+                    "last_used_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_address_keys(apps, _):
+    # Keys were the canonical address itself; they become its SHA-256.
+    VerifiedAddress = apps.get_model("addresses", "VerifiedAddress")
+    entries = list(VerifiedAddress.objects.only("id", "address_key"))
+    for entry in entries:
+        entry.address_key = hashlib.sha256(entry.address_key.encode()).hexdigest()
+    VerifiedAddress.objects.bulk_update(entries, ["address_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("addresses", "0004_verified_address"),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_address_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="verifiedaddress",
+            name="address_key",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("addresses", "0005_hash_address_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="verifiedaddress",
+            name="canonical",
+            field=models.TextField(default=""),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 
 from django.db import models
+from django.utils import timezone
 
 from shipments.models import Shipment
 
@@ -11,15 +12,39 @@ class VerificationAttempt(models.Model):
         FAILURE = "FAILURE", "Failure"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Null for verifications not tied to a shipment, e.g. saved presets.
     shipment = models.ForeignKey(
-        Shipment, on_delete=models.CASCADE, related_name="verification_attempts"
+        Shipment,
+        on_delete=models.CASCADE,
+        related_name="verification_attempts",
+        null=True,
+        blank=True,
     )
     provider = models.CharField(max_length=100)
     status = models.CharField(max_length=10, choices=Status.choices)
     request_payload = models.JSONField(default=dict, blank=True)
     response_payload = models.JSONField(default=dict, blank=True)
     error = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the attempt happens, not when a buffered batch is written.
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     def __str__(self) -> str:
         return f"{self.provider} - {self.status}"
+
+
+class VerifiedAddress(models.Model):
+    """Cached verification outcome for one canonical address."""
+
+    address_key = models.CharField(max_length=64, unique=True)
+    # canonical_address() of that address; a hit must match it exactly.
+    canonical = models.TextField(default="")
+    # AddressInput fields of the address last verified under this key.
+    address = models.JSONField(default=dict)
+    status = models.CharField(max_length=20)
+    details = models.JSONField(default=dict, blank=True)
+    verified_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.address_key} - {self.status}"
@@ -55,37 +55,40 @@ class GoogleAddressProvider:
                 retryable=response.status_code in {401, 403},
             )
 
-        payload = response.json()
-        verdict = payload.get("result", {}).get("verdict", {})
-        address_result = payload.get("result", {}).get("address", {})
-        postal = address_result.get("postalAddress", {})
-
-        suggested = AddressNormalized(
-            street1=postal.get("addressLines", [""])[0]
-            if postal.get("addressLines")
-            else "",
-            street2=postal.get("addressLines", ["", ""])[1]
-            if postal.get("addressLines") and len(postal.get("addressLines")) > 1
-            else "",
-            city=postal.get("locality", ""),
-            state=postal.get("administrativeArea", ""),
-            postal_code=postal.get("postalCode", ""),
-            country=postal.get("regionCode", "US"),
-        )
-
-        is_valid = verdict.get("addressComplete", False)
-        is_corrected = not _addresses_match(address, suggested)
-        messages = []
-        if not is_valid:
-            messages.append("Address validation failed")
-
-        return AddressVerificationResult(
-            is_valid=is_valid,
-            is_corrected=is_corrected,
-            suggested_address=suggested if is_valid else None,
-            messages=messages,
-            raw={"response": payload},
-        )
+        return parse_response(address, response.json())
+
+
+def parse_response(address: AddressInput, payload: dict) -> AddressVerificationResult:
+    verdict = payload.get("result", {}).get("verdict", {})
+    address_result = payload.get("result", {}).get("address", {})
+    postal = address_result.get("postalAddress", {})
+
+    suggested = AddressNormalized(
+        street1=postal.get("addressLines", [""])[0]
+        if postal.get("addressLines")
+        else "",
+        street2=postal.get("addressLines", ["", ""])[1]
+        if postal.get("addressLines") and len(postal.get("addressLines")) > 1
+        else "",
+        city=postal.get("locality", ""),
+        state=postal.get("administrativeArea", ""),
+        postal_code=postal.get("postalCode", ""),
+        country=postal.get("regionCode", "US"),
+    )
+
+    is_valid = verdict.get("addressComplete", False)
+    is_corrected = not _addresses_match(address, suggested)
+    messages = []
+    if not is_valid:
+        messages.append("Address validation failed")
+
+    return AddressVerificationResult(
+        is_valid=is_valid,
+        is_corrected=is_corrected,
+        suggested_address=suggested if is_valid else None,
+        messages=messages,
+        raw={"response": payload},
+    )
 
 
 def _addresses_match(original: AddressInput, normalized: AddressNormalized) -> bool:
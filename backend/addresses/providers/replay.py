@@ -0,0 +1,230 @@
+"""Record/replay stand-in for the paid address providers.
+
+Serves responses recorded in ``VerificationAttempt.response_payload`` or in
+fixture files, with synthetic latency and error injection, so verification
+can be benchmarked offline. Enable it by listing ``"replay"`` in
+``ADDRESS_PROVIDERS`` and configuring ``ADDRESS_REPLAY``::
+
+    ADDRESS_REPLAY = {
+        "fixtures": ["fixtures/verify.ndjson"],
+        "from_attempts": True,
+        "latency": {"distribution": "lognormal", "median_ms": 120, "sigma": 0.6},
+        "error_rate": 0.01,
+        "rate_limit_rate": 0.02,
+        "on_miss": "echo",
+        "seed": 7,
+    }
+
+Fixture files hold one JSON object per line (or a JSON list) shaped like a
+``VerificationAttempt``: ``{"provider": "google", "request_payload": {...},
+"response_payload": {...}}``. A record may carry ``"result"`` (the
+``AddressVerificationResult`` fields) instead of a provider response.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from addresses.providers import google, smarty, usps
+from addresses.providers.base import (
+    AddressInput,
+    AddressNormalized,
+    AddressProviderError,
+    AddressVerificationResult,
+)
+from addresses.services.canonical import address_key
+
+ON_MISS_ECHO = "echo"
+ON_MISS_INVALID = "invalid"
+ON_MISS_ERROR = "error"
+
+
+def replay_key(address: AddressInput | dict) -> str:
+    if isinstance(address, dict):
+        address = AddressInput(
+            name="",
+            street1=address.get("street1", ""),
+            street2=address.get("street2", ""),
+            city=address.get("city", ""),
+            state=address.get("state", ""),
+            postal_code=address.get("postal_code", ""),
+        )
+    return address_key(address)
+
+
+def _parse_recorded(record: dict, address: AddressInput) -> AddressVerificationResult:
+    if "result" in record:
+        result = dict(record["result"])
+        suggested = result.get("suggested_address")
+        return AddressVerificationResult(
+            is_valid=result.get("is_valid", False),
+            is_corrected=result.get("is_corrected", False),
+            suggested_address=AddressNormalized(**suggested) if suggested else None,
+            messages=result.get("messages", []),
+            raw=record.get("response_payload", {}),
+        )
+
+    provider = record.get("provider")
+    response = record.get("response_payload", {}).get("response")
+    if provider == "google":
+        return google.parse_response(address, response or {})
+    if provider == "smarty":
+        return smarty.parse_response(address, response or [])
+    if provider == "usps":
+        return usps.parse_response(address, (response or {}).get("xml", ""))
+    raise ValueError(f"Cannot replay responses recorded from {provider!r}")
+
+
+def _read_fixture(path: Path) -> list[dict]:
+    text = path.read_text(encoding="utf-8")
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+@lru_cache(maxsize=8)
+def load_recordings(
+    fixtures: tuple[str, ...], from_attempts: bool, attempt_limit: int
+) -> dict[str, dict]:
+    """Index recorded responses by address; later recordings win."""
+    records: list[dict] = []
+    if from_attempts:
+        from addresses.models import VerificationAttempt
+
+        records.extend(
+            VerificationAttempt.objects.filter(
+                status=VerificationAttempt.Status.SUCCESS
+            )
+            .exclude(response_payload={})
+            .order_by("created_at")
+            .values("provider", "request_payload", "response_payload")[:attempt_limit]
+        )
+    for fixture in fixtures:
+        records.extend(_read_fixture(Path(fixture)))
+
+    return {replay_key(record["request_payload"]): record for record in records}
+
+
+class LatencyModel:
+    def __init__(self, config: dict | None, rng: random.Random):
+        self.config = config or {}
+        self.rng = rng
+
+    def sample(self) -> float:
+        """Return a delay in seconds."""
+        distribution = self.config.get("distribution", "fixed")
+        if distribution == "uniform":
+            millis = self.rng.uniform(
+                self.config.get("min_ms", 0), self.config.get("max_ms", 0)
+            )
+        elif distribution == "lognormal":
+            median = self.config.get("median_ms", 100)
+            millis = self.rng.lognormvariate(0, self.config.get("sigma", 0.5)) * median
+        else:
+            millis = self.config.get("ms", 0)
+        return max(0.0, millis) / 1000
+
+
+class ReplayProvider:
+    def __init__(
+        self,
+        recordings: dict[str, dict],
+        name: str = "replay",
+        latency: dict | None = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        on_miss: str = ON_MISS_ECHO,
+        seed: int | None = None,
+    ):
+        self.name = name
+        self.recordings = recordings
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.on_miss = on_miss
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.latency = LatencyModel(latency, self._rng)
+
+    @classmethod
+    def from_settings(cls) -> ReplayProvider:
+        """The process's provider for the current ``ADDRESS_REPLAY``.
+
+        Providers are built per verification, so one is kept per
+        configuration: a fresh instance would reseed its RNG and replay the
+        same latency and error roll on every call.
+        """
+        config = getattr(settings, "ADDRESS_REPLAY", {}) or {}
+        return _configured_provider(json.dumps(config, sort_keys=True))
+
+    @classmethod
+    def from_config(cls, config: dict) -> ReplayProvider:
+        recordings = load_recordings(
+            tuple(config.get("fixtures", ())),
+            bool(config.get("from_attempts", False)),
+            int(config.get("attempt_limit", 100_000)),
+        )
+        return cls(
+            recordings,
+            name=config.get("name", "replay"),
+            latency=config.get("latency"),
+            error_rate=config.get("error_rate", 0.0),
+            rate_limit_rate=config.get("rate_limit_rate", 0.0),
+            on_miss=config.get("on_miss", ON_MISS_ECHO),
+            seed=config.get("seed"),
+        )
+
+    def verify(self, address: AddressInput) -> AddressVerificationResult:
+        with self._rng_lock:
+            delay = self.latency.sample()
+            roll = self._rng.random()
+        time.sleep(delay)
+
+        if roll < self.rate_limit_rate:
+            raise AddressProviderError(
+                "Replay service unavailable (429)", retryable=True
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise AddressProviderError(
+                "Replay service unavailable (503)", retryable=True
+            )
+
+        record = self.recordings.get(replay_key(address))
+        if record is not None:
+            return _parse_recorded(record, address)
+
+        if self.on_miss == ON_MISS_ERROR:
+            raise AddressProviderError("Replay has no recording for address")
+        if self.on_miss == ON_MISS_INVALID:
+            return AddressVerificationResult(
+                is_valid=False,
+                is_corrected=False,
+                suggested_address=None,
+                messages=["No match found"],
+                raw={"replay": "miss"},
+            )
+        return AddressVerificationResult(
+            is_valid=True,
+            is_corrected=False,
+            suggested_address=AddressNormalized(
+                street1=address.street1,
+                street2=address.street2,
+                city=address.city,
+                state=address.state,
+                postal_code=address.postal_code,
+                country=address.country,
+            ),
+            messages=[],
+            raw={"replay": "echo"},
+        )
+
+
+@lru_cache(maxsize=8)
+def _configured_provider(config_json: str) -> ReplayProvider:
+    return ReplayProvider.from_config(json.loads(config_json))
@@ -55,40 +55,43 @@ class SmartyProvider:
                 retryable=response.status_code in {401, 403},
             )
 
-        payload = response.json()
-        if not payload:
-            return AddressVerificationResult(
-                is_valid=False,
-                is_corrected=False,
-                suggested_address=None,
-                messages=["No match found"],
-                raw={"response": payload},
-            )
+        return parse_response(address, response.json())
 
-        candidate = payload[0]
-        components = candidate.get("components", {})
-        postal_code = components.get("zipcode", "")
-        plus4 = components.get("plus4_code") or ""
-        if plus4:
-            postal_code = f"{postal_code}-{plus4}"
-
-        suggested = AddressNormalized(
-            street1=candidate.get("delivery_line_1", ""),
-            street2=candidate.get("delivery_line_2", ""),
-            city=components.get("city_name", ""),
-            state=components.get("state_abbreviation", ""),
-            postal_code=postal_code,
-            country="US",
-        )
 
+def parse_response(address: AddressInput, payload: list) -> AddressVerificationResult:
+    if not payload:
         return AddressVerificationResult(
-            is_valid=True,
-            is_corrected=not _addresses_match(address, suggested),
-            suggested_address=suggested,
-            messages=[],
+            is_valid=False,
+            is_corrected=False,
+            suggested_address=None,
+            messages=["No match found"],
             raw={"response": payload},
         )
 
+    candidate = payload[0]
+    components = candidate.get("components", {})
+    postal_code = components.get("zipcode", "")
+    plus4 = components.get("plus4_code") or ""
+    if plus4:
+        postal_code = f"{postal_code}-{plus4}"
+
+    suggested = AddressNormalized(
+        street1=candidate.get("delivery_line_1", ""),
+        street2=candidate.get("delivery_line_2", ""),
+        city=components.get("city_name", ""),
+        state=components.get("state_abbreviation", ""),
+        postal_code=postal_code,
+        country="US",
+    )
+
+    return AddressVerificationResult(
+        is_valid=True,
+        is_corrected=not _addresses_match(address, suggested),
+        suggested_address=suggested,
+        messages=[],
+        raw={"response": payload},
+    )
+
 
 def _addresses_match(original: AddressInput, normalized: AddressNormalized) -> bool:
     def _clean(value: str) -> str:
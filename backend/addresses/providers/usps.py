@@ -60,14 +60,18 @@ class USPSProvider:
                 retryable=response.status_code in {401, 403},
             )
 
-        parsed = _parse_usps_response(response.text, address)
-        return AddressVerificationResult(
-            is_valid=parsed["is_valid"],
-            is_corrected=parsed["is_corrected"],
-            suggested_address=parsed["suggested_address"],
-            messages=parsed["messages"],
-            raw={"response": parsed["raw"]},
-        )
+        return parse_response(address, response.text)
+
+
+def parse_response(address: AddressInput, xml_text: str) -> AddressVerificationResult:
+    parsed = _parse_usps_response(xml_text, address)
+    return AddressVerificationResult(
+        is_valid=parsed["is_valid"],
+        is_corrected=parsed["is_corrected"],
+        suggested_address=parsed["suggested_address"],
+        messages=parsed["messages"],
+        raw={"response": parsed["raw"]},
+    )
 
 
 def _split_zip(postal_code: str) -> tuple[str, str]:
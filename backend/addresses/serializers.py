@@ -0,0 +1,32 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class AddressInputSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, allow_blank=True, default="")
+    street1 = serializers.CharField()
+    street2 = serializers.CharField(required=False, allow_blank=True, default="")
+    city = serializers.CharField()
+    state = serializers.CharField(max_length=2)
+    postal_code = serializers.CharField(max_length=10)
+    country = serializers.CharField(max_length=2, required=False, default="US")
+
+
+class AddressVerifyRequestSerializer(serializers.Serializer):
+    address_type = serializers.ChoiceField(choices=["to", "from"], default="to")
+    addresses = serializers.ListField(
+        child=AddressInputSerializer(),
+        allow_empty=False,
+        max_length=settings.ADDRESS_VERIFY_BULK_MAX_ITEMS,
+    )  # type: ignore[assignment]
+
+
+class AddressVerifyResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    status = serializers.CharField()
+    details = serializers.DictField()
+    cached = serializers.BooleanField()
+
+
+class AddressVerifyResponseSerializer(serializers.Serializer):
+    results = AddressVerifyResultSerializer(many=True)
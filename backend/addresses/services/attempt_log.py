@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+import structlog
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from addresses.models import VerificationAttempt
+from shipments.models import Shipment
+
+logger = structlog.get_logger(__name__)
+
+BACKEND_DB = "db"
+BACKEND_SPOOL = "spool"
+
+
+def _spool_dir() -> Path:
+    return Path(settings.ADDRESS_ATTEMPT_SPOOL_DIR)
+
+
+class AttemptLog:
+    """Collects VerificationAttempt rows and writes them in batches.
+
+    With the ``db`` backend a flush is a single ``bulk_create``; with the
+    ``spool`` backend rows are appended to a per-process NDJSON file that
+    ``load_attempt_spool`` later moves into the database. Worker threads may
+    ``add`` to a shared log; only the thread that created it flushes.
+    """
+
+    def __init__(self, backend: str | None = None, batch_size: int | None = None):
+        self.backend = backend or getattr(
+            settings, "ADDRESS_ATTEMPT_LOG_BACKEND", BACKEND_DB
+        )
+        self.batch_size = batch_size or getattr(
+            settings, "ADDRESS_ATTEMPT_LOG_BATCH_SIZE", 500
+        )
+        self._pending: list[VerificationAttempt] = []
+        self._lock = threading.Lock()
+        self._owner = threading.get_ident()
+
+    def __enter__(self) -> AttemptLog:
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(
+        self,
+        *,
+        shipment_id,
+        provider: str,
+        status: str,
+        request_payload: dict,
+        response_payload: dict,
+        error: str | None = None,
+    ) -> None:
+        attempt = VerificationAttempt(
+            shipment_id=shipment_id,
+            provider=provider,
+            status=status,
+            request_payload=request_payload,
+            response_payload=response_payload,
+            error=error,
+            created_at=timezone.now(),
+        )
+        with self._lock:
+            self._pending.append(attempt)
+            full = len(self._pending) >= self.batch_size
+        if full and threading.get_ident() == self._owner:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            attempts, self._pending = self._pending, []
+        if not attempts:
+            return 0
+        if self.backend == BACKEND_SPOOL:
+            _append_to_spool(attempts)
+        else:
+            VerificationAttempt.objects.bulk_create(
+                attempts, batch_size=self.batch_size
+            )
+        return len(attempts)
+
+
+def _append_to_spool(attempts: list[VerificationAttempt]) -> None:
+    spool_dir = _spool_dir()
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    lines = "".join(
+        json.dumps(
+            {
+                "id": str(attempt.id),
+                "shipment_id": str(attempt.shipment_id)
+                if attempt.shipment_id
+                else None,
+                "provider": attempt.provider,
+                "status": attempt.status,
+                "request_payload": attempt.request_payload,
+                "response_payload": attempt.response_payload,
+                "error": attempt.error,
+                "created_at": attempt.created_at,
+            },
+            cls=DjangoJSONEncoder,
+        )
+        + "\n"
+        for attempt in attempts
+    )
+    # One file per process, so concurrent workers never interleave lines.
+    with (spool_dir / f"attempts-{os.getpid()}.ndjson").open("a") as handle:
+        handle.write(lines)
+
+
+def load_attempt_spool(batch_size: int = 1000) -> int:
+    """Move spooled attempts into the database; returns how many were inserted.
+
+    Files are renamed before loading so writers start a fresh file, and rows
+    keep their spooled ids so a crashed load can simply be re-run. A line
+    that doesn't parse (say, the last line of a writer killed mid-append), or
+    whose shipment has since been deleted, is skipped and kept in a
+    ``rejected-*.ndjson`` file for inspection.
+    """
+    spool_dir = _spool_dir()
+    if not spool_dir.exists():
+        return 0
+
+    for path in spool_dir.glob("attempts-*.ndjson"):
+        path.rename(path.with_name(f"loading-{uuid.uuid4().hex}.ndjson"))
+
+    loaded = 0
+    for path in sorted(spool_dir.glob("loading-*.ndjson")):
+        batch: list[tuple[VerificationAttempt, str]] = []
+        rejected: list[str] = []
+        with path.open() as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                line = line if line.endswith("\n") else line + "\n"
+                try:
+                    batch.append((_parse_spooled_attempt(line), line))
+                except (ValueError, KeyError, TypeError):
+                    rejected.append(line)
+                    continue
+                if len(batch) >= batch_size:
+                    loaded += _load_batch(batch, rejected)
+                    batch = []
+        loaded += _load_batch(batch, rejected)
+        if rejected:
+            rejected_path = path.with_name(path.name.replace("loading-", "rejected-"))
+            rejected_path.write_text("".join(rejected))
+            logger.warning(
+                "address.attempts.spool_lines_rejected",
+                line_count=len(rejected),
+                path=str(rejected_path),
+            )
+        path.unlink()
+
+    logger.info("address.attempts.spool_loaded", attempt_count=loaded)
+    return loaded
+
+
+def _parse_spooled_attempt(line: str) -> VerificationAttempt:
+    row = json.loads(line)
+    row["id"] = uuid.UUID(row["id"])
+    if row["shipment_id"] is not None:
+        row["shipment_id"] = uuid.UUID(row["shipment_id"])
+    row["created_at"] = parse_datetime(row["created_at"])
+    return VerificationAttempt(**row)
+
+
+def _load_batch(
+    batch: list[tuple[VerificationAttempt, str]], rejected: list[str]
+) -> int:
+    """Insert the attempts of ``batch`` not already loaded; returns how many.
+
+    Lines whose shipment no longer exists are added to ``rejected`` instead,
+    since their foreign key would fail the whole insert.
+    """
+    if not batch:
+        return 0
+    shipment_ids = {
+        attempt.shipment_id for attempt, _line in batch if attempt.shipment_id
+    }
+    existing_shipments = set(
+        Shipment.objects.filter(id__in=shipment_ids).values_list("id", flat=True)
+    )
+    loaded_ids = set(
+        VerificationAttempt.objects.filter(
+            id__in=[attempt.id for attempt, _line in batch]
+        ).values_list("id", flat=True)
+    )
+    attempts = []
+    for attempt, line in batch:
+        if attempt.shipment_id and attempt.shipment_id not in existing_shipments:
+            rejected.append(line)
+        elif attempt.id not in loaded_ids:
+            loaded_ids.add(attempt.id)
+            attempts.append(attempt)
+    VerificationAttempt.objects.bulk_create(attempts, ignore_conflicts=True)
+    return len(attempts)
+
+
+def compact_attempts(batch_size: int = 5000) -> dict:
+    """Apply retention to VerificationAttempt.
+
+    Attempts older than ``ADDRESS_ATTEMPT_RETENTION_DAYS`` are deleted, and
+    attempts older than ``ADDRESS_ATTEMPT_COMPACT_AFTER_DAYS`` keep their
+    metadata but drop the request/response payloads. Both run in id batches
+    to keep each statement's lock footprint small.
+    """
+    now = timezone.now()
+    retention_cutoff = now - timedelta(days=settings.ADDRESS_ATTEMPT_RETENTION_DAYS)
+    compact_cutoff = now - timedelta(days=settings.ADDRESS_ATTEMPT_COMPACT_AFTER_DAYS)
+
+    deleted = 0
+    expired = VerificationAttempt.objects.filter(created_at__lt=retention_cutoff)
+    while ids := list(expired.values_list("id", flat=True)[:batch_size]):
+        deleted += VerificationAttempt.objects.filter(id__in=ids).delete()[0]
+
+    compacted = 0
+    stale = VerificationAttempt.objects.filter(created_at__lt=compact_cutoff).exclude(
+        request_payload={}, response_payload={}
+    )
+    while ids := list(stale.values_list("id", flat=True)[:batch_size]):
+        compacted += VerificationAttempt.objects.filter(id__in=ids).update(
+            request_payload={}, response_payload={}
+        )
+
+    logger.info(
+        "address.attempts.compacted",
+        deleted_count=deleted,
+        compacted_count=compacted,
+    )
+    return {"deleted": deleted, "compacted": compacted}
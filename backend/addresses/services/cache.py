@@ -0,0 +1,109 @@
+"""Verification results cached by canonical address key.
+
+``verify_address`` answers from ``VerifiedAddress`` until an entry expires
+(``ADDRESS_VERIFY_CACHE_TTL_DAYS``); see ``refresh.py`` for how entries are
+kept fresh. Each entry also stores the canonical address it was verified
+for, and a hit is only served when that matches the lookup exactly, so a
+key collision is a miss rather than another address's result.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from addresses.models import VerifiedAddress
+from addresses.providers.base import AddressInput
+from addresses.services.canonical import address_key, canonical_address
+from shipments.models import Shipment
+
+CACHEABLE_STATUSES = (
+    Shipment.AddressVerificationStatus.VALID,
+    Shipment.AddressVerificationStatus.CORRECTED,
+    Shipment.AddressVerificationStatus.INVALID,
+)
+# Hits only bump last_used_at when it is older than this, so a hot entry
+# costs one write per interval rather than one per lookup.
+USE_TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def cache_ttl() -> timedelta:
+    return timedelta(days=getattr(settings, "ADDRESS_VERIFY_CACHE_TTL_DAYS", 0))
+
+
+def cache_enabled() -> bool:
+    return cache_ttl() > timedelta(0)
+
+
+def cached_outcome(address: AddressInput, address_type: str) -> tuple[str, dict] | None:
+    key = address_key(address)
+    return cached_outcomes({key: address}, address_type).get(key)
+
+
+def cached_outcomes(
+    addresses: dict[str, AddressInput], address_type: str
+) -> dict[str, tuple[str, dict]]:
+    """Unexpired cached results for ``addresses``, keyed by ``address_key``."""
+    if not cache_enabled() or not addresses:
+        return {}
+    now = timezone.now()
+    entries = [
+        entry
+        for entry in VerifiedAddress.objects.filter(
+            address_key__in=addresses, expires_at__gt=now
+        )
+        if entry.canonical == canonical_address(addresses[entry.address_key])
+    ]
+    stale = [e.pk for e in entries if e.last_used_at < now - USE_TOUCH_INTERVAL]
+    if stale:
+        VerifiedAddress.objects.filter(pk__in=stale).update(last_used_at=now)
+    return {
+        entry.address_key: (
+            entry.status,
+            {**entry.details, "address_type": address_type},
+        )
+        for entry in entries
+    }
+
+
+def store_outcome(address: AddressInput, status: str, details: dict) -> None:
+    store_outcomes([(address, status, details)])
+
+
+def store_outcomes(outcomes: list[tuple[AddressInput, str, dict]]) -> None:
+    """Upsert fresh results; ``last_used_at`` is only set on insert."""
+    if not cache_enabled():
+        return
+    now = timezone.now()
+    entries = {}
+    for address, status, details in outcomes:
+        if status not in CACHEABLE_STATUSES:
+            continue
+        key = address_key(address)
+        entries[key] = VerifiedAddress(
+            address_key=key,
+            canonical=canonical_address(address),
+            address=asdict(address),
+            status=status,
+            details=details,
+            verified_at=now,
+            expires_at=now + cache_ttl(),
+            last_used_at=now,
+        )
+    if entries:
+        VerifiedAddress.objects.bulk_create(
+            entries.values(),
+            update_conflicts=True,
+            unique_fields=["address_key"],
+            update_fields=[
+                "canonical",
+                "address",
+                "status",
+                "details",
+                "verified_at",
+                "expires_at",
+            ],
+        )
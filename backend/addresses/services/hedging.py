@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Rolling per-provider latency window used to pick hedge delays."""
+
+    def __init__(self, window: int = 500):
+        self._window = window
+        self._samples: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=self._window)
+        )
+        self._lock = threading.Lock()
+
+    def observe(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[provider].append(seconds)
+
+    def percentile(self, provider: str, pct: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+class HedgeBudget:
+    """Caps hedged provider calls to a fraction of primary calls.
+
+    Every primary call earns ``ratio`` tokens, and a hedge spends one. The
+    balance is capped at ``burst`` so an idle period can't bank unlimited
+    hedges for the next spike. Either left unset is read from settings on
+    each call.
+    """
+
+    def __init__(self, ratio: float | None = None, burst: float | None = None):
+        self._ratio = ratio
+        self._burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ratio(self) -> float:
+        if self._ratio is not None:
+            return self._ratio
+        return getattr(settings, "ADDRESS_VERIFY_HEDGE_BUDGET", 0.1)
+
+    @property
+    def burst(self) -> float:
+        if self._burst is not None:
+            return self._burst
+        return getattr(settings, "ADDRESS_VERIFY_HEDGE_BURST", 10)
+
+    def record_primary(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tokens = 0.0
+
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+
+def hedging_enabled() -> bool:
+    return bool(getattr(settings, "ADDRESS_VERIFY_HEDGING", False))
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait on ``provider`` before firing a hedge."""
+    p95 = latency_tracker.percentile(provider, 95)
+    if p95 is None:
+        return getattr(settings, "ADDRESS_VERIFY_HEDGE_DEFAULT_DELAY_MS", 1000) / 1000
+    floor = getattr(settings, "ADDRESS_VERIFY_HEDGE_MIN_DELAY_MS", 50) / 1000
+    return max(p95, floor)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from addresses.providers.base import AddressInput
+from addresses.services.canonical import address_key
+from shipments.models import SavedAddressPreset, Shipment
+
+VERIFIED_STATUSES = (
+    Shipment.AddressVerificationStatus.VALID,
+    Shipment.AddressVerificationStatus.CORRECTED,
+)
+
+
+def preset_address(preset: SavedAddressPreset) -> AddressInput:
+    return AddressInput(
+        name=preset.contact_name,
+        street1=preset.street1,
+        street2=preset.street2,
+        city=preset.city,
+        state=preset.state,
+        postal_code=preset.postal_code,
+        country=preset.country or "US",
+    )
+
+
+def find_verified_preset(address: AddressInput) -> SavedAddressPreset | None:
+    return (
+        SavedAddressPreset.objects.filter(
+            address_key=address_key(address),
+            verification_status__in=VERIFIED_STATUSES,
+        )
+        .order_by("-verified_at")
+        .first()
+    )
+
+
+def preset_outcome(preset: SavedAddressPreset) -> tuple[str, dict]:
+    """The stored preset result, shaped like a provider verification."""
+    if preset.verification_status not in VERIFIED_STATUSES:
+        return Shipment.AddressVerificationStatus.NOT_STARTED, {}
+    return (
+        preset.verification_status,
+        {
+            **preset.verification_details,
+            "address_type": "from",
+            "preset_id": str(preset.id),
+            "verified_at": preset.verified_at.isoformat()
+            if preset.verified_at
+            else None,
+        },
+    )
@@ -0,0 +1,96 @@
+"""Off-peak refresh of verification results nearing their TTL.
+
+Beat runs ``refresh_expiring`` during ``ADDRESS_VERIFY_REFRESH_HOURS``. It
+re-verifies cache entries that are still being read, plus saved presets,
+before they go stale, so merchant-facing lookups keep hitting a warm cache
+without paying for provider calls on the critical path.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+import structlog
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from addresses.models import VerifiedAddress
+from addresses.providers.base import AddressInput
+from addresses.services.attempt_log import AttemptLog
+from addresses.services.cache import CACHEABLE_STATUSES, cache_enabled, cache_ttl
+from addresses.services.verify import verify_address, verify_preset
+from shipments.models import SavedAddressPreset
+
+logger = structlog.get_logger(__name__)
+
+
+class RatePacer:
+    """Spaces calls so at most ``rate`` start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+
+def refresh_expiring(limit: int | None = None, rate: float | None = None) -> dict:
+    """Re-verify cache entries and saved presets nearing their TTL.
+
+    Only cache entries read since they were last verified are refreshed;
+    unused ones are left to expire. At most ``limit`` addresses are
+    verified, no faster than ``rate`` per second.
+    """
+    if not cache_enabled():
+        return {"entries": 0, "presets": 0}
+    if limit is None:
+        limit = settings.ADDRESS_VERIFY_REFRESH_LIMIT
+    if rate is None:
+        rate = settings.ADDRESS_VERIFY_REFRESH_RATE
+    horizon = timezone.now() + timedelta(
+        days=settings.ADDRESS_VERIFY_REFRESH_AHEAD_DAYS
+    )
+    pacer = RatePacer(rate)
+
+    entries = list(
+        VerifiedAddress.objects.filter(
+            expires_at__lt=horizon, last_used_at__gt=F("verified_at")
+        ).order_by("expires_at")[:limit]
+    )
+    refreshed = 0
+    with AttemptLog() as attempt_log:
+        for entry in entries:
+            pacer.wait()
+            address = AddressInput(**entry.address)
+            # verify_address stores fresh results back into the cache.
+            status, _ = verify_address(
+                address,
+                entry.details.get("address_type", "to"),
+                attempt_log,
+                use_cache=False,
+            )
+            if status in CACHEABLE_STATUSES:
+                refreshed += 1
+
+    presets = list(
+        SavedAddressPreset.objects.filter(
+            verified_at__lt=horizon - cache_ttl()
+        ).order_by("verified_at")[: max(limit - len(entries), 0)]
+    )
+    for preset in presets:
+        pacer.wait()
+        verify_preset(preset, use_cache=False)
+
+    logger.info(
+        "address.cache.refreshed",
+        entry_count=len(entries),
+        refreshed_count=refreshed,
+        preset_count=len(presets),
+    )
+    return {"entries": refreshed, "presets": len(presets)}
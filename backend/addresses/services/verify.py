@@ -1,27 +1,76 @@
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import asdict
+from functools import partial
+from itertools import islice
 
 import structlog
 from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 
 from addresses.models import VerificationAttempt
-from addresses.providers.base import AddressInput, AddressProviderError
+from addresses.providers.base import (
+    AddressInput,
+    AddressProviderError,
+    AddressVerificationResult,
+)
 from addresses.providers.google import GoogleAddressProvider
+from addresses.providers.replay import ReplayProvider
 from addresses.providers.smarty import SmartyProvider
-from shipments.models import Shipment
+from addresses.providers.usps import USPSProvider
+from addresses.services.attempt_log import AttemptLog
+from addresses.services.cache import (
+    cached_outcome,
+    cached_outcomes,
+    store_outcome,
+    store_outcomes,
+)
+from addresses.services.canonical import address_key
+from addresses.services.hedging import (
+    hedge_budget,
+    hedge_delay,
+    hedging_enabled,
+    latency_tracker,
+)
+from addresses.services.presets import (
+    find_verified_preset,
+    preset_address,
+    preset_outcome,
+)
+from addresses.services.zip_index import check_address
+from shipments.models import SavedAddressPreset, Shipment
+from shipments.services.validation import validate_shipment
 
 logger = structlog.get_logger(__name__)
 
+_executor: ThreadPoolExecutor | None = None
+_executor_workers = 0
+# Provider calls submitted to ``_executor`` and not yet finished.
+_executor_in_flight = 0
+_bulk_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+PROVIDER_FACTORIES = {
+    "google": lambda: GoogleAddressProvider(
+        getattr(settings, "GOOGLE_ADDRESS_API_KEY", None)
+    ),
+    "smarty": lambda: SmartyProvider(
+        getattr(settings, "SMARTY_AUTH_ID", None),
+        getattr(settings, "SMARTY_AUTH_TOKEN", None),
+    ),
+    "usps": lambda: USPSProvider(getattr(settings, "USPS_USER_ID", None)),
+    "replay": ReplayProvider.from_settings,
+}
+
 
 def get_providers():
-    return [
-        GoogleAddressProvider(getattr(settings, "GOOGLE_ADDRESS_API_KEY", None)),
-        SmartyProvider(
-            getattr(settings, "SMARTY_AUTH_ID", None),
-            getattr(settings, "SMARTY_AUTH_TOKEN", None),
-        ),
-    ]
+    names = getattr(settings, "ADDRESS_PROVIDERS", None) or ["google", "smarty"]
+    return [PROVIDER_FACTORIES[name]() for name in names]
 
 
 def should_verify_to(shipment: Shipment) -> bool:
@@ -48,7 +97,7 @@ def should_verify_from(shipment: Shipment) -> bool:
     return all(value and str(value).strip() for value in required)
 
 
-def _address_from_shipment(shipment: Shipment, address_type: str) -> AddressInput:
+def address_from_shipment(shipment: Shipment, address_type: str) -> AddressInput:
     if address_type == "from":
         return AddressInput(
             name=shipment.from_name,
@@ -70,67 +119,587 @@ def _address_from_shipment(shipment: Shipment, address_type: str) -> AddressInpu
     )
 
 
-def verify_shipment_address(shipment: Shipment, address_type: str) -> tuple[str, dict]:
-    address = _address_from_shipment(shipment, address_type)
+def _record_attempt(
+    attempt_log: AttemptLog,
+    shipment_id,
+    provider_name: str,
+    address: AddressInput,
+    address_type: str,
+    result: AddressVerificationResult | None = None,
+    error: str | None = None,
+) -> None:
+    attempt_log.add(
+        shipment_id=shipment_id,
+        provider=provider_name,
+        status=VerificationAttempt.Status.SUCCESS
+        if result is not None
+        else VerificationAttempt.Status.FAILURE,
+        request_payload={**asdict(address), "address_type": address_type},
+        response_payload=result.raw if result is not None else {},
+        error=error,
+    )
+
+
+def _build_outcome(
+    provider_name: str, result: AddressVerificationResult, address_type: str
+) -> tuple[str, dict]:
+    if result.is_corrected:
+        status = Shipment.AddressVerificationStatus.CORRECTED
+    elif result.is_valid:
+        status = Shipment.AddressVerificationStatus.VALID
+    else:
+        status = Shipment.AddressVerificationStatus.INVALID
+
+    details = {
+        "provider": provider_name,
+        "messages": result.messages,
+        "suggested_address": asdict(result.suggested_address)
+        if result.suggested_address
+        else None,
+        "raw": result.raw,
+        "address_type": address_type,
+    }
+    return status, details
+
+
+def _timed_verify(provider, address: AddressInput) -> AddressVerificationResult:
+    started = time.monotonic()
+    try:
+        return provider.verify(address)
+    finally:
+        latency_tracker.observe(provider.name, time.monotonic() - started)
+
+
+def _failed_outcome(
+    shipment_id, address_type: str, last_error: Exception | None
+) -> tuple[str, dict]:
+    logger.error(
+        "address.verify.failure",
+        shipment_id=str(shipment_id),
+        error=str(last_error) if last_error else "No providers configured",
+        address_type=address_type,
+    )
+    return (
+        Shipment.AddressVerificationStatus.FAILED,
+        {"error": str(last_error) if last_error else "No providers configured"},
+    )
+
+
+def verify_shipment_address(
+    shipment: Shipment, address_type: str, attempt_log: AttemptLog | None = None
+) -> tuple[str, dict]:
+    """Verify one side of ``shipment`` against the configured providers.
+
+    A from-address that matches a verified saved preset inherits the
+    preset's stored result instead of calling a provider.
+    """
+    address = address_from_shipment(shipment, address_type)
+    if address_type == "from":
+        preset = find_verified_preset(address)
+        if preset is not None:
+            return preset_outcome(preset)
+    return verify_address(address, address_type, attempt_log, shipment_id=shipment.id)
+
+
+def verify_address(
+    address: AddressInput,
+    address_type: str,
+    attempt_log: AttemptLog | None = None,
+    shipment_id=None,
+    use_cache: bool = True,
+) -> tuple[str, dict]:
+    """Verify ``address`` against the configured providers.
+
+    Attempts are buffered on ``attempt_log``; callers verifying many
+    addresses should pass one log and flush it once. Without a log the
+    attempts for this call are written in a single batch on return.
+    Unexpired cached results are returned without a provider call unless
+    ``use_cache`` is false; fresh results are always written back.
+    """
+    if attempt_log is None:
+        with AttemptLog() as call_log:
+            return verify_address(
+                address, address_type, call_log, shipment_id, use_cache
+            )
+
+    zip_outcome = _zip_index_outcome(address, address_type)
+    if zip_outcome is not None:
+        return zip_outcome
+
+    if use_cache:
+        cached = cached_outcome(address, address_type)
+        if cached is not None:
+            return cached
+
+    status, details = _verify_with_providers(
+        shipment_id, address, address_type, attempt_log
+    )
+    store_outcome(address, status, details)
+    return status, details
+
+
+def verify_addresses(
+    addresses: list[AddressInput], address_type: str = "to"
+) -> list[tuple[str, dict, bool]]:
+    """Verify a batch of addresses not tied to shipments.
+
+    Returns ``(status, details, cached)`` per input, in order. Addresses
+    sharing a canonical key are verified once, cache hits are read in one
+    query, and misses run on the shared ``ADDRESS_VERIFY_BULK_WORKERS``
+    threads, at most ``ADDRESS_VERIFY_BULK_MAX_IN_FLIGHT`` at a time per
+    call. Misses not answered within ``ADDRESS_VERIFY_BULK_TIMEOUT_MS`` come
+    back FAILED so the batch answers within its deadline.
+    """
+    keys = [address_key(address) for address in addresses]
+    unique = dict(zip(keys, addresses, strict=True))
+
+    outcomes: dict[str, tuple[str, dict]] = {}
+    for key, address in unique.items():
+        zip_outcome = _zip_index_outcome(address, address_type)
+        if zip_outcome is not None:
+            outcomes[key] = zip_outcome
+
+    cached = cached_outcomes(
+        {key: address for key, address in unique.items() if key not in outcomes},
+        address_type,
+    )
+    outcomes.update(cached)
+
+    misses = {key: unique[key] for key in unique if key not in outcomes}
+    if misses:
+        executor = _get_bulk_executor()
+        deadline = time.monotonic() + settings.ADDRESS_VERIFY_BULK_TIMEOUT_MS / 1000
+        max_in_flight = settings.ADDRESS_VERIFY_BULK_MAX_IN_FLIGHT
+        queued = iter(misses.items())
+        running: dict[Future, str] = {}
+        fresh = []
+        with AttemptLog() as attempt_log:
+            while True:
+                for key, address in islice(queued, max_in_flight - len(running)):
+                    future = executor.submit(
+                        _verify_with_providers, None, address, address_type, attempt_log
+                    )
+                    running[future] = key
+                if not running:
+                    break
+                done, _ = wait(
+                    running,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                for future in done:
+                    key = running.pop(future)
+                    outcomes[key] = _bulk_outcome(future, address_type)
+                    fresh.append((misses[key], *outcomes[key]))
+            timed_out = TimeoutError("Verification timed out")
+            for future, key in running.items():
+                # A running call can't be stopped; its result still goes to
+                # the cache when it lands.
+                future.add_done_callback(
+                    partial(
+                        _store_late_outcome,
+                        misses[key],
+                        attempt_log,
+                        threading.get_ident(),
+                    )
+                )
+                outcomes[key] = _failed_outcome(None, address_type, timed_out)
+            for key, _address in queued:
+                outcomes[key] = _failed_outcome(None, address_type, timed_out)
+        store_outcomes(fresh)
+
+    logger.info(
+        "address.verify.bulk_completed",
+        address_count=len(addresses),
+        unique_count=len(unique),
+        cached_count=len(cached),
+        verified_count=len(misses),
+    )
+    return [(*outcomes[key], key in cached) for key in keys]
+
+
+def _bulk_outcome(future: Future, address_type: str) -> tuple[str, dict]:
+    try:
+        return future.result()
+    except Exception as exc:
+        # A provider bug fails its own address, not the whole batch.
+        logger.exception("address.verify.bulk_error", address_type=address_type)
+        return _failed_outcome(None, address_type, exc)
+
+
+def _store_late_outcome(
+    address: AddressInput,
+    attempt_log: AttemptLog,
+    caller: int,
+    future: Future,
+) -> None:
+    if future.exception() is not None:
+        return
+    status, details = future.result()
+    try:
+        store_outcome(address, status, details)
+        attempt_log.flush()
+    finally:
+        if threading.get_ident() != caller:
+            # Bulk worker threads aren't request threads, so nothing else
+            # closes the connection this opened.
+            connection.close()
+
+
+def _zip_index_outcome(
+    address: AddressInput, address_type: str
+) -> tuple[str, dict] | None:
+    mismatches = [
+        error
+        for error in check_address(address.city, address.state, address.postal_code)
+        if error["code"] == "postal_code_state_mismatch"
+    ]
+    if not mismatches:
+        return None
+    # The offline index already proves this address can't verify, so don't
+    # spend a paid lookup on it. A city mismatch is left to the providers.
+    return (
+        Shipment.AddressVerificationStatus.INVALID,
+        {
+            "provider": "zip_index",
+            "messages": [error["message"] for error in mismatches],
+            "suggested_address": None,
+            "raw": {},
+            "address_type": address_type,
+        },
+    )
+
+
+def _verify_with_providers(
+    shipment_id, address: AddressInput, address_type: str, attempt_log: AttemptLog
+) -> tuple[str, dict]:
     providers = get_providers()
+    if hedging_enabled() and len(providers) > 1:
+        return _verify_hedged(
+            shipment_id, address, address_type, providers, attempt_log
+        )
+
     last_error = None
 
     for provider in providers:
         try:
-            result = provider.verify(address)
+            result = _timed_verify(provider, address)
         except AddressProviderError as exc:
             last_error = exc
-            VerificationAttempt.objects.create(
-                shipment=shipment,
-                provider=provider.name,
-                status=VerificationAttempt.Status.FAILURE,
-                request_payload={**asdict(address), "address_type": address_type},
-                response_payload={},
+            _record_attempt(
+                attempt_log,
+                shipment_id,
+                provider.name,
+                address,
+                address_type,
                 error=str(exc),
             )
             if exc.retryable:
                 logger.info(
                     "address.verify.fallback_attempt",
-                    shipment_id=str(shipment.id),
+                    shipment_id=str(shipment_id),
                     provider=provider.name,
                     address_type=address_type,
                 )
                 continue
             break
 
-        VerificationAttempt.objects.create(
-            shipment=shipment,
-            provider=provider.name,
-            status=VerificationAttempt.Status.SUCCESS,
-            request_payload={**asdict(address), "address_type": address_type},
-            response_payload=result.raw,
+        _record_attempt(
+            attempt_log,
+            shipment_id,
+            provider.name,
+            address,
+            address_type,
+            result=result,
         )
+        return _build_outcome(provider.name, result, address_type)
 
-        if result.is_corrected:
-            status = Shipment.AddressVerificationStatus.CORRECTED
-        elif result.is_valid:
-            status = Shipment.AddressVerificationStatus.VALID
-        else:
-            status = Shipment.AddressVerificationStatus.INVALID
-
-        details = {
-            "provider": provider.name,
-            "messages": result.messages,
-            "suggested_address": asdict(result.suggested_address)
-            if result.suggested_address
-            else None,
-            "raw": result.raw,
-            "address_type": address_type,
-        }
-        return status, details
+    return _failed_outcome(shipment_id, address_type, last_error)
 
-    logger.error(
-        "address.verify.failure",
-        shipment_id=str(shipment.id),
-        error=str(last_error) if last_error else "No providers configured",
-        address_type=address_type,
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            _executor_workers = getattr(settings, "ADDRESS_VERIFY_HEDGE_WORKERS", 8)
+            _executor = ThreadPoolExecutor(
+                max_workers=_executor_workers,
+                thread_name_prefix="address-verify",
+            )
+        return _executor
+
+
+def _submit_provider_call(provider, address: AddressInput) -> Future:
+    global _executor_in_flight
+    executor = _get_executor()
+    with _executor_lock:
+        _executor_in_flight += 1
+    future = executor.submit(_timed_verify, provider, address)
+    future.add_done_callback(_provider_call_finished)
+    return future
+
+
+def _provider_call_finished(_future: Future) -> None:
+    global _executor_in_flight
+    with _executor_lock:
+        _executor_in_flight -= 1
+
+
+def _hedge_pool_has_room() -> bool:
+    # A hedge queued behind a saturated pool starts no sooner than the call
+    # it is meant to race, so only hedge into an idle worker.
+    with _executor_lock:
+        return _executor_in_flight < _executor_workers
+
+
+def _get_bulk_executor() -> ThreadPoolExecutor:
+    # Separate from the hedging pool: bulk workers may themselves hedge, and
+    # sharing one bounded pool could starve those nested calls.
+    global _bulk_executor
+    with _executor_lock:
+        if _bulk_executor is None:
+            _bulk_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ADDRESS_VERIFY_BULK_WORKERS", 16),
+                thread_name_prefix="address-verify-bulk",
+            )
+        return _bulk_executor
+
+
+def _record_abandoned_attempt(
+    attempt_log: AttemptLog,
+    caller: int,
+    shipment_id,
+    provider_name: str,
+    address: AddressInput,
+    address_type: str,
+    future: Future,
+) -> None:
+    result = error = None
+    if future.cancelled():
+        error = "cancelled: a hedged call answered first"
+    elif future.exception() is not None:
+        error = str(future.exception())
+    else:
+        result = future.result()
+    if threading.get_ident() == caller:
+        # Cancelled, or done before the hedge returned: the caller's log
+        # still takes it.
+        _record_attempt(
+            attempt_log,
+            shipment_id,
+            provider_name,
+            address,
+            address_type,
+            result=result,
+            error=error,
+        )
+        return
+    # Finished on a worker thread, possibly after the caller's log was
+    # flushed, so write it through a log of its own.
+    late_log = AttemptLog(attempt_log.backend)
+    try:
+        _record_attempt(
+            late_log,
+            shipment_id,
+            provider_name,
+            address,
+            address_type,
+            result=result,
+            error=error,
+        )
+        late_log.flush()
+    finally:
+        # Hedge workers aren't request threads, so nothing else closes the
+        # connection this opened.
+        connection.close()
+
+
+def _verify_hedged(
+    shipment_id,
+    address: AddressInput,
+    address_type: str,
+    providers: list,
+    attempt_log: AttemptLog,
+) -> tuple[str, dict]:
+    """Run the provider chain, firing the next provider early on slow calls.
+
+    The primary gets its tracked p95 to answer; after that the next provider
+    is started in parallel (if the hedge budget allows and the pool has an
+    idle worker) and whichever returns a result first wins. Provider calls
+    run on worker threads, and every attempt is recorded, including the
+    loser's: a loser that hadn't started is recorded as cancelled, and one
+    that had is recorded by ``_record_abandoned_attempt`` when it finishes.
+    """
+    in_flight: dict[Future, object] = {}
+    next_index = 0
+    stop = False
+    last_error: Exception | None = None
+
+    def launch() -> None:
+        nonlocal next_index
+        provider = providers[next_index]
+        next_index += 1
+        in_flight[_submit_provider_call(provider, address)] = provider
+
+    hedge_budget.record_primary()
+    launch()
+    may_hedge = True
+
+    while in_flight:
+        timeout = None
+        if may_hedge and not stop and next_index < len(providers):
+            newest = list(in_flight.values())[-1]
+            timeout = hedge_delay(newest.name)
+
+        done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            if _hedge_pool_has_room() and hedge_budget.try_acquire():
+                logger.info(
+                    "address.verify.hedge_fired",
+                    shipment_id=str(shipment_id),
+                    provider=providers[next_index].name,
+                    address_type=address_type,
+                )
+                launch()
+            else:
+                may_hedge = False
+            continue
+
+        for future in done:
+            provider = in_flight.pop(future)
+            try:
+                result = future.result()
+            except AddressProviderError as exc:
+                last_error = exc
+                _record_attempt(
+                    attempt_log,
+                    shipment_id,
+                    provider.name,
+                    address,
+                    address_type,
+                    error=str(exc),
+                )
+                if not exc.retryable:
+                    stop = True
+                continue
+
+            _record_attempt(
+                attempt_log,
+                shipment_id,
+                provider.name,
+                address,
+                address_type,
+                result=result,
+            )
+            for loser_future, loser in in_flight.items():
+                if not loser_future.cancel():
+                    logger.info(
+                        "address.verify.hedge_abandoned",
+                        shipment_id=str(shipment_id),
+                        provider=loser.name,
+                        winner=provider.name,
+                        address_type=address_type,
+                    )
+                loser_future.add_done_callback(
+                    partial(
+                        _record_abandoned_attempt,
+                        attempt_log,
+                        threading.get_ident(),
+                        shipment_id,
+                        loser.name,
+                        address,
+                        address_type,
+                    )
+                )
+            return _build_outcome(provider.name, result, address_type)
+
+        if not in_flight and not stop and next_index < len(providers):
+            logger.info(
+                "address.verify.fallback_attempt",
+                shipment_id=str(shipment_id),
+                provider=providers[next_index].name,
+                address_type=address_type,
+            )
+            launch()
+
+    return _failed_outcome(shipment_id, address_type, last_error)
+
+
+VERIFICATION_UPDATE_FIELDS = [
+    "address_verification_status",
+    "address_verification_details",
+    "from_address_verification_status",
+    "from_address_verification_details",
+    "validation_status",
+    "validation_errors",
+]
+
+
+def refresh_shipment_verification(
+    shipment: Shipment, attempt_log: AttemptLog | None = None
+) -> None:
+    """Verify both addresses and revalidate ``shipment`` in memory.
+
+    The caller saves ``VERIFICATION_UPDATE_FIELDS``.
+    """
+    if not should_verify_to(shipment):
+        shipment.address_verification_status = (
+            Shipment.AddressVerificationStatus.NOT_STARTED
+        )
+        shipment.address_verification_details = {}
+    else:
+        status, details = verify_shipment_address(shipment, "to", attempt_log)
+        shipment.address_verification_status = status
+        shipment.address_verification_details = details
+
+    preset = (
+        find_verified_preset(address_from_shipment(shipment, "from"))
+        if shipment.from_address_is_preset
+        else None
     )
-    return (
-        Shipment.AddressVerificationStatus.FAILED,
-        {"error": str(last_error) if last_error else "No providers configured"},
+    if preset is not None:
+        from_status, from_details = preset_outcome(preset)
+        shipment.from_address_verification_status = from_status
+        shipment.from_address_verification_details = from_details
+    elif not should_verify_from(shipment):
+        shipment.from_address_verification_status = (
+            Shipment.AddressVerificationStatus.NOT_STARTED
+        )
+        shipment.from_address_verification_details = {}
+    else:
+        from_status, from_details = verify_shipment_address(
+            shipment, "from", attempt_log
+        )
+        shipment.from_address_verification_status = from_status
+        shipment.from_address_verification_details = from_details
+
+    validation = validate_shipment(shipment)
+    shipment.validation_status = validation["status"]
+    shipment.validation_errors = validation["errors"]
+
+
+def verify_preset(preset: SavedAddressPreset, use_cache: bool = True) -> None:
+    """Verify a saved address preset and store the result on it."""
+    address = preset_address(preset)
+    status, details = verify_address(address, "from", use_cache=use_cache)
+    preset.address_key = address_key(address)
+    preset.verification_status = status
+    preset.verification_details = details
+    preset.verified_at = timezone.now()
+    preset.verification_failures = (
+        preset.verification_failures + 1
+        if status == Shipment.AddressVerificationStatus.FAILED
+        else 0
+    )
+    preset.save(
+        update_fields=[
+            "address_key",
+            "verification_status",
+            "verification_details",
+            "verified_at",
+            "verification_failures",
+        ]
     )
+    logger.info("address.preset.verified", preset_id=str(preset.id), status=status)
@@ -0,0 +1,93 @@
+"""Database-backed verification queue.
+
+Shipments are marked pending with ``verify_requested_at`` and workers lease
+them in small batches straight from the table, so any number of workers can
+drain one import evenly and Celery messages stay tiny. A worker that dies
+mid-batch just lets its lease expire; the rows are then claimable again.
+"""
+
+from __future__ import annotations
+
+import structlog
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from addresses.services.attempt_log import AttemptLog
+from addresses.services.verify import (
+    VERIFICATION_UPDATE_FIELDS,
+    refresh_shipment_verification,
+)
+from core.leasing import claim_rows, lease_owner
+from shipments.models import Shipment
+from shipments.services.counters import counting
+from shipping.services import materialize_quotes
+
+logger = structlog.get_logger(__name__)
+
+
+def request_verification(shipments: QuerySet) -> int:
+    """Queue ``shipments`` for verification; returns the number queued.
+
+    A row a worker is verifying keeps its lease, so no second worker picks
+    it up mid-flight; the holder sees the newer request when it finishes and
+    leaves the row queued for another pass.
+    """
+    return shipments.update(verify_requested_at=timezone.now())
+
+
+def pending_verifications(import_job_id: str | None = None) -> QuerySet:
+    pending = Shipment.objects.filter(verify_requested_at__isnull=False)
+    if import_job_id:
+        pending = pending.filter(import_job_id=import_job_id)
+    return pending
+
+
+def drain_verification_queue(
+    import_job_id: str | None = None, max_batches: int | None = None
+) -> int:
+    """Claim and verify pending shipments until the queue is empty."""
+    owner = lease_owner()
+    processed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        claimed_at = timezone.now()
+        ids = claim_rows(
+            pending_verifications(import_job_id),
+            owner=owner,
+            owner_field="verify_lease_owner",
+            expires_field="verify_lease_expires_at",
+            batch_size=settings.ADDRESS_VERIFY_QUEUE_BATCH_SIZE,
+            lease_seconds=settings.ADDRESS_VERIFY_LEASE_SECONDS,
+            order_by=("verify_requested_at", "pk"),
+        )
+        if not ids:
+            break
+        batches += 1
+
+        shipments = list(Shipment.objects.filter(id__in=ids, verify_lease_owner=owner))
+        with AttemptLog() as attempt_log:
+            for shipment in shipments:
+                refresh_shipment_verification(shipment, attempt_log)
+        with counting(Shipment.objects.filter(id__in=ids)):
+            Shipment.objects.bulk_update(shipments, VERIFICATION_UPDATE_FIELDS)
+        materialize_quotes(Shipment.objects.filter(id__in=ids))
+
+        leased = Shipment.objects.filter(id__in=ids, verify_lease_owner=owner)
+        leased.filter(verify_requested_at__lte=claimed_at).update(
+            verify_requested_at=None,
+            verify_lease_owner="",
+            verify_lease_expires_at=None,
+        )
+        # Rows re-requested while we worked keep their newer request, and are
+        # released for another pass.
+        leased.update(verify_lease_owner="", verify_lease_expires_at=None)
+        processed += len(shipments)
+
+    logger.info(
+        "address.verify.queue_drained",
+        import_job_id=import_job_id,
+        shipment_count=processed,
+        batch_count=batches,
+    )
+    return processed
@@ -0,0 +1,167 @@
+"""Offline ZIP5 -> (state, primary city, acceptable cities) reference index.
+
+The index is a single read-only file that is memory-mapped and binary
+searched, so lookups need no parsing at startup and the pages are shared
+between worker processes. Layout (little endian)::
+
+    header   b"ZIPIDX1\\0"  uint32 record_count  uint32 strings_offset
+    records  record_count x (5s zip5, 2s state, 1 pad, uint32 string_offset)
+    strings  uint16 length + UTF-8 city names joined by "|" (primary first)
+
+Records are sorted by ZIP so the fixed-width table can be bisected in place.
+Build it from a CSV with ``manage.py build_zip_index``.
+"""
+
+from __future__ import annotations
+
+import csv
+import mmap
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from addresses.services.canonical import normalize_city
+
+MAGIC = b"ZIPIDX1\0"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<5s2sxI")
+# Sample index built from data/zip_reference.csv; deployments point
+# ADDRESS_ZIP_INDEX_PATH at an index built from a full, current ZIP file.
+BUNDLED_INDEX_PATH = (
+    Path(__file__).resolve().parent.parent / "data" / "zip_reference.idx"
+)
+LENGTH = struct.Struct("<H")
+
+
+@dataclass(frozen=True)
+class ZipInfo:
+    state: str
+    primary_city: str
+    cities: tuple[str, ...]
+
+
+class ZipIndex:
+    def __init__(self, path: Path | str):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._strings_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a ZIP reference index")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def lookup(self, postal_code: str) -> ZipInfo | None:
+        key = postal_code.strip()[:5].encode("ascii", "replace")
+        if len(key) != 5:
+            return None
+
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            zip5 = self._map[offset : offset + 5]
+            if zip5 < key:
+                low = middle + 1
+            elif zip5 > key:
+                high = middle
+            else:
+                return self._decode(offset)
+        return None
+
+    def _decode(self, offset: int) -> ZipInfo:
+        _, state, string_offset = RECORD.unpack_from(self._map, offset)
+        start = self._strings_offset + string_offset
+        (length,) = LENGTH.unpack_from(self._map, start)
+        start += LENGTH.size
+        cities = tuple(self._map[start : start + length].decode("utf-8").split("|"))
+        return ZipInfo(
+            state=state.decode("ascii"), primary_city=cities[0], cities=cities
+        )
+
+
+def build_zip_index(source: Path | str, destination: Path | str) -> int:
+    """Compile a ``zip5,state,primary_city,acceptable_cities`` CSV.
+
+    ``acceptable_cities`` is a ``;``-separated list and may be empty.
+    """
+    rows: dict[bytes, tuple[bytes, list[str]]] = {}
+    with open(source, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            zip5 = row["zip5"].strip().zfill(5)
+            cities = [normalize_city(row["primary_city"])]
+            for city in (row.get("acceptable_cities") or "").split(";"):
+                city = normalize_city(city)
+                if city and city not in cities:
+                    cities.append(city)
+            rows[zip5.encode("ascii")] = (
+                row["state"].strip().upper().encode("ascii"),
+                cities,
+            )
+
+    records = bytearray()
+    strings = bytearray()
+    for zip5 in sorted(rows):
+        state, cities = rows[zip5]
+        records += RECORD.pack(zip5, state, len(strings))
+        encoded = "|".join(cities).encode("utf-8")
+        strings += LENGTH.pack(len(encoded)) + encoded
+
+    with open(destination, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, len(rows), HEADER.size + len(records)))
+        handle.write(records)
+        handle.write(strings)
+    return len(rows)
+
+
+def get_zip_index() -> ZipIndex | None:
+    path = getattr(settings, "ADDRESS_ZIP_INDEX_PATH", None)
+    if not path or not Path(path).exists():
+        return None
+    return open_zip_index(str(path))
+
+
+@lru_cache(maxsize=4)
+def open_zip_index(path: str) -> ZipIndex:
+    return ZipIndex(path)
+
+
+def check_address(
+    city: str | None, state: str | None, postal_code: str | None, prefix: str = ""
+) -> list[dict]:
+    """Return validation errors for a ZIP that contradicts its state or city.
+
+    ZIPs missing from the index are never flagged, so a partial data file
+    only narrows coverage. A state mismatch is definite; a city the index
+    doesn't list for the ZIP may still be a vanity or newer name, so that
+    one only asks for review.
+    """
+    index = get_zip_index()
+    if index is None or not postal_code or not state:
+        return []
+
+    info = index.lookup(str(postal_code))
+    if info is None:
+        return []
+
+    if info.state != state.strip().upper():
+        return [
+            {
+                "field": f"{prefix}postal_code",
+                "code": "postal_code_state_mismatch",
+                "message": f"{prefix}postal_code belongs to {info.state}",
+            }
+        ]
+    if city and normalize_city(city) not in info.cities:
+        return [
+            {
+                "field": f"{prefix}city",
+                "code": "postal_code_city_mismatch",
+                "message": f"{prefix}city does not match {prefix}postal_code "
+                f"(expected {info.primary_city.title()})",
+            }
+        ]
+    return []
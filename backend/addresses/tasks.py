@@ -1,54 +1,107 @@
+from datetime import timedelta
+
 import structlog
 from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
 
+from addresses.services.attempt_log import (
+    compact_attempts,
+    load_attempt_spool,
+)
+from addresses.services.refresh import refresh_expiring
 from addresses.services.verify import (
-    should_verify_from,
-    should_verify_to,
-    verify_shipment_address,
+    verify_preset,
+)
+from addresses.services.work_queue import (
+    drain_verification_queue,
+    pending_verifications,
 )
-from shipments.models import Shipment
-from shipments.services.validation import validate_shipment
+from shipments.models import SavedAddressPreset, Shipment
 
 logger = structlog.get_logger(__name__)
 
 
+@shared_task(acks_late=True)
+def drain_verification_queue_task(import_job_id: str | None = None) -> int:
+    return drain_verification_queue(import_job_id)
+
+
 @shared_task
-def verify_shipments_task(shipment_ids: list[str]) -> None:
-    shipments = Shipment.objects.filter(id__in=shipment_ids)
-    for shipment in shipments:
-        if not should_verify_to(shipment):
-            shipment.address_verification_status = (
-                Shipment.AddressVerificationStatus.NOT_STARTED
-            )
-            shipment.address_verification_details = {}
-        else:
-            status, details = verify_shipment_address(shipment, "to")
-            shipment.address_verification_status = status
-            shipment.address_verification_details = details
-
-        if not should_verify_from(shipment):
-            shipment.from_address_verification_status = (
-                Shipment.AddressVerificationStatus.NOT_STARTED
+def requeue_stalled_verifications_task() -> int:
+    """Restart draining for imports whose queued rows nobody is working on."""
+    now = timezone.now()
+    stale_request = now - timedelta(seconds=settings.ADDRESS_VERIFY_LEASE_SECONDS)
+    import_job_ids = set(
+        pending_verifications()
+        .filter(
+            Q(verify_lease_expires_at__lt=now)
+            | Q(
+                verify_lease_expires_at__isnull=True,
+                verify_requested_at__lt=stale_request,
             )
-            shipment.from_address_verification_details = {}
-        else:
-            from_status, from_details = verify_shipment_address(shipment, "from")
-            shipment.from_address_verification_status = from_status
-            shipment.from_address_verification_details = from_details
-
-        validation = validate_shipment(shipment)
-        shipment.validation_status = validation["status"]
-        shipment.validation_errors = validation["errors"]
-
-        shipment.save(
-            update_fields=[
-                "address_verification_status",
-                "address_verification_details",
-                "from_address_verification_status",
-                "from_address_verification_details",
-                "validation_status",
-                "validation_errors",
-            ]
         )
+        .values_list("import_job_id", flat=True)
+        .distinct()
+    )
+    for import_job_id in import_job_ids:
+        drain_verification_queue_task.delay(import_job_id=str(import_job_id))
+    return len(import_job_ids)
+
+
+@shared_task
+def load_attempt_spool_task() -> int:
+    return load_attempt_spool()
+
+
+@shared_task
+def compact_verification_attempts_task() -> dict:
+    load_attempt_spool()
+    return compact_attempts()
+
+
+@shared_task
+def verify_address_preset_task(preset_id: str) -> None:
+    preset = SavedAddressPreset.objects.filter(id=preset_id).first()
+    if preset is None:
+        return
+    verify_preset(preset)
+
+
+def _preset_retry_due(preset: SavedAddressPreset, now) -> bool:
+    """Whether a FAILED preset's backoff has elapsed: the delay doubles from
+    ADDRESS_PRESET_RETRY_BASE_MINUTES with each consecutive failure, up to
+    ADDRESS_PRESET_RETRY_MAX_HOURS."""
+    delay = min(
+        timedelta(minutes=settings.ADDRESS_PRESET_RETRY_BASE_MINUTES)
+        * 2 ** max(preset.verification_failures - 1, 0),
+        timedelta(hours=settings.ADDRESS_PRESET_RETRY_MAX_HOURS),
+    )
+    return preset.verified_at is None or preset.verified_at + delay <= now
 
-    logger.info("address.verify.completed", shipment_count=shipments.count())
+
+@shared_task
+def verify_unverified_presets_task() -> int:
+    """Verify new presets, and retry ones whose provider calls failed."""
+    now = timezone.now()
+    preset_ids = list(
+        SavedAddressPreset.objects.filter(
+            verification_status=Shipment.AddressVerificationStatus.NOT_STARTED
+        ).values_list("id", flat=True)
+    )
+    preset_ids += [
+        preset.id
+        for preset in SavedAddressPreset.objects.filter(
+            verification_status=Shipment.AddressVerificationStatus.FAILED
+        ).only("id", "verified_at", "verification_failures")
+        if _preset_retry_due(preset, now)
+    ]
+    for preset_id in preset_ids:
+        verify_address_preset_task.delay(str(preset_id))
+    return len(preset_ids)
+
+
+@shared_task
+def refresh_expiring_verifications_task() -> dict:
+    return refresh_expiring()
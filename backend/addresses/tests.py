@@ -1,10 +1,44 @@
+import json
+import threading
+import time
+from datetime import timedelta
+
 import pytest
+from django.utils import timezone
 
-from addresses.models import VerificationAttempt
-from addresses.providers.base import AddressProviderError, AddressVerificationResult
+from addresses.models import VerificationAttempt, VerifiedAddress
+from addresses.providers.base import (
+    AddressInput,
+    AddressProviderError,
+    AddressVerificationResult,
+)
+from addresses.providers.replay import ReplayProvider, load_recordings
 from addresses.services import verify as verify_service
+from addresses.services.attempt_log import (
+    AttemptLog,
+    compact_attempts,
+    load_attempt_spool,
+)
+from addresses.services.cache import cached_outcome, store_outcome
+from addresses.services.canonical import (
+    address_key,
+    canonical_address,
+    canonicalize_street,
+)
+from addresses.services.hedging import hedge_budget, latency_tracker
+from addresses.services.refresh import refresh_expiring
+from addresses.services.work_queue import (
+    drain_verification_queue,
+    request_verification,
+)
+from addresses.services.zip_index import (
+    BUNDLED_INDEX_PATH,
+    ZipIndex,
+    build_zip_index,
+)
+from addresses.tasks import verify_address_preset_task, verify_unverified_presets_task
 from imports.models import ImportJob
-from shipments.models import Shipment
+from shipments.models import SavedAddressPreset, Shipment
 
 
 class _FailingProvider:
@@ -57,3 +91,598 @@ def test_verify_fallback_creates_attempts(monkeypatch):
     assert status == Shipment.AddressVerificationStatus.VALID
     assert details["provider"] == "secondary"
     assert VerificationAttempt.objects.filter(shipment=shipment).count() == 2
+
+
+class _SlowProvider:
+    name = "slow"
+
+    def verify(self, address):
+        time.sleep(0.5)
+        return AddressVerificationResult(
+            is_valid=True,
+            is_corrected=False,
+            suggested_address=None,
+            messages=[],
+            raw={"provider": "slow"},
+        )
+
+
+def _verifiable_shipment() -> Shipment:
+    job = ImportJob.objects.create(original_filename="test.csv")
+    return Shipment.objects.create(
+        import_job=job,
+        row_number=1,
+        to_name="Jane Doe",
+        to_street1="123 Main St",
+        to_city="Los Angeles",
+        to_state="CA",
+        to_postal_code="90001",
+        weight_oz=16,
+    )
+
+
+@pytest.fixture
+def hedging(settings):
+    settings.ADDRESS_VERIFY_HEDGING = True
+    latency_tracker.reset()
+    hedge_budget.reset()
+    for _ in range(50):
+        latency_tracker.observe("slow", 0.01)
+    yield
+    latency_tracker.reset()
+    hedge_budget.reset()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("hedging")
+def test_verify_hedges_slow_primary(monkeypatch, settings):
+    settings.ADDRESS_VERIFY_HEDGE_BUDGET = 1
+    shipment = _verifiable_shipment()
+    monkeypatch.setattr(
+        verify_service,
+        "get_providers",
+        lambda: [_SlowProvider(), _SuccessProvider()],
+    )
+
+    status, details = verify_service.verify_shipment_address(shipment, "to")
+
+    assert status == Shipment.AddressVerificationStatus.VALID
+    assert details["provider"] == "secondary"
+    attempt = VerificationAttempt.objects.get()
+    assert attempt.provider == "secondary"
+    assert attempt.status == VerificationAttempt.Status.SUCCESS
+
+    # The abandoned primary is recorded once it finishes.
+    deadline = time.monotonic() + 2
+    while VerificationAttempt.objects.count() < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    slow = VerificationAttempt.objects.get(provider="slow")
+    assert slow.status == VerificationAttempt.Status.SUCCESS
+    assert slow.shipment_id == shipment.id
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("hedging")
+def test_verify_hedge_respects_budget(monkeypatch):
+    shipment = _verifiable_shipment()
+    monkeypatch.setattr(
+        verify_service,
+        "get_providers",
+        lambda: [_SlowProvider(), _SuccessProvider()],
+    )
+
+    status, details = verify_service.verify_shipment_address(shipment, "to")
+
+    assert status == Shipment.AddressVerificationStatus.VALID
+    assert details["provider"] == "slow"
+    assert VerificationAttempt.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("hedging")
+def test_verify_hedge_waits_for_an_idle_worker(monkeypatch, settings):
+    settings.ADDRESS_VERIFY_HEDGE_BUDGET = 1
+    shipment = _verifiable_shipment()
+    monkeypatch.setattr(verify_service, "_hedge_pool_has_room", lambda: False)
+    monkeypatch.setattr(
+        verify_service,
+        "get_providers",
+        lambda: [_SlowProvider(), _SuccessProvider()],
+    )
+
+    status, details = verify_service.verify_shipment_address(shipment, "to")
+
+    assert details["provider"] == "slow"
+    assert VerificationAttempt.objects.count() == 1
+    # The unspent token is still there for the next call.
+    assert hedge_budget.try_acquire()
+
+
+class _ConcurrencyProvider:
+    name = "concurrent"
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def verify(self, address):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if address.street1.startswith("13 "):
+                raise RuntimeError("unexpected response shape")
+            return _SuccessProvider().verify(address)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.mark.django_db
+def test_verify_addresses_bounds_in_flight_calls_and_isolates_errors(
+    monkeypatch, settings
+):
+    settings.ADDRESS_VERIFY_BULK_MAX_IN_FLIGHT = 2
+    provider = _ConcurrencyProvider()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [provider])
+
+    results = verify_service.verify_addresses(
+        [_address(f"{number} Main St") for number in range(10, 16)]
+    )
+
+    assert provider.peak == 2
+    statuses = [status for status, _details, _cached in results]
+    assert statuses.count(Shipment.AddressVerificationStatus.FAILED) == 1
+    assert statuses[3] == Shipment.AddressVerificationStatus.FAILED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_verify_addresses_caches_results_that_miss_the_deadline(monkeypatch, settings):
+    settings.ADDRESS_VERIFY_CACHE_TTL_DAYS = 30
+    settings.ADDRESS_VERIFY_BULK_TIMEOUT_MS = 20
+    provider = _ConcurrencyProvider(delay=0.2)
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [provider])
+
+    ((status, _details, _cached),) = verify_service.verify_addresses(
+        [_address("1 Main St")]
+    )
+    assert status == Shipment.AddressVerificationStatus.FAILED
+
+    deadline = time.monotonic() + 5
+    while not VerifiedAddress.objects.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert cached_outcome(_address("1 Main St"), "to") is not None
+
+
+@pytest.mark.django_db
+def test_attempt_log_spool_round_trip(monkeypatch, settings, tmp_path):
+    settings.ADDRESS_ATTEMPT_SPOOL_DIR = str(tmp_path)
+    shipment = _verifiable_shipment()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_SuccessProvider()])
+
+    with AttemptLog(backend="spool") as attempt_log:
+        verify_service.verify_shipment_address(shipment, "to", attempt_log)
+    assert VerificationAttempt.objects.count() == 0
+
+    assert load_attempt_spool() == 1
+    assert load_attempt_spool() == 0
+    attempt = VerificationAttempt.objects.get()
+    assert attempt.shipment_id == shipment.id
+    assert attempt.request_payload["address_type"] == "to"
+
+
+@pytest.mark.django_db
+def test_attempt_spool_skips_truncated_line(monkeypatch, settings, tmp_path):
+    settings.ADDRESS_ATTEMPT_SPOOL_DIR = str(tmp_path)
+    shipment = _verifiable_shipment()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_SuccessProvider()])
+    with AttemptLog(backend="spool") as attempt_log:
+        verify_service.verify_shipment_address(shipment, "to", attempt_log)
+    (spool_file,) = tmp_path.glob("attempts-*.ndjson")
+    with spool_file.open("a") as handle:
+        handle.write('{"id": "4b1f", "provider": "sec')
+
+    assert load_attempt_spool() == 1
+    assert VerificationAttempt.objects.count() == 1
+    (rejected,) = tmp_path.glob("rejected-*.ndjson")
+    assert rejected.read_text().startswith('{"id": "4b1f"')
+    assert load_attempt_spool() == 0
+
+
+@pytest.mark.django_db
+def test_attempt_spool_rejects_deleted_shipments_and_counts_inserts(
+    monkeypatch, settings, tmp_path
+):
+    settings.ADDRESS_ATTEMPT_SPOOL_DIR = str(tmp_path)
+    kept, deleted = _verifiable_shipment(), _verifiable_shipment()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_SuccessProvider()])
+    with AttemptLog(backend="spool") as attempt_log:
+        verify_service.verify_shipment_address(kept, "to", attempt_log)
+        verify_service.verify_shipment_address(deleted, "to", attempt_log)
+    (spool_file,) = tmp_path.glob("attempts-*.ndjson")
+    lines = spool_file.read_text()
+    deleted.delete()
+    # A crashed load leaves a file whose rows are partly in the database.
+    assert load_attempt_spool() == 1
+    spool_file.write_text(lines)
+
+    assert load_attempt_spool() == 0
+    assert VerificationAttempt.objects.get().shipment_id == kept.id
+    assert len(list(tmp_path.glob("rejected-*.ndjson"))) == 2
+    assert not list(tmp_path.glob("loading-*.ndjson"))
+
+
+@pytest.mark.django_db
+def test_compact_attempts_prunes_and_strips_payloads(settings):
+    settings.ADDRESS_ATTEMPT_RETENTION_DAYS = 30
+    settings.ADDRESS_ATTEMPT_COMPACT_AFTER_DAYS = 7
+    shipment = _verifiable_shipment()
+    now = timezone.now()
+    for age_days in (1, 10, 40):
+        VerificationAttempt.objects.create(
+            shipment=shipment,
+            provider=f"age-{age_days}",
+            status=VerificationAttempt.Status.SUCCESS,
+            request_payload={"street1": "123 Main St"},
+            response_payload={"response": {}},
+            created_at=now - timedelta(days=age_days),
+        )
+
+    assert compact_attempts() == {"deleted": 1, "compacted": 1}
+    remaining = {a.provider: a for a in VerificationAttempt.objects.all()}
+    assert set(remaining) == {"age-1", "age-10"}
+    assert remaining["age-1"].request_payload
+    assert remaining["age-10"].request_payload == {}
+
+
+def test_zip_index_lookup(tmp_path):
+    source = tmp_path / "zips.csv"
+    source.write_text(
+        "zip5,state,primary_city,acceptable_cities\n"
+        "63101,MO,Saint Louis,St. Louis Park\n"
+        "2108,MA,Boston,\n",
+        encoding="utf-8",
+    )
+    build_zip_index(source, tmp_path / "zips.idx")
+
+    index = ZipIndex(tmp_path / "zips.idx")
+
+    assert len(index) == 2
+    assert index.lookup("02108-1234").state == "MA"
+    assert index.lookup("63101").cities == ("SAINT LOUIS", "SAINT LOUIS PARK")
+    assert index.lookup("99999") is None
+
+
+def _address(street1, street2="", postal_code="90001"):
+    return AddressInput(
+        name="",
+        street1=street1,
+        street2=street2,
+        city="Los Angeles",
+        state="CA",
+        postal_code=postal_code,
+    )
+
+
+def test_address_key_canonicalizes_pub28_variants():
+    assert (
+        address_key(_address("123 Main Street Apt 4", postal_code="90001-1234"))
+        == address_key(_address("123 MAIN ST # 4"))
+        == address_key(_address("123 main st.", "Unit 4"))
+    )
+    assert canonical_address(_address("123 MAIN ST # 4")) == (
+        "123 MAIN ST|#4|LOS ANGELES|CA|90001|US"
+    )
+    assert len(address_key(_address("123 Main St", "Apt 4"))) == 64
+    assert address_key(_address("123 Main St", "Apt 5")) != address_key(
+        _address("123 Main St", "Apt 4")
+    )
+    assert canonicalize_street("500 West Foothill Boulevard Suite P") == (
+        "500 W FOOTHILL BLVD",
+        "STE P",
+    )
+    assert canonicalize_street("42 Park Avenue South") == ("42 PARK AVE S", "")
+    # Directional and suffix words that are the street name stay spelled out.
+    assert canonicalize_street("1 North Street") == ("1 NORTH ST", "")
+    assert canonicalize_street("9 Saint James Place") == ("9 SAINT JAMES PL", "")
+
+
+def test_street_names_that_are_unit_designators_stay_streets():
+    assert canonicalize_street("12 Pier Ave") == ("12 PIER AVE", "")
+    assert canonicalize_street("12 Key Ave") == ("12 KEY AVE", "")
+    assert canonicalize_street("12 Lot Ave") == ("12 LOT AVE", "")
+    assert canonicalize_street("100 Front Street") == ("100 FRONT ST", "")
+    assert canonicalize_street("12 Upper Ridge Rd") == ("12 UPPER RIDGE RD", "")
+    assert canonicalize_street("1 Lower Main Street") == ("1 LOWER MAIN ST", "")
+    assert address_key(_address("100 Front Street")) == address_key(
+        _address("100 Front St")
+    )
+    assert (
+        len(
+            {address_key(_address(f"12 {name} Ave")) for name in "Pier Key Lot".split()}
+        )
+        == 3
+    )
+    # After the suffix, or before a unit number, they are units.
+    assert canonicalize_street("12 Key West Ave Lot 7") == ("12 KEY WEST AVE", "LOT 7")
+    assert canonicalize_street("123 Main St Rear") == ("123 MAIN ST", "REAR")
+    assert canonicalize_street("123 Main Apt 4") == ("123 MAIN", "APT 4")
+
+
+class _CountingProvider(_SuccessProvider):
+    def __init__(self):
+        self.calls = 0
+
+    def verify(self, address):
+        self.calls += 1
+        return super().verify(address)
+
+
+@pytest.mark.django_db
+def test_verify_address_answers_repeats_from_cache(monkeypatch, settings):
+    settings.ADDRESS_VERIFY_CACHE_TTL_DAYS = 30
+    provider = _CountingProvider()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [provider])
+
+    first = verify_service.verify_address(_address("123 Main Street Apt 4"), "to")
+    second = verify_service.verify_address(_address("123 MAIN ST # 4"), "from")
+
+    assert provider.calls == 1
+    assert first[0] == second[0] == Shipment.AddressVerificationStatus.VALID
+    assert second[1]["address_type"] == "from"
+    assert VerifiedAddress.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_cache_hit_requires_matching_canonical_address(settings):
+    settings.ADDRESS_VERIFY_CACHE_TTL_DAYS = 30
+    address = _address("123 Main St")
+    store_outcome(address, Shipment.AddressVerificationStatus.VALID, {})
+    assert cached_outcome(address, "to") is not None
+
+    # An entry under the same key for a different address is a miss.
+    VerifiedAddress.objects.update(canonical="9 ELM ST||LOS ANGELES|CA|90001|US")
+    assert cached_outcome(address, "to") is None
+
+
+@pytest.mark.django_db
+def test_refresh_expiring_reverifies_only_used_entries(monkeypatch, settings):
+    settings.ADDRESS_VERIFY_CACHE_TTL_DAYS = 30
+    settings.ADDRESS_VERIFY_REFRESH_AHEAD_DAYS = 3
+    provider = _CountingProvider()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [provider])
+    verify_service.verify_address(_address("1 Used St"), "to")
+    verify_service.verify_address(_address("2 Idle St"), "to")
+    soon = timezone.now() + timedelta(days=1)
+    verified_at = timezone.now() - timedelta(days=29)
+    VerifiedAddress.objects.update(
+        expires_at=soon, verified_at=verified_at, last_used_at=verified_at
+    )
+    used_key = address_key(_address("1 Used St"))
+    VerifiedAddress.objects.filter(address_key=used_key).update(
+        last_used_at=timezone.now()
+    )
+
+    assert refresh_expiring(rate=0) == {"entries": 1, "presets": 0}
+
+    assert provider.calls == 3
+    used = VerifiedAddress.objects.get(address_key=used_key)
+    idle = VerifiedAddress.objects.get(address_key=address_key(_address("2 Idle St")))
+    assert used.expires_at > timezone.now() + timedelta(days=29)
+    assert idle.expires_at == soon
+
+
+@pytest.mark.django_db
+def test_verify_skips_providers_for_zip_state_mismatch(monkeypatch, settings):
+    settings.ADDRESS_ZIP_INDEX_PATH = str(BUNDLED_INDEX_PATH)
+    shipment = _verifiable_shipment()
+    shipment.to_state = "TX"
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_FailingProvider()])
+
+    status, details = verify_service.verify_shipment_address(shipment, "to")
+
+    assert status == Shipment.AddressVerificationStatus.INVALID
+    assert details["provider"] == "zip_index"
+    assert VerificationAttempt.objects.count() == 0
+
+
+def _replay_settings(settings, tmp_path, **overrides):
+    fixture = tmp_path / "verify.ndjson"
+    fixture.write_text(
+        json.dumps(
+            {
+                "provider": "smarty",
+                "request_payload": {
+                    "street1": "123 main st",
+                    "street2": "",
+                    "city": "Los Angeles",
+                    "state": "CA",
+                    "postal_code": "90001",
+                },
+                "response_payload": {
+                    "response": [
+                        {
+                            "delivery_line_1": "123 Main St",
+                            "components": {
+                                "city_name": "Los Angeles",
+                                "state_abbreviation": "CA",
+                                "zipcode": "90001",
+                                "plus4_code": "1234",
+                            },
+                        }
+                    ]
+                },
+            }
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    load_recordings.cache_clear()
+    settings.ADDRESS_PROVIDERS = ["replay"]
+    settings.ADDRESS_REPLAY = {"fixtures": [str(fixture)], "seed": 1, **overrides}
+
+
+@pytest.mark.django_db
+def test_replay_provider_serves_recorded_response(settings, tmp_path):
+    _replay_settings(settings, tmp_path, on_miss="invalid")
+    shipment = _verifiable_shipment()
+
+    status, details = verify_service.verify_shipment_address(shipment, "to")
+
+    assert status == Shipment.AddressVerificationStatus.CORRECTED
+    assert details["provider"] == "replay"
+    assert details["suggested_address"]["postal_code"] == "90001-1234"
+
+    shipment.to_street1 = "9 Elm St"
+    status, _ = verify_service.verify_shipment_address(shipment, "to")
+    assert status == Shipment.AddressVerificationStatus.INVALID
+
+
+def test_replay_provider_injects_rate_limits(settings, tmp_path):
+    _replay_settings(settings, tmp_path, rate_limit_rate=1.0)
+    (provider,) = verify_service.get_providers()
+    address = AddressInput(
+        name="Jane Doe",
+        street1="123 Main St",
+        street2="",
+        city="Los Angeles",
+        state="CA",
+        postal_code="90001",
+    )
+
+    assert isinstance(provider, ReplayProvider)
+    with pytest.raises(AddressProviderError, match="429") as excinfo:
+        provider.verify(address)
+    assert excinfo.value.retryable
+
+
+def test_replay_provider_error_rate_applies_across_calls(settings, tmp_path):
+    _replay_settings(settings, tmp_path, error_rate=0.5)
+    address = AddressInput(
+        name="Jane Doe",
+        street1="123 Main St",
+        street2="",
+        city="Los Angeles",
+        state="CA",
+        postal_code="90001",
+    )
+
+    errors = 0
+    for _ in range(40):
+        (provider,) = verify_service.get_providers()
+        try:
+            provider.verify(address)
+        except AddressProviderError:
+            errors += 1
+
+    assert 5 < errors < 35
+
+
+@pytest.mark.django_db
+def test_matching_from_address_inherits_verified_preset(monkeypatch):
+    preset = SavedAddressPreset.objects.create(
+        name="Warehouse",
+        contact_name="Warehouse",
+        street1="500 Market St",
+        city="San Francisco",
+        state="CA",
+        postal_code="94105",
+    )
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_SuccessProvider()])
+    verify_service.verify_preset(preset)
+    preset.refresh_from_db()
+    assert preset.verification_status == Shipment.AddressVerificationStatus.VALID
+    assert preset.verified_at is not None
+
+    shipment = _verifiable_shipment()
+    shipment.from_name = "Someone"
+    shipment.from_street1 = "500  market st"
+    shipment.from_city = "SAN FRANCISCO"
+    shipment.from_state = "CA"
+    shipment.from_postal_code = "94105-1234"
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_FailingProvider()])
+
+    status, details = verify_service.verify_shipment_address(shipment, "from")
+
+    assert status == Shipment.AddressVerificationStatus.VALID
+    assert details["preset_id"] == str(preset.id)
+    assert not VerificationAttempt.objects.filter(shipment=shipment).exists()
+
+
+@pytest.mark.django_db
+def test_failed_presets_are_retried_with_backoff(monkeypatch, settings):
+    settings.ADDRESS_PRESET_RETRY_BASE_MINUTES = 60
+    settings.ADDRESS_PRESET_RETRY_MAX_HOURS = 24
+    preset = SavedAddressPreset.objects.create(
+        name="Warehouse",
+        street1="500 Market St",
+        city="San Francisco",
+        state="CA",
+        postal_code="94105",
+    )
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_FailingProvider()])
+    verify_service.verify_preset(preset)
+    verify_service.verify_preset(preset)
+    preset.refresh_from_db()
+    assert preset.verification_status == Shipment.AddressVerificationStatus.FAILED
+    assert preset.verification_failures == 2
+    queued = []
+    monkeypatch.setattr(verify_address_preset_task, "delay", queued.append)
+
+    # Two failures back off for two hours.
+    failed = SavedAddressPreset.objects.filter(id=preset.id)
+    failed.update(verified_at=timezone.now() - timedelta(hours=1))
+    verify_unverified_presets_task()
+    assert str(preset.id) not in queued
+    failed.update(verified_at=timezone.now() - timedelta(hours=3))
+    verify_unverified_presets_task()
+    assert str(preset.id) in queued
+
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_SuccessProvider()])
+    verify_service.verify_preset(preset)
+    preset.refresh_from_db()
+    assert preset.verification_failures == 0
+
+
+@pytest.mark.django_db
+def test_verification_queue_skips_live_leases_and_reclaims_expired(monkeypatch):
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [_SuccessProvider()])
+    first = _verifiable_shipment()
+    job = first.import_job
+    others = [
+        Shipment.objects.create(
+            import_job=job,
+            row_number=row_number,
+            to_name="Jane Doe",
+            to_street1="123 Main St",
+            to_city="Los Angeles",
+            to_state="CA",
+            to_postal_code="90001",
+        )
+        for row_number in (2, 3)
+    ]
+    assert request_verification(Shipment.objects.filter(import_job=job)) == 3
+    now = timezone.now()
+    Shipment.objects.filter(id=others[0].id).update(
+        verify_lease_owner="other-worker",
+        verify_lease_expires_at=now + timedelta(minutes=5),
+    )
+    Shipment.objects.filter(id=others[1].id).update(
+        verify_lease_owner="dead-worker",
+        verify_lease_expires_at=now - timedelta(minutes=5),
+    )
+    # Re-requesting doesn't take a row away from the worker holding it.
+    assert request_verification(Shipment.objects.filter(import_job=job)) == 3
+
+    assert drain_verification_queue(str(job.id)) == 2
+    assert Shipment.objects.get(id=others[0].id).verify_lease_owner == "other-worker"
+
+    pending = Shipment.objects.filter(verify_requested_at__isnull=False)
+    assert list(pending.values_list("id", flat=True)) == [others[0].id]
+    verified = Shipment.objects.filter(
+        address_verification_status=Shipment.AddressVerificationStatus.VALID
+    )
+    assert set(verified.values_list("id", flat=True)) == {first.id, others[1].id}
@@ -0,0 +1,87 @@
+import pytest
+from rest_framework.test import APIClient
+
+from addresses.models import VerificationAttempt
+from addresses.providers.base import AddressVerificationResult
+from addresses.services import verify as verify_service
+from addresses.services.zip_index import BUNDLED_INDEX_PATH
+
+
+class _CountingProvider:
+    name = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def verify(self, address):
+        self.calls += 1
+        return AddressVerificationResult(
+            is_valid=True,
+            is_corrected=False,
+            suggested_address=None,
+            messages=[],
+            raw={},
+        )
+
+
+def _item(street1, street2=""):
+    return {
+        "street1": street1,
+        "street2": street2,
+        "city": "Los Angeles",
+        "state": "CA",
+        "postal_code": "90001",
+    }
+
+
+@pytest.mark.django_db
+def test_verify_addresses_dedupes_and_caches(monkeypatch, settings):
+    settings.ADDRESS_ZIP_INDEX_PATH = str(BUNDLED_INDEX_PATH)
+    settings.ADDRESS_VERIFY_CACHE_TTL_DAYS = 30
+    provider = _CountingProvider()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [provider])
+    client = APIClient()
+
+    response = client.post(
+        "/api/v1/addresses/verify/",
+        {
+            "addresses": [
+                _item("123 Main Street", "Apt 4"),
+                _item("123 MAIN ST # 4"),
+                {**_item("1 Main St"), "postal_code": "10001"},
+            ]
+        },
+        format="json",
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["status"] for r in results] == ["VALID", "VALID", "INVALID"]
+    assert results[2]["details"]["provider"] == "zip_index"
+    assert not any(r["cached"] for r in results)
+    assert provider.calls == 1
+    assert VerificationAttempt.objects.filter(shipment__isnull=True).count() == 1
+
+    response = client.post(
+        "/api/v1/addresses/verify/",
+        {"addresses": [_item("123 Main St Unit 4")], "address_type": "from"},
+        format="json",
+    )
+
+    result = response.json()["results"][0]
+    assert result["cached"] is True
+    assert result["details"]["address_type"] == "from"
+    assert provider.calls == 1
+
+
+@pytest.mark.django_db
+def test_verify_addresses_rejects_oversized_batch():
+    response = APIClient().post(
+        "/api/v1/addresses/verify/",
+        {"addresses": [_item(f"{n} Main St") for n in range(101)]},
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "VALIDATION_ERROR"
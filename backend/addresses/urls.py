@@ -0,0 +1,7 @@
+from django.urls import path
+
+from addresses.views import AddressVerifyView
+
+urlpatterns = [
+    path("addresses/verify/", AddressVerifyView.as_view(), name="address_verify"),
+]
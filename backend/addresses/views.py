@@ -1 +1,41 @@
-# Create your views here.
+from drf_spectacular.utils import extend_schema
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from addresses.providers.base import AddressInput
+from addresses.serializers import (
+    AddressVerifyRequestSerializer,
+    AddressVerifyResponseSerializer,
+)
+from addresses.services.verify import verify_addresses
+
+
+class AddressVerifyView(APIView):
+    @extend_schema(
+        request=AddressVerifyRequestSerializer,
+        responses={200: AddressVerifyResponseSerializer},
+    )
+    def post(self, request):
+        serializer = AddressVerifyRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        addresses = [
+            AddressInput(**item) for item in serializer.validated_data["addresses"]
+        ]
+
+        outcomes = verify_addresses(
+            addresses, serializer.validated_data["address_type"]
+        )
+
+        return Response(
+            {
+                "results": [
+                    {
+                        "index": index,
+                        "status": status,
+                        "details": details,
+                        "cached": cached,
+                    }
+                    for index, (status, details, cached) in enumerate(outcomes)
+                ]
+            }
+        )
@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 
 from core.logging import configure_structlog, get_logging_config
 
@@ -175,7 +176,212 @@ CELERY_BROKER_URL = env("CELERY_BROKER_URL", default=REDIS_URL)
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default=REDIS_URL)
 CELERY_TASK_ALWAYS_EAGER = env.bool("CELERY_TASK_ALWAYS_EAGER", default=False)
 CELERY_IMPORTS = ("imports.tasks", "addresses.tasks")
+# Label purchases run on their own queue, so a large purchase neither waits
+# behind nor holds up import validation and verification.
+PURCHASE_QUEUE = env("PURCHASE_QUEUE", default="purchases")
+CELERY_TASK_ROUTES = {"imports.tasks.task_purchase_labels": {"queue": PURCHASE_QUEUE}}
 
 GOOGLE_ADDRESS_API_KEY = env("GOOGLE_ADDRESS_API_KEY", default=None)
 SMARTY_AUTH_ID = env("SMARTY_AUTH_ID", default=None)
 SMARTY_AUTH_TOKEN = env("SMARTY_AUTH_TOKEN", default=None)
+USPS_USER_ID = env("USPS_USER_ID", default=None)
+
+# Hedged address verification: fire the next provider when the current one
+# exceeds its tracked p95, spending at most ADDRESS_VERIFY_HEDGE_BUDGET extra
+# calls per primary call.
+ADDRESS_VERIFY_HEDGING = env.bool("ADDRESS_VERIFY_HEDGING", default=False)
+ADDRESS_VERIFY_HEDGE_BUDGET = env.float("ADDRESS_VERIFY_HEDGE_BUDGET", default=0.1)
+ADDRESS_VERIFY_HEDGE_BURST = env.float("ADDRESS_VERIFY_HEDGE_BURST", default=10)
+ADDRESS_VERIFY_HEDGE_DEFAULT_DELAY_MS = env.int(
+    "ADDRESS_VERIFY_HEDGE_DEFAULT_DELAY_MS", default=1000
+)
+ADDRESS_VERIFY_HEDGE_MIN_DELAY_MS = env.int(
+    "ADDRESS_VERIFY_HEDGE_MIN_DELAY_MS", default=50
+)
+ADDRESS_VERIFY_HEDGE_WORKERS = env.int("ADDRESS_VERIFY_HEDGE_WORKERS", default=8)
+
+# VerificationAttempt audit log: "db" writes buffered attempts with
+# bulk_create, "spool" appends them to NDJSON files loaded by a beat task.
+ADDRESS_ATTEMPT_LOG_BACKEND = env("ADDRESS_ATTEMPT_LOG_BACKEND", default="db")
+ADDRESS_ATTEMPT_LOG_BATCH_SIZE = env.int("ADDRESS_ATTEMPT_LOG_BATCH_SIZE", default=500)
+ADDRESS_ATTEMPT_SPOOL_DIR = env(
+    "ADDRESS_ATTEMPT_SPOOL_DIR", default=str(BASE_DIR / "var" / "attempt_spool")
+)
+ADDRESS_ATTEMPT_RETENTION_DAYS = env.int("ADDRESS_ATTEMPT_RETENTION_DAYS", default=90)
+ADDRESS_ATTEMPT_COMPACT_AFTER_DAYS = env.int(
+    "ADDRESS_ATTEMPT_COMPACT_AFTER_DAYS", default=14
+)
+
+# Verification cache keyed by canonical address. Beat re-verifies entries
+# still in use within ADDRESS_VERIFY_REFRESH_AHEAD_DAYS of expiry during the
+# off-peak ADDRESS_VERIFY_REFRESH_HOURS (a crontab hour spec), verifying at
+# most ADDRESS_VERIFY_REFRESH_LIMIT addresses per run and
+# ADDRESS_VERIFY_REFRESH_RATE per second. A TTL of 0 (the default) disables
+# the cache; 30 days is a reasonable TTL when enabling it.
+ADDRESS_VERIFY_CACHE_TTL_DAYS = env.int("ADDRESS_VERIFY_CACHE_TTL_DAYS", default=0)
+ADDRESS_VERIFY_REFRESH_AHEAD_DAYS = env.int(
+    "ADDRESS_VERIFY_REFRESH_AHEAD_DAYS", default=3
+)
+ADDRESS_VERIFY_REFRESH_HOURS = env("ADDRESS_VERIFY_REFRESH_HOURS", default="1-5")
+ADDRESS_VERIFY_REFRESH_LIMIT = env.int("ADDRESS_VERIFY_REFRESH_LIMIT", default=500)
+ADDRESS_VERIFY_REFRESH_RATE = env.float("ADDRESS_VERIFY_REFRESH_RATE", default=2.0)
+
+# Saved presets whose verification FAILED (provider errors) are retried by
+# the hourly preset task, waiting ADDRESS_PRESET_RETRY_BASE_MINUTES after the
+# first failure and twice as long after each further one, at most
+# ADDRESS_PRESET_RETRY_MAX_HOURS.
+ADDRESS_PRESET_RETRY_BASE_MINUTES = env.int(
+    "ADDRESS_PRESET_RETRY_BASE_MINUTES", default=60
+)
+ADDRESS_PRESET_RETRY_MAX_HOURS = env.int("ADDRESS_PRESET_RETRY_MAX_HOURS", default=24)
+
+CELERY_BEAT_SCHEDULE = {
+    "load-verification-attempt-spool": {
+        "task": "addresses.tasks.load_attempt_spool_task",
+        "schedule": crontab(minute="*/5"),
+    },
+    "compact-verification-attempts": {
+        "task": "addresses.tasks.compact_verification_attempts_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "requeue-stalled-verifications": {
+        "task": "addresses.tasks.requeue_stalled_verifications_task",
+        "schedule": crontab(minute="*"),
+    },
+    "verify-unverified-address-presets": {
+        "task": "addresses.tasks.verify_unverified_presets_task",
+        "schedule": crontab(minute=15),
+    },
+    "refresh-expiring-verifications": {
+        "task": "addresses.tasks.refresh_expiring_verifications_task",
+        "schedule": crontab(minute="*/10", hour=ADDRESS_VERIFY_REFRESH_HOURS),
+    },
+    "reconcile-import-counters": {
+        "task": "imports.tasks.task_reconcile_import_counters",
+        "schedule": crontab(minute="*/15"),
+    },
+    "reconcile-all-import-counters": {
+        "task": "imports.tasks.task_reconcile_import_counters",
+        "schedule": crontab(hour=4, minute=0),
+        "kwargs": {"full": True},
+    },
+}
+
+# Import counters are kept by delta; the reconcile task recounts imports
+# updated within the last IMPORT_COUNTER_RECONCILE_HOURS to correct drift, and
+# a daily run recounts every import.
+IMPORT_COUNTER_RECONCILE_HOURS = env.int("IMPORT_COUNTER_RECONCILE_HOURS", default=24)
+
+# Import pipeline: rows per address-verification subtask, and rows validated
+# per transaction (and progress update).
+IMPORT_VERIFY_CHUNK_SIZE = env.int("IMPORT_VERIFY_CHUNK_SIZE", default=200)
+IMPORT_VALIDATE_BATCH_SIZE = env.int("IMPORT_VALIDATE_BATCH_SIZE", default=500)
+
+# Offline ZIP -> state/city index (built by manage.py build_zip_index) used
+# to reject a ZIP in the wrong state before any paid provider call, and to
+# flag unlisted cities for review. Off by default: the bundled index is only
+# a sample, and a stale index would reject real addresses.
+ADDRESS_ZIP_INDEX_PATH = env("ADDRESS_ZIP_INDEX_PATH", default="")
+
+# Compiled zone/weight rate card and ZIP3 zone chart used for shipping quotes
+# (built by manage.py build_rate_tables). Lanes missing from the zone chart
+# are priced at SHIPPING_DEFAULT_ZONE; without a rate card quotes fall back
+# to flat per-ounce pricing.
+SHIPPING_RATE_CARD_PATH = env(
+    "SHIPPING_RATE_CARD_PATH",
+    default=str(BASE_DIR / "shipping" / "data" / "rate_card.bin"),
+)
+SHIPPING_ZONE_CHART_PATH = env(
+    "SHIPPING_ZONE_CHART_PATH",
+    default=str(BASE_DIR / "shipping" / "data" / "zone_chart.bin"),
+)
+SHIPPING_DEFAULT_ZONE = env.int("SHIPPING_DEFAULT_ZONE", default=8)
+# Shipments quoted per chunk when streaming quotes as application/x-ndjson.
+SHIPPING_QUOTE_STREAM_CHUNK_SIZE = env.int(
+    "SHIPPING_QUOTE_STREAM_CHUNK_SIZE", default=2000
+)
+# Most packages priced by one POST /api/v1/shipping/rate/ call.
+SHIPPING_RATE_MAX_PACKAGES = env.int("SHIPPING_RATE_MAX_PACKAGES", default=100_000)
+
+# Purchase jobs run on up to SHIPMENT_PURCHASE_WORKERS tasks that each lease
+# SHIPMENT_PURCHASE_CHUNK_SIZE shipments at a time (committed with one UPDATE);
+# a lease not committed within SHIPMENT_PURCHASE_LEASE_SECONDS is re-claimable.
+SHIPMENT_PURCHASE_CHUNK_SIZE = env.int("SHIPMENT_PURCHASE_CHUNK_SIZE", default=1000)
+SHIPMENT_PURCHASE_WORKERS = env.int("SHIPMENT_PURCHASE_WORKERS", default=4)
+SHIPMENT_PURCHASE_LEASE_SECONDS = env.int(
+    "SHIPMENT_PURCHASE_LEASE_SECONDS", default=600
+)
+
+# Carriers quoted by the shipping service. "table" prices from the compiled
+# tables above in process; "stub" is the local HTTP stub carrier (see
+# shipping/carriers/stub.py, run it with manage.py run_stub_carrier). Remote
+# carriers are rated in batches of SHIPPING_CARRIER_BATCH_SIZE with at most
+# SHIPPING_CARRIER_CONCURRENCY batches in flight, and their responses are
+# cached for SHIPPING_CARRIER_RATE_TTL_SECONDS.
+SHIPPING_CARRIERS = env.list("SHIPPING_CARRIERS", default=["table"])
+SHIPPING_STUB_CARRIER_URL = env(
+    "SHIPPING_STUB_CARRIER_URL", default="http://127.0.0.1:8765"
+)
+SHIPPING_CARRIER_BATCH_SIZE = env.int("SHIPPING_CARRIER_BATCH_SIZE", default=500)
+SHIPPING_CARRIER_CONCURRENCY = env.int("SHIPPING_CARRIER_CONCURRENCY", default=4)
+SHIPPING_CARRIER_TIMEOUT_SECONDS = env.float(
+    "SHIPPING_CARRIER_TIMEOUT_SECONDS", default=10.0
+)
+SHIPPING_CARRIER_RATE_TTL_SECONDS = env.int(
+    "SHIPPING_CARRIER_RATE_TTL_SECONDS", default=86400
+)
+
+# Address providers tried in order by verify_shipment_address. "replay"
+# serves recorded responses (see addresses/providers/replay.py) and is
+# configured through ADDRESS_REPLAY, e.g.
+# ADDRESS_REPLAY='{"fixtures": ["verify.ndjson"], "error_rate": 0.01}'.
+ADDRESS_PROVIDERS = env.list("ADDRESS_PROVIDERS", default=["google", "smarty"])
+ADDRESS_REPLAY = env.json("ADDRESS_REPLAY", default={})
+
+# Verification work queue: workers lease this many pending shipments at a
+# time; a lease not released within ADDRESS_VERIFY_LEASE_SECONDS is
+# re-claimable by any worker.
+ADDRESS_VERIFY_QUEUE_BATCH_SIZE = env.int("ADDRESS_VERIFY_QUEUE_BATCH_SIZE", default=25)
+ADDRESS_VERIFY_LEASE_SECONDS = env.int("ADDRESS_VERIFY_LEASE_SECONDS", default=300)
+ADDRESS_VERIFY_QUEUE_WORKERS = env.int("ADDRESS_VERIFY_QUEUE_WORKERS", default=4)
+
+# POST /api/v1/addresses/verify/: at most ADDRESS_VERIFY_BULK_MAX_ITEMS per
+# request; cache misses are verified on ADDRESS_VERIFY_BULK_WORKERS threads
+# shared by all requests, at most ADDRESS_VERIFY_BULK_MAX_IN_FLIGHT at a time
+# per request, and any not answered after ADDRESS_VERIFY_BULK_TIMEOUT_MS come
+# back FAILED.
+ADDRESS_VERIFY_BULK_MAX_ITEMS = env.int("ADDRESS_VERIFY_BULK_MAX_ITEMS", default=100)
+ADDRESS_VERIFY_BULK_WORKERS = env.int("ADDRESS_VERIFY_BULK_WORKERS", default=16)
+ADDRESS_VERIFY_BULK_MAX_IN_FLIGHT = env.int(
+    "ADDRESS_VERIFY_BULK_MAX_IN_FLIGHT", default=4
+)
+ADDRESS_VERIFY_BULK_TIMEOUT_MS = env.int("ADDRESS_VERIFY_BULK_TIMEOUT_MS", default=3000)
+
+# Label rendering: batches of LABEL_RENDER_BATCH_SIZE labels are rendered on
+# LABEL_RENDER_WORKERS processes (0: one per core, 1: in the calling process).
+# Celery prefork children always render in-process, since they may not start
+# processes; the worker's --concurrency is then the rendering CPU budget.
+LABEL_RENDER_WORKERS = env.int("LABEL_RENDER_WORKERS", default=1)
+LABEL_RENDER_BATCH_SIZE = env.int("LABEL_RENDER_BATCH_SIZE", default=250)
+
+# Label storage: rendered labels are stored once per distinct content, keyed
+# by SHA-256. LABEL_STORE "filesystem" keeps them under LABEL_STORE_ROOT and
+# serves them with sendfile, or through nginx when LABEL_STORE_ACCEL_REDIRECT
+# names an internal location (e.g. "/protected/labels/") aliased to the root;
+# "s3" puts them in an S3-compatible bucket (MinIO works), uploading up to
+# LABEL_STORE_S3_CONCURRENCY at a time, and redirects downloads to presigned
+# URLs valid for LABEL_STORE_URL_EXPIRES_SECONDS.
+LABEL_STORE = env("LABEL_STORE", default="filesystem")
+LABEL_STORE_ROOT = env("LABEL_STORE_ROOT", default=str(BASE_DIR / "label-store"))
+LABEL_STORE_ACCEL_REDIRECT = env("LABEL_STORE_ACCEL_REDIRECT", default="")
+LABEL_STORE_S3_ENDPOINT_URL = env(
+    "LABEL_STORE_S3_ENDPOINT_URL", default="http://localhost:9000"
+)
+LABEL_STORE_S3_BUCKET = env("LABEL_STORE_S3_BUCKET", default="shipping-labels")
+LABEL_STORE_S3_ACCESS_KEY = env("LABEL_STORE_S3_ACCESS_KEY", default="")
+LABEL_STORE_S3_SECRET_KEY = env("LABEL_STORE_S3_SECRET_KEY", default="")
+LABEL_STORE_S3_REGION = env("LABEL_STORE_S3_REGION", default="us-east-1")
+LABEL_STORE_URL_EXPIRES_SECONDS = env.int(
+    "LABEL_STORE_URL_EXPIRES_SECONDS", default=300
+)
+LABEL_STORE_S3_CONCURRENCY = env.int("LABEL_STORE_S3_CONCURRENCY", default=8)
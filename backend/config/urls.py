@@ -15,6 +15,8 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import (
@@ -33,7 +35,11 @@ urlpatterns = [
     ),
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
     path("api/v1/", include("core.urls")),
+    path("api/v1/", include("addresses.urls")),
     path("api/v1/", include("imports.urls")),
     path("api/v1/", include("shipments.urls")),
     path("api/v1/", include("shipping.urls")),
 ]
+
+# Rendered labels are written under MEDIA_ROOT; serve them in development.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
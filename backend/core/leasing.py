@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+
+def lease_owner() -> str:
+    """Identify one claimer, unique across hosts, processes and calls."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def claim_rows(
+    queryset: QuerySet,
+    *,
+    owner: str,
+    owner_field: str,
+    expires_field: str,
+    batch_size: int,
+    lease_seconds: int,
+    order_by: tuple[str, ...] = ("pk",),
+) -> list:
+    """Lease up to ``batch_size`` unleased (or expired) rows to ``owner``.
+
+    Rows are picked with ``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent
+    claimers never block on or double-claim each other's rows. The row lock
+    only lasts for the claim transaction; after commit the lease columns
+    carry ownership until they expire. Backends without row locks (SQLite)
+    run the same query unlocked. Returns the claimed primary keys.
+    """
+    now = timezone.now()
+    available = Q(**{f"{expires_field}__isnull": True}) | Q(
+        **{f"{expires_field}__lt": now}
+    )
+    with transaction.atomic():
+        pks = list(
+            queryset.filter(available)
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by(*order_by)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if pks:
+            queryset.model.objects.filter(pk__in=pks).update(
+                **{
+                    owner_field: owner,
+                    expires_field: now + timedelta(seconds=lease_seconds),
+                }
+            )
+    return pks
@@ -0,0 +1,96 @@
+"""Files on disk served with single-range (RFC 9110) support."""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Inclusive ``(first, last)`` byte positions selected by ``header``.
+
+    Returns None for headers to ignore (malformed or multi-range ones get
+    the whole file) and raises ``RangeNotSatisfiable`` for ranges outside a
+    file of ``size`` bytes.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: the last N bytes.
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - int(last)), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable
+    return first, last
+
+
+def _read(path: Path, offset: int, length: int):
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        while length > 0:
+            block = handle.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def ranged_file_response(
+    request, path: Path, content_type: str, filename: str
+) -> HttpResponse:
+    """``path`` as an attachment, or the part of it ``Range`` asks for.
+
+    ``If-Range`` is honoured against the file's ETag, so a resumed download
+    of a file that changed starts again from the beginning.
+    """
+    stat = path.stat()
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    header = request.headers.get("Range")
+    if header and request.headers.get("If-Range", etag) != etag:
+        header = None
+
+    try:
+        byte_range = parse_range(header, size) if header else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        # FileResponse closes the file, and can hand it to the server's
+        # wsgi.file_wrapper (sendfile) rather than copying it through Python.
+        response = FileResponse(
+            open(path, "rb"),
+            content_type=content_type,
+            as_attachment=True,
+            filename=filename,
+        )
+    else:
+        first, last = byte_range
+        response = StreamingHttpResponse(
+            _read(path, first, last - first + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = str(last - first + 1)
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    return response
@@ -0,0 +1,34 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON: one line per item of ``results``.
+
+    Views stream large NDJSON bodies themselves; this renderer makes DRF
+    accept the media type and covers regular responses such as errors.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = (
+            data["results"] if isinstance(data, dict) and "results" in data else [data]
+        )
+        return "".join(ndjson_line(item) for item in items).encode()
+
+
+def ndjson_line(item) -> str:
+    return json.dumps(item, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+
+
+def wants_ndjson(request) -> bool:
+    return getattr(request, "accepted_media_type", "") == NDJSON_MEDIA_TYPE
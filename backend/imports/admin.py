@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from imports.models import ImportJob
+from imports.models import ImportJob, PurchaseJob
 
 
 @admin.register(ImportJob)
@@ -13,3 +13,16 @@ class ImportJobAdmin(admin.ModelAdmin):
         "progress_total",
     )
     list_filter = ("status",)
+
+
+@admin.register(PurchaseJob)
+class PurchaseJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "import_job",
+        "status",
+        "purchased_count",
+        "total_count",
+        "created_at",
+    )
+    list_filter = ("status",)
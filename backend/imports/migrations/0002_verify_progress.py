@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("imports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="verify_chunks_done",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="verify_progress_done",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="verify_progress_total",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:10
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("imports", "0002_verify_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PurchaseJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("idempotency_key", models.CharField(max_length=255)),
+                (
+                    "label_format",
+                    models.CharField(
+                        choices=[("LETTER", "Letter"), ("LABEL_4X6", "4x6 label")],
+                        default="LABEL_4X6",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSING", "Processing"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("total_count", models.IntegerField(default=0)),
+                ("purchased_count", models.IntegerField(default=0)),
+                ("skipped_count", models.IntegerField(default=0)),
+                ("error_summary", models.TextField(blank=True, null=True)),
+                (
+                    "import_job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="purchase_jobs",
+                        to="imports.importjob",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("import_job", "idempotency_key"),
+                        name="purchase_job_idempotency_key",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("imports", "0003_purchase_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="purchasejob",
+            name="file_format",
+            field=models.CharField(
+                choices=[("PDF", "PDF"), ("ZPL", "ZPL"), ("PNG", "PNG")],
+                default="PDF",
+                max_length=10,
+            ),
+        ),
+    ]
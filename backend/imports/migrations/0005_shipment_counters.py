@@ -0,0 +1,94 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+# The counter conditions as of this migration; later changes to
+# shipments.services.counters must not change what this migration computes.
+VERIFIED = ("VALID", "CORRECTED")
+READY = Q(validation_status="READY")
+READY_WITH_SERVICE = READY & ~Q(selected_service="") & Q(selected_service__isnull=False)
+COUNTERS = {
+    "total_rows": None,
+    "ready_count": READY,
+    "needs_info_count": Q(validation_status="NEEDS_INFO"),
+    "invalid_count": Q(validation_status="INVALID"),
+    "address_unverified_count": READY
+    & (
+        ~Q(address_verification_status__in=VERIFIED)
+        | (
+            Q(from_address_is_preset=False)
+            & ~Q(from_address_verification_status__in=VERIFIED)
+        )
+    ),
+    "ready_with_service_count": READY_WITH_SERVICE,
+    "purchasable_count": READY_WITH_SERVICE
+    & Q(address_verification_status__in=VERIFIED)
+    & (
+        Q(from_address_is_preset=True)
+        | Q(from_address_verification_status__in=VERIFIED)
+    ),
+}
+
+
+def count_shipments(apps, _):
+    ImportJob = apps.get_model("imports", "ImportJob")
+    Shipment = apps.get_model("shipments", "Shipment")
+    jobs = [
+        ImportJob(id=row.pop("import_job_id"), **row)
+        for row in Shipment.objects.order_by()
+        .values("import_job_id")
+        .annotate(
+            **{
+                name: Count("pk", filter=condition)
+                for name, condition in COUNTERS.items()
+            }
+        )
+    ]
+    ImportJob.objects.bulk_update(jobs, list(COUNTERS), batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("imports", "0004_purchase_job_file_format"),
+        ("shipments", "0009_purchase_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="address_unverified_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="invalid_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="needs_info_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="purchasable_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="ready_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="ready_with_service_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="total_rows",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_shipments, migrations.RunPython.noop),
+    ]
@@ -19,8 +19,75 @@ class ImportJob(models.Model):
     )
     progress_total = models.IntegerField(default=0)
     progress_done = models.IntegerField(default=0)
+    verify_progress_total = models.IntegerField(default=0)
+    verify_progress_done = models.IntegerField(default=0)
+    verify_chunks_done = models.JSONField(default=list, blank=True)
     error_summary = models.TextField(blank=True, null=True)
     meta = models.JSONField(default=dict, blank=True)
 
+    # Shipment counts, kept current by shipments.services.counters.
+    total_rows = models.IntegerField(default=0)
+    ready_count = models.IntegerField(default=0)
+    needs_info_count = models.IntegerField(default=0)
+    invalid_count = models.IntegerField(default=0)
+    address_unverified_count = models.IntegerField(default=0)
+    ready_with_service_count = models.IntegerField(default=0)
+    purchasable_count = models.IntegerField(default=0)
+
     def __str__(self) -> str:
         return f"ImportJob {self.id} ({self.status})"
+
+
+class PurchaseJob(models.Model):
+    """A label purchase for an import, keyed by the client's Idempotency-Key.
+
+    Its id is the purchase id embedded in label URLs, so a resumed job keeps
+    labelling under the same purchase.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        PROCESSING = "PROCESSING", "Processing"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED = "FAILED", "Failed"
+
+    class LabelFormat(models.TextChoices):
+        LETTER = "LETTER", "Letter"
+        LABEL_4X6 = "LABEL_4X6", "4x6 label"
+
+    class FileFormat(models.TextChoices):
+        PDF = "PDF", "PDF"
+        ZPL = "ZPL", "ZPL"
+        PNG = "PNG", "PNG"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    import_job = models.ForeignKey(
+        ImportJob, on_delete=models.CASCADE, related_name="purchase_jobs"
+    )
+    idempotency_key = models.CharField(max_length=255)
+    label_format = models.CharField(
+        max_length=20, choices=LabelFormat.choices, default=LabelFormat.LABEL_4X6
+    )
+    file_format = models.CharField(
+        max_length=10, choices=FileFormat.choices, default=FileFormat.PDF
+    )
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    total_count = models.IntegerField(default=0)
+    purchased_count = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    error_summary = models.TextField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["import_job", "idempotency_key"],
+                name="purchase_job_idempotency_key",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"PurchaseJob {self.id} ({self.status})"
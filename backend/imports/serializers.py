@@ -1,6 +1,7 @@
+from django.urls import reverse
 from rest_framework import serializers
 
-from imports.models import ImportJob
+from imports.models import ImportJob, PurchaseJob
 
 
 class ImportJobSerializer(serializers.ModelSerializer):
@@ -16,14 +17,6 @@ class ImportUploadSerializer(serializers.Serializer):
 
 
 class ImportJobDetailSerializer(serializers.ModelSerializer):
-    total_rows = serializers.IntegerField(read_only=True)
-    ready_count = serializers.IntegerField(read_only=True)
-    needs_info_count = serializers.IntegerField(read_only=True)
-    invalid_count = serializers.IntegerField(read_only=True)
-    address_unverified_count = serializers.IntegerField(read_only=True)
-    ready_with_service_count = serializers.IntegerField(read_only=True)
-    purchasable_count = serializers.IntegerField(read_only=True)
-
     class Meta:
         model = ImportJob
         fields = (
@@ -31,6 +24,8 @@ class ImportJobDetailSerializer(serializers.ModelSerializer):
             "status",
             "progress_total",
             "progress_done",
+            "verify_progress_total",
+            "verify_progress_done",
             "error_summary",
             "total_rows",
             "ready_count",
@@ -42,12 +37,45 @@ class ImportJobDetailSerializer(serializers.ModelSerializer):
         )
 
 
-class ImportPurchaseResponseSerializer(serializers.Serializer):
-    purchase_id = serializers.UUIDField()
-    label_format = serializers.CharField()
-    label_download_url = serializers.URLField()
-    purchased_count = serializers.IntegerField()
-    skipped_count = serializers.IntegerField()
+class ImportPurchaseRequestSerializer(serializers.Serializer):
+    label_format = serializers.ChoiceField(choices=PurchaseJob.LabelFormat.choices)
+    file_format = serializers.ChoiceField(
+        choices=PurchaseJob.FileFormat.choices, default=PurchaseJob.FileFormat.PDF
+    )
+    agree_to_terms = serializers.BooleanField(default=False)
+
+
+class PurchaseJobSerializer(serializers.ModelSerializer):
+    purchase_id = serializers.UUIDField(source="id", read_only=True)
+    import_job_id = serializers.UUIDField(read_only=True)
+    label_download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PurchaseJob
+        fields = (
+            "purchase_id",
+            "import_job_id",
+            "status",
+            "label_format",
+            "file_format",
+            "label_download_url",
+            "total_count",
+            "purchased_count",
+            "skipped_count",
+            "error_summary",
+            "created_at",
+            "updated_at",
+        )
+
+    def get_label_download_url(self, obj) -> str:
+        url = reverse(
+            "import_purchase_download",
+            kwargs={"import_id": obj.import_job_id, "purchase_id": obj.id},
+        )
+        if obj.file_format == PurchaseJob.FileFormat.PNG:
+            url += "?bundle=zip"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
 
 
 class ImportBulkResponseSerializer(serializers.Serializer):
@@ -1,14 +1,31 @@
+from datetime import timedelta
+from itertools import islice
+
 import structlog
-from celery import shared_task
+from celery import group, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
 
+from addresses.services.attempt_log import AttemptLog
 from addresses.services.verify import (
-    should_verify_from,
-    should_verify_to,
-    verify_shipment_address,
+    VERIFICATION_UPDATE_FIELDS,
+    refresh_shipment_verification,
 )
-from imports.models import ImportJob
+from core.leasing import lease_owner
+from imports.models import ImportJob, PurchaseJob
 from shipments.models import Shipment
+from shipments.services.counters import counting, reconcile_counters
+from shipments.services.purchase import (
+    claim_purchasable,
+    commit_purchases,
+    purchasable,
+    release_purchase_leases,
+    store_labels,
+)
 from shipments.services.validation import validate_shipment
+from shipping.services import materialize_quotes
 
 logger = structlog.get_logger(__name__)
 
@@ -18,58 +35,113 @@ def task_validate_shipments(import_job_id: str) -> None:
     job = ImportJob.objects.get(id=import_job_id)
     logger.info("import.validate.started", import_job_id=import_job_id)
 
-    shipments = Shipment.objects.filter(import_job=job)
-    for shipment in shipments:
-        result = validate_shipment(shipment)
-        shipment.validation_status = result["status"]
-        shipment.validation_errors = result["errors"]
-        shipment.save(update_fields=["validation_status", "validation_errors"])
-        job.progress_done = min(job.progress_total, job.progress_done + 1)
-        job.save(update_fields=["progress_done"])
+    batch_size = settings.IMPORT_VALIDATE_BATCH_SIZE
+    shipments = (
+        Shipment.objects.filter(import_job=job)
+        .order_by("row_number")
+        .iterator(chunk_size=batch_size)
+    )
+    while batch := list(islice(shipments, batch_size)):
+        for shipment in batch:
+            result = validate_shipment(shipment)
+            shipment.validation_status = result["status"]
+            shipment.validation_errors = result["errors"]
+        with counting(Shipment.objects.filter(id__in=[s.id for s in batch])):
+            Shipment.objects.bulk_update(
+                batch, ["validation_status", "validation_errors"]
+            )
+            job.progress_done = min(job.progress_total, job.progress_done + len(batch))
+            job.save(update_fields=["progress_done"])
 
     logger.info("import.validate.completed", import_job_id=import_job_id)
 
 
-@shared_task
-def task_verify_addresses(import_job_id: str) -> None:
-    logger.info("address.verify.started", import_job_id=import_job_id)
-    shipments = Shipment.objects.filter(import_job_id=import_job_id)
-    for shipment in shipments:
-        if not should_verify_to(shipment):
-            shipment.address_verification_status = (
-                Shipment.AddressVerificationStatus.NOT_STARTED
-            )
-            shipment.address_verification_details = {}
-        else:
-            status, details = verify_shipment_address(shipment, "to")
-            shipment.address_verification_status = status
-            shipment.address_verification_details = details
-
-        if not should_verify_from(shipment):
-            shipment.from_address_verification_status = (
-                Shipment.AddressVerificationStatus.NOT_STARTED
+def verify_chunks(import_job_id: str) -> list[tuple[int, int, int]]:
+    """Split an import into ``(chunk_index, row_start, row_end)`` ranges.
+
+    Chunks are fixed-width ``row_number`` ranges, so the plan is the same
+    every time it is recomputed and finished chunk indexes stay meaningful
+    after a restart.
+    """
+    bounds = Shipment.objects.filter(import_job_id=import_job_id).aggregate(
+        first=Min("row_number"), last=Max("row_number")
+    )
+    if bounds["first"] is None:
+        return []
+    size = settings.IMPORT_VERIFY_CHUNK_SIZE
+    return [
+        (index, row_start, row_start + size)
+        for index, row_start in enumerate(
+            range(bounds["first"], bounds["last"] + 1, size)
+        )
+    ]
+
+
+@shared_task(bind=True)
+def task_verify_addresses(self, import_job_id: str) -> None:
+    job = ImportJob.objects.get(id=import_job_id)
+    done = set(job.verify_chunks_done)
+    pending = [chunk for chunk in verify_chunks(import_job_id) if chunk[0] not in done]
+    logger.info(
+        "address.verify.started",
+        import_job_id=import_job_id,
+        chunk_count=len(pending),
+        resumed_chunk_count=len(done),
+    )
+    if not pending:
+        return
+
+    # Replacing with a group keeps the rest of the import chain waiting on
+    # every chunk (Celery turns it into a chord).
+    return self.replace(
+        group(
+            task_verify_address_chunk.si(
+                import_job_id=import_job_id,
+                chunk_index=chunk_index,
+                row_start=row_start,
+                row_end=row_end,
             )
-            shipment.from_address_verification_details = {}
-        else:
-            from_status, from_details = verify_shipment_address(shipment, "from")
-            shipment.from_address_verification_status = from_status
-            shipment.from_address_verification_details = from_details
-
-        validation = validate_shipment(shipment)
-        shipment.validation_status = validation["status"]
-        shipment.validation_errors = validation["errors"]
-        shipment.save(
-            update_fields=[
-                "address_verification_status",
-                "address_verification_details",
-                "from_address_verification_status",
-                "from_address_verification_details",
-                "validation_status",
-                "validation_errors",
-            ]
+            for chunk_index, row_start, row_end in pending
+        )
+    )
+
+
+@shared_task(acks_late=True)
+def task_verify_address_chunk(
+    import_job_id: str, chunk_index: int, row_start: int, row_end: int
+) -> None:
+    if chunk_index in ImportJob.objects.get(id=import_job_id).verify_chunks_done:
+        return
+
+    chunk = Shipment.objects.filter(
+        import_job_id=import_job_id,
+        row_number__gte=row_start,
+        row_number__lt=row_end,
+    )
+    shipments = list(chunk)
+    with AttemptLog() as attempt_log:
+        for shipment in shipments:
+            refresh_shipment_verification(shipment, attempt_log)
+    with counting(chunk):
+        Shipment.objects.bulk_update(shipments, VERIFICATION_UPDATE_FIELDS)
+    materialize_quotes(chunk)
+
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update().get(id=import_job_id)
+        if chunk_index in job.verify_chunks_done:
+            return
+        job.verify_chunks_done = sorted([*job.verify_chunks_done, chunk_index])
+        job.verify_progress_done = min(
+            job.verify_progress_total, job.verify_progress_done + len(shipments)
         )
+        job.save(update_fields=["verify_chunks_done", "verify_progress_done"])
 
-    logger.info("address.verify.completed", import_job_id=import_job_id)
+    logger.info(
+        "address.verify.chunk_completed",
+        import_job_id=import_job_id,
+        chunk_index=chunk_index,
+        shipment_count=len(shipments),
+    )
 
 
 @shared_task
@@ -79,3 +151,86 @@ def task_finalize_import(import_job_id: str) -> None:
         job.status = ImportJob.Status.COMPLETED
         job.save(update_fields=["status"])
     logger.info("import.finalize.completed", import_job_id=import_job_id)
+
+
+@shared_task(acks_late=True)
+def task_purchase_labels(purchase_job_id: str) -> None:
+    """Purchase a job's labels, in parallel with any other workers on it.
+
+    Each worker leases a chunk of rows with SKIP LOCKED, renders and stores
+    their labels outside any transaction, and commits them together with
+    the job's counters, so workers neither overlap nor wait on each other
+    and a crashed worker's rows are re-leased once its lease expires. The
+    worker that finds nothing left to purchase completes the job.
+    """
+    job = PurchaseJob.objects.get(id=purchase_job_id)
+    if job.status == PurchaseJob.Status.COMPLETED:
+        return
+    logger.info(
+        "purchase.started",
+        purchase_job_id=purchase_job_id,
+        resumed_count=job.purchased_count,
+    )
+    owner = lease_owner()
+    shipments = Shipment.objects.filter(import_job_id=job.import_job_id)
+    try:
+        while rows := claim_purchasable(
+            shipments, owner, settings.SHIPMENT_PURCHASE_CHUNK_SIZE
+        ):
+            keys = store_labels(rows, job.label_format, job.file_format)
+            with transaction.atomic():
+                purchased = commit_purchases(rows, keys, owner, purchase_job_id)
+                PurchaseJob.objects.filter(id=purchase_job_id).update(
+                    status=PurchaseJob.Status.PROCESSING,
+                    purchased_count=F("purchased_count") + purchased,
+                    error_summary=None,
+                    updated_at=timezone.now(),
+                )
+
+        with transaction.atomic():
+            job = PurchaseJob.objects.select_for_update().get(id=purchase_job_id)
+            # Rows still purchasable are leased to other workers, which will
+            # complete the job when they run out.
+            if (
+                job.status == PurchaseJob.Status.COMPLETED
+                or purchasable(shipments).exists()
+            ):
+                return
+            job.status = PurchaseJob.Status.COMPLETED
+            job.skipped_count = max(0, job.total_count - job.purchased_count)
+            job.error_summary = None
+            job.save(
+                update_fields=[
+                    "status",
+                    "skipped_count",
+                    "error_summary",
+                    "updated_at",
+                ]
+            )
+    except Exception as exc:
+        release_purchase_leases(shipments, owner)
+        PurchaseJob.objects.filter(id=purchase_job_id).update(
+            status=PurchaseJob.Status.FAILED, error_summary=str(exc)
+        )
+        logger.exception("purchase.failed", purchase_job_id=purchase_job_id)
+        raise
+
+    logger.info(
+        "purchase.completed",
+        purchase_job_id=purchase_job_id,
+        purchased=job.purchased_count,
+        skipped=job.skipped_count,
+    )
+
+
+@shared_task
+def task_reconcile_import_counters(full: bool = False) -> int:
+    """Correct drifted shipment counters of recently updated imports, or of
+    every import when ``full``."""
+    drifted = reconcile_counters(
+        None
+        if full
+        else timezone.now() - timedelta(hours=settings.IMPORT_COUNTER_RECONCILE_HOURS)
+    )
+    logger.info("import.counters_reconciled", drifted_count=drifted, full=full)
+    return drifted
@@ -1,24 +1,42 @@
+import io
+import zipfile
+from datetime import timedelta
+
 import pytest
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from imports.models import ImportJob
+from imports.models import ImportJob, PurchaseJob
+from imports.tasks import (
+    task_purchase_labels,
+    task_reconcile_import_counters,
+    task_validate_shipments,
+)
 from shipments.models import Shipment
+from shipments.services.counters import COUNTERS, counting, reconcile_counters
+from shipments.services.purchase import (
+    claim_purchasable,
+    commit_purchases,
+    store_labels,
+)
 
 
 @pytest.mark.django_db
 def test_import_detail_returns_counts():
     client = APIClient()
     job = ImportJob.objects.create(original_filename="test.csv")
-    Shipment.objects.create(
-        import_job=job,
-        row_number=1,
-        validation_status=Shipment.ValidationStatus.READY,
-    )
-    Shipment.objects.create(
-        import_job=job,
-        row_number=2,
-        validation_status=Shipment.ValidationStatus.NEEDS_INFO,
-    )
+    with counting(Shipment.objects.filter(import_job=job)):
+        Shipment.objects.create(
+            import_job=job,
+            row_number=1,
+            validation_status=Shipment.ValidationStatus.READY,
+        )
+        Shipment.objects.create(
+            import_job=job,
+            row_number=2,
+            validation_status=Shipment.ValidationStatus.NEEDS_INFO,
+        )
 
     response = client.get(f"/api/v1/imports/{job.id}/")
 
@@ -29,6 +47,81 @@ def test_import_detail_returns_counts():
     assert payload["needs_info_count"] == 1
 
 
+@pytest.mark.django_db
+def test_import_counters_follow_bulk_edits_and_reconcile():
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    with counting(Shipment.objects.filter(import_job=job)):
+        shipments = [
+            Shipment.objects.create(
+                import_job=job,
+                row_number=row,
+                validation_status=Shipment.ValidationStatus.READY,
+                address_verification_status=Shipment.AddressVerificationStatus.VALID,
+                from_address_is_preset=True,
+            )
+            for row in range(1, 4)
+        ]
+
+    def counts():
+        payload = client.get(f"/api/v1/imports/{job.id}/").json()
+        return {name: payload[name] for name in COUNTERS}
+
+    assert counts() == {
+        **dict.fromkeys(COUNTERS, 0),
+        "total_rows": 3,
+        "ready_count": 3,
+    }
+
+    response = client.post(
+        f"/api/v1/imports/{job.id}/shipments/bulk/",
+        {
+            "action": "set_shipping_service",
+            "shipment_ids": [str(shipments[0].id), str(shipments[1].id)],
+            "payload": {"service": "priority_mail", "price_cents": 500},
+        },
+        format="json",
+    )
+    assert response.status_code == 200
+    assert client.delete(f"/api/v1/shipments/{shipments[2].id}/").status_code == 204
+    assert counts() == {
+        **dict.fromkeys(COUNTERS, 0),
+        "total_rows": 2,
+        "ready_count": 2,
+        "ready_with_service_count": 2,
+        "purchasable_count": 2,
+    }
+
+    # A write that bypasses counting() drifts until the next reconcile.
+    Shipment.objects.filter(id=shipments[0].id).update(
+        validation_status=Shipment.ValidationStatus.INVALID
+    )
+    assert counts()["invalid_count"] == 0
+    assert reconcile_counters() == 1
+    assert counts()["invalid_count"] == 1
+    assert counts()["purchasable_count"] == 1
+    assert reconcile_counters() == 0
+
+
+@pytest.mark.django_db
+def test_full_reconcile_recounts_imports_not_recently_updated():
+    job = ImportJob.objects.create(original_filename="test.csv")
+    ImportJob.objects.filter(id=job.id).update(
+        updated_at=timezone.now() - timedelta(days=30)
+    )
+    # Bypasses counting(), so the import's updated_at stays old.
+    Shipment.objects.create(
+        import_job=job,
+        row_number=1,
+        validation_status=Shipment.ValidationStatus.READY,
+    )
+
+    assert task_reconcile_import_counters() == 0
+    assert task_reconcile_import_counters(full=True) == 1
+    job.refresh_from_db()
+    assert (job.total_rows, job.ready_count) == (1, 1)
+
+
 @pytest.mark.django_db
 def test_purchase_requires_ready_and_service():
     client = APIClient()
@@ -55,7 +148,14 @@ def test_purchase_requires_ready_and_service():
 
 
 @pytest.mark.django_db
-def test_purchase_success_sets_labels():
+def test_purchase_success_sets_labels(settings, monkeypatch, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.LABEL_STORE_ROOT = tmp_path / "store"
+    # Run the purchase job inline instead of on a worker.
+    monkeypatch.setattr(
+        "imports.views.task_purchase_labels.delay",
+        lambda purchase_job_id: task_purchase_labels(purchase_job_id),
+    )
     client = APIClient()
     job = ImportJob.objects.create(original_filename="test.csv")
     shipment = Shipment.objects.create(
@@ -63,6 +163,8 @@ def test_purchase_success_sets_labels():
         row_number=1,
         validation_status=Shipment.ValidationStatus.READY,
         selected_service="priority_mail",
+        address_verification_status=Shipment.AddressVerificationStatus.VALID,
+        from_address_is_preset=True,
     )
 
     response = client.post(
@@ -71,7 +173,226 @@ def test_purchase_success_sets_labels():
         format="json",
     )
 
-    assert response.status_code == 200
+    assert response.status_code == 202
+    purchase = PurchaseJob.objects.get(id=response.json()["purchase_id"])
+    assert purchase.status == PurchaseJob.Status.COMPLETED
+    assert purchase.purchased_count == 1
     shipment.refresh_from_db()
     assert shipment.label_status == Shipment.LabelStatus.PURCHASED
     assert shipment.label_url
+
+
+@pytest.mark.django_db
+def test_purchase_job_resumes_by_idempotency_key(settings, monkeypatch, tmp_path):
+    settings.SHIPMENT_PURCHASE_CHUNK_SIZE = 2
+    settings.SHIPMENT_PURCHASE_WORKERS = 1
+    settings.MEDIA_ROOT = tmp_path
+    settings.LABEL_STORE_ROOT = tmp_path / "store"
+    enqueued = []
+    monkeypatch.setattr(
+        "imports.views.task_purchase_labels.delay",
+        lambda purchase_job_id: enqueued.append(purchase_job_id),
+    )
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    verified = {
+        "validation_status": Shipment.ValidationStatus.READY,
+        "selected_service": "priority_mail",
+        "address_verification_status": Shipment.AddressVerificationStatus.VALID,
+        "from_address_is_preset": True,
+    }
+    eligible = [
+        Shipment.objects.create(import_job=job, row_number=row, **verified)
+        for row in range(1, 6)
+    ]
+    Shipment.objects.create(
+        import_job=job,
+        row_number=6,
+        validation_status=Shipment.ValidationStatus.READY,
+        selected_service="priority_mail",
+    )
+
+    def post(label_format="LABEL_4X6"):
+        return client.post(
+            f"/api/v1/imports/{job.id}/purchase/",
+            {"label_format": label_format, "agree_to_terms": True},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="checkout-1",
+        )
+
+    response = post()
+    assert response.status_code == 202
+    purchase_id = response.json()["purchase_id"]
+    assert response.json()["status"] == PurchaseJob.Status.PENDING
+    assert enqueued == [purchase_id]
+
+    # The first worker dies after its first chunk is committed.
+    rows = claim_purchasable(Shipment.objects.filter(import_job=job), "worker-1", 2)
+    with transaction.atomic():
+        purchase = PurchaseJob.objects.select_for_update().get(id=purchase_id)
+        purchase.purchased_count = commit_purchases(
+            rows, store_labels(rows), "worker-1", purchase_id
+        )
+        purchase.status = PurchaseJob.Status.PROCESSING
+        purchase.save()
+
+    assert post("LETTER").status_code == 409
+    response = post()
+    assert response.status_code == 202
+    assert response.json()["purchase_id"] == purchase_id
+    assert response.json()["purchased_count"] == 2
+    assert enqueued == [purchase_id, purchase_id]
+
+    task_purchase_labels(purchase_id)
+
+    detail = client.get(f"/api/v1/imports/{job.id}/purchases/{purchase_id}/").json()
+    assert detail["status"] == PurchaseJob.Status.COMPLETED
+    assert (detail["purchased_count"], detail["skipped_count"]) == (5, 1)
+    for shipment in eligible:
+        shipment.refresh_from_db()
+        assert shipment.label_status == Shipment.LabelStatus.PURCHASED
+        assert shipment.label_url == f"/api/v1/shipments/{shipment.id}/label/"
+        response = client.get(shipment.label_url)
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content).startswith(b"%PDF")
+
+    response = post()
+    assert response.status_code == 200
+    assert response.json()["status"] == PurchaseJob.Status.COMPLETED
+    assert len(enqueued) == 2
+    assert PurchaseJob.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_purchase_download_streams_caches_and_ranges(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.LABEL_STORE_ROOT = tmp_path / "store"
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    for row in range(1, 4):
+        Shipment.objects.create(
+            import_job=job,
+            row_number=row,
+            validation_status=Shipment.ValidationStatus.READY,
+            selected_service="priority_mail",
+            address_verification_status=Shipment.AddressVerificationStatus.VALID,
+            from_address_is_preset=True,
+        )
+    purchase = PurchaseJob.objects.create(
+        import_job=job, idempotency_key="checkout-1", total_count=3
+    )
+    url = f"/api/v1/imports/{job.id}/purchases/{purchase.id}/download/"
+    assert client.get(url).status_code == 409
+
+    task_purchase_labels(str(purchase.id))
+    detail = client.get(f"/api/v1/imports/{job.id}/purchases/{purchase.id}/").json()
+    assert detail["label_download_url"] == f"http://testserver{url}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    merged = b"".join(response.streaming_content)
+    assert merged.startswith(b"%PDF-1.4") and b"/Count 3" in merged
+    cached = tmp_path / "labels" / str(purchase.id) / "bundle.pdf"
+    assert cached.read_bytes() == merged
+
+    response = client.get(url, HTTP_RANGE="bytes=0-7")
+    assert response.status_code == 206
+    assert b"".join(response.streaming_content) == b"%PDF-1.4"
+    assert response["Content-Range"] == f"bytes 0-7/{len(merged)}"
+    response = client.get(url, HTTP_RANGE=f"bytes={len(merged)}-")
+    assert response.status_code == 416
+
+    response = client.get(url, {"bundle": "zip"}, HTTP_RANGE="bytes=0-1")
+    assert response.status_code == 206
+    assert b"".join(response.streaming_content) == b"PK"
+    archive = zipfile.ZipFile(
+        io.BytesIO(b"".join(client.get(url, {"bundle": "zip"}).streaming_content))
+    )
+    assert len(archive.namelist()) == 3
+    assert archive.read(archive.namelist()[0]).startswith(b"%PDF")
+    assert client.get(url, {"bundle": "tar"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_parallel_purchase_workers_lease_rows_and_reject_stale_versions(
+    settings, tmp_path
+):
+    settings.SHIPMENT_PURCHASE_CHUNK_SIZE = 2
+    settings.LABEL_STORE_ROOT = tmp_path
+    job = ImportJob.objects.create(original_filename="test.csv")
+    for row in range(1, 5):
+        Shipment.objects.create(
+            import_job=job,
+            row_number=row,
+            to_name="Jane Doe",
+            validation_status=Shipment.ValidationStatus.READY,
+            selected_service="priority_mail",
+            address_verification_status=Shipment.AddressVerificationStatus.VALID,
+            from_address_is_preset=True,
+        )
+    purchase = PurchaseJob.objects.create(
+        import_job=job, idempotency_key="checkout-1", total_count=4
+    )
+    shipments = Shipment.objects.filter(import_job=job)
+
+    first = claim_purchasable(shipments, "worker-1", 2)
+    second = claim_purchasable(shipments, "worker-2", 2)
+    assert [row["row_number"] for row in first] == [1, 2]
+    assert [row["row_number"] for row in second] == [3, 4]
+    assert claim_purchasable(shipments, "worker-3", 2) == []
+
+    # Row 1 is edited while worker 1 renders it: its label is not committed.
+    edited = shipments.get(row_number=1)
+    edited.to_name = "John Roe"
+    edited.save()
+    stale_keys = store_labels(first)
+    with transaction.atomic():
+        assert commit_purchases(first, stale_keys, "worker-1", str(purchase.id)) == 1
+        PurchaseJob.objects.filter(id=purchase.id).update(purchased_count=1)
+    edited.refresh_from_db()
+    assert (edited.label_status, edited.purchase_lease_owner) == (
+        Shipment.LabelStatus.NOT_PURCHASED,
+        "",
+    )
+
+    # Another worker buys the released row; worker 2's lease is still live.
+    task_purchase_labels(str(purchase.id))
+    purchase.refresh_from_db()
+    assert (purchase.status, purchase.purchased_count) == (
+        PurchaseJob.Status.PROCESSING,
+        2,
+    )
+    edited.refresh_from_db()
+    assert edited.label_status == Shipment.LabelStatus.PURCHASED
+    assert edited.label_key != stale_keys[0]
+    assert edited.version == 2
+
+    # Worker 2 died: once its lease expires the rows are bought by another.
+    shipments.filter(purchase_lease_owner="worker-2").update(
+        purchase_lease_expires_at=timezone.now() - timedelta(seconds=1)
+    )
+    task_purchase_labels(str(purchase.id))
+    purchase.refresh_from_db()
+    assert (purchase.status, purchase.purchased_count, purchase.skipped_count) == (
+        PurchaseJob.Status.COMPLETED,
+        4,
+        0,
+    )
+    assert not shipments.exclude(label_status=Shipment.LabelStatus.PURCHASED)
+    assert not shipments.exclude(purchase_lease_owner="")
+
+
+@pytest.mark.django_db
+def test_validate_task_streams_the_import_in_batches(settings):
+    settings.IMPORT_VALIDATE_BATCH_SIZE = 2
+    job = ImportJob.objects.create(original_filename="test.csv", progress_total=5)
+    for row_number in range(1, 6):
+        Shipment.objects.create(import_job=job, row_number=row_number)
+
+    task_validate_shipments(str(job.id))
+
+    job.refresh_from_db()
+    assert job.progress_done == 5
+    assert not Shipment.objects.exclude(
+        validation_status=Shipment.ValidationStatus.NEEDS_INFO
+    ).exists()
@@ -0,0 +1,83 @@
+import pytest
+
+from addresses.providers.base import AddressVerificationResult
+from addresses.services import verify as verify_service
+from imports.models import ImportJob
+from imports.tasks import (
+    task_verify_address_chunk,
+    task_verify_addresses,
+    verify_chunks,
+)
+from shipments.models import Shipment
+
+
+class _ValidProvider:
+    name = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def verify(self, address):
+        self.calls += 1
+        return AddressVerificationResult(
+            is_valid=True,
+            is_corrected=False,
+            suggested_address=None,
+            messages=[],
+            raw={},
+        )
+
+
+def _job_with_rows(count: int) -> ImportJob:
+    job = ImportJob.objects.create(
+        original_filename="test.csv",
+        verify_progress_total=count,
+    )
+    for row_number in range(3, 3 + count):
+        Shipment.objects.create(
+            import_job=job,
+            row_number=row_number,
+            to_name="Jane Doe",
+            to_street1=f"{row_number} Main St",
+            to_city="Los Angeles",
+            to_state="CA",
+            to_postal_code="90001",
+        )
+    return job
+
+
+@pytest.mark.django_db
+def test_verify_chunks_are_stable_row_ranges(settings):
+    settings.IMPORT_VERIFY_CHUNK_SIZE = 2
+    job = _job_with_rows(5)
+
+    assert verify_chunks(str(job.id)) == [(0, 3, 5), (1, 5, 7), (2, 7, 9)]
+
+
+@pytest.mark.django_db
+def test_verify_addresses_resumes_after_finished_chunks(monkeypatch, settings):
+    settings.IMPORT_VERIFY_CHUNK_SIZE = 2
+    provider = _ValidProvider()
+    monkeypatch.setattr(verify_service, "get_providers", lambda: [provider])
+    job = _job_with_rows(5)
+    task_verify_address_chunk(
+        import_job_id=str(job.id), chunk_index=0, row_start=3, row_end=5
+    )
+    assert provider.calls == 2
+
+    # Apply the replacement group inline; a real worker runs it as a chord.
+    monkeypatch.setattr(task_verify_addresses, "replace", lambda sig: sig.apply())
+    task_verify_addresses(import_job_id=str(job.id))
+
+    job.refresh_from_db()
+    assert provider.calls == 5
+    assert job.verify_chunks_done == [0, 1, 2]
+    assert job.verify_progress_done == 5
+    assert not Shipment.objects.exclude(
+        address_verification_status=Shipment.AddressVerificationStatus.VALID
+    ).exists()
+
+    task_verify_address_chunk(
+        import_job_id=str(job.id), chunk_index=1, row_start=5, row_end=7
+    )
+    assert provider.calls == 5
@@ -1,6 +1,12 @@
 from django.urls import path
 
-from imports.views import ImportJobDetailView, ImportPurchaseView, ImportUploadView
+from imports.views import (
+    ImportJobDetailView,
+    ImportPurchaseView,
+    ImportUploadView,
+    PurchaseJobDetailView,
+    PurchaseJobDownloadView,
+)
 from shipments.views import ImportShipmentBulkView
 
 urlpatterns = [
@@ -18,4 +24,14 @@ urlpatterns = [
         ImportPurchaseView.as_view(),
         name="import_purchase",
     ),
+    path(
+        "imports/<uuid:import_id>/purchases/<uuid:purchase_id>/",
+        PurchaseJobDetailView.as_view(),
+        name="import_purchase_detail",
+    ),
+    path(
+        "imports/<uuid:import_id>/purchases/<uuid:purchase_id>/download/",
+        PurchaseJobDownloadView.as_view(),
+        name="import_purchase_download",
+    ),
 ]
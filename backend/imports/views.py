@@ -1,4 +1,5 @@
 import csv
+import math
 import uuid
 from pathlib import Path
 
@@ -6,28 +7,36 @@ import structlog
 from celery import chain
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
-from django.db import transaction
-from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from django.utils.http import content_disposition_header
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from imports.models import ImportJob
+from core.ranges import ranged_file_response
+from imports.models import ImportJob, PurchaseJob
 from imports.serializers import (
     ImportJobDetailSerializer,
     ImportJobSerializer,
-    ImportPurchaseResponseSerializer,
+    ImportPurchaseRequestSerializer,
     ImportUploadSerializer,
+    PurchaseJobSerializer,
 )
 from imports.tasks import (
     task_finalize_import,
+    task_purchase_labels,
     task_validate_shipments,
+    task_verify_addresses,
 )
+from shipments.labels.bundle import cache_to
 from shipments.models import Shipment
+from shipments.services.counters import counting
+from shipments.services.purchase import LABEL_BUNDLES, label_bundle, purchasable
 
 logger = structlog.get_logger(__name__)
 
@@ -91,12 +100,23 @@ def _parse_csv(job: ImportJob) -> str | None:
             )
         )
 
-    with transaction.atomic():
+    with counting(Shipment.objects.filter(import_job=job)):
         Shipment.objects.filter(import_job=job).delete()
         Shipment.objects.bulk_create(shipments)
         job.progress_total = len(shipments)
         job.progress_done = 0
-        job.save(update_fields=["progress_total", "progress_done"])
+        job.verify_progress_total = len(shipments)
+        job.verify_progress_done = 0
+        job.verify_chunks_done = []
+        job.save(
+            update_fields=[
+                "progress_total",
+                "progress_done",
+                "verify_progress_total",
+                "verify_progress_done",
+                "verify_chunks_done",
+            ]
+        )
 
     return None
 
@@ -169,7 +189,7 @@ class ImportUploadView(GenericAPIView):
 
         chain(
             task_validate_shipments.si(import_job_id=str(job.id)),
-            # task_verify_addresses.si(import_job_id=str(job.id)),
+            task_verify_addresses.si(import_job_id=str(job.id)),
             task_finalize_import.si(import_job_id=str(job.id)),
         ).delay()
 
@@ -180,71 +200,7 @@ class ImportUploadView(GenericAPIView):
 class ImportJobDetailView(APIView):
     @extend_schema(responses={200: ImportJobDetailSerializer})
     def get(self, request, import_id):
-        verified_statuses = [
-            Shipment.AddressVerificationStatus.VALID,
-            Shipment.AddressVerificationStatus.CORRECTED,
-        ]
-        from_verified_or_preset = Q(shipments__from_address_is_preset=True) | Q(
-            shipments__from_address_verification_status__in=verified_statuses
-        )
-        job = (
-            ImportJob.objects.filter(id=import_id)
-            .annotate(
-                total_rows=Count("shipments"),
-                ready_count=Count(
-                    "shipments",
-                    filter=Q(
-                        shipments__validation_status=Shipment.ValidationStatus.READY
-                    ),
-                ),
-                needs_info_count=Count(
-                    "shipments",
-                    filter=Q(
-                        shipments__validation_status=Shipment.ValidationStatus.NEEDS_INFO
-                    ),
-                ),
-                invalid_count=Count(
-                    "shipments",
-                    filter=Q(
-                        shipments__validation_status=Shipment.ValidationStatus.INVALID
-                    ),
-                ),
-                address_unverified_count=Count(
-                    "shipments",
-                    filter=Q(
-                        shipments__validation_status=Shipment.ValidationStatus.READY
-                    )
-                    & (
-                        ~Q(shipments__address_verification_status__in=verified_statuses)
-                        | (
-                            Q(shipments__from_address_is_preset=False)
-                            & ~Q(
-                                shipments__from_address_verification_status__in=verified_statuses
-                            )
-                        )
-                    ),
-                ),
-                ready_with_service_count=Count(
-                    "shipments",
-                    filter=Q(
-                        shipments__validation_status=Shipment.ValidationStatus.READY
-                    )
-                    & ~Q(shipments__selected_service="")
-                    & Q(shipments__selected_service__isnull=False),
-                ),
-                purchasable_count=Count(
-                    "shipments",
-                    filter=Q(
-                        shipments__validation_status=Shipment.ValidationStatus.READY
-                    )
-                    & ~Q(shipments__selected_service="")
-                    & Q(shipments__selected_service__isnull=False)
-                    & Q(shipments__address_verification_status__in=verified_statuses)
-                    & from_verified_or_preset,
-                ),
-            )
-            .first()
-        )
+        job = ImportJob.objects.filter(id=import_id).first()
         if not job:
             return Response(
                 {"error": {"code": "NOT_FOUND", "message": "Import job not found"}},
@@ -256,16 +212,36 @@ class ImportJobDetailView(APIView):
 
 
 class ImportPurchaseView(APIView):
+    """Start, or resume, a label purchase.
+
+    The purchase runs as a ``PurchaseJob`` on the purchase queue. Repeating
+    a request with the same ``Idempotency-Key`` returns that job, and
+    re-enqueues it if it has not completed, rather than purchasing again.
+    """
+
     @extend_schema(
+        request=ImportPurchaseRequestSerializer,
+        parameters=[
+            OpenApiParameter(
+                "Idempotency-Key",
+                str,
+                OpenApiParameter.HEADER,
+                description="Client key identifying this purchase attempt",
+            )
+        ],
         responses={
-            200: ImportPurchaseResponseSerializer,
+            200: PurchaseJobSerializer,
+            202: PurchaseJobSerializer,
             400: OpenApiResponse(description="Not ready or terms not accepted"),
-        }
+            409: OpenApiResponse(description="Idempotency-Key reused"),
+        },
     )
     def post(self, request, import_id):
-        label_format = request.data.get("label_format")
-        agree = request.data.get("agree_to_terms")
-        if not agree:
+        serializer = ImportPurchaseRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        label_format = serializer.validated_data["label_format"]
+        file_format = serializer.validated_data["file_format"]
+        if not serializer.validated_data["agree_to_terms"]:
             return Response(
                 {
                     "error": {
@@ -276,54 +252,181 @@ class ImportPurchaseView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        shipments = Shipment.objects.filter(import_job_id=import_id)
-        if not shipments.exists():
+        idempotency_key = request.headers.get("Idempotency-Key") or str(uuid.uuid4())
+        if len(idempotency_key) > 255:
             return Response(
-                {"error": {"code": "EMPTY_IMPORT", "message": "No shipments found"}},
+                {
+                    "error": {
+                        "code": "INVALID_IDEMPOTENCY_KEY",
+                        "message": "Idempotency-Key must be at most 255 characters",
+                    }
+                },
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        verified_statuses = [
-            Shipment.AddressVerificationStatus.VALID,
-            Shipment.AddressVerificationStatus.CORRECTED,
-        ]
-        eligible_shipments = (
-            shipments.filter(
-                validation_status=Shipment.ValidationStatus.READY,
-                selected_service__isnull=False,
+        job = PurchaseJob.objects.filter(
+            import_job_id=import_id, idempotency_key=idempotency_key
+        ).first()
+        if job is None:
+            shipments = Shipment.objects.filter(import_job_id=import_id)
+            total_count = shipments.count()
+            if not total_count:
+                return Response(
+                    {
+                        "error": {
+                            "code": "EMPTY_IMPORT",
+                            "message": "No shipments found",
+                        }
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not purchasable(shipments).exists():
+                return Response(
+                    {
+                        "error": {
+                            "code": "NOT_READY",
+                            "message": "No READY shipments with verified addresses and services",
+                        }
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            job, _ = PurchaseJob.objects.get_or_create(
+                import_job_id=import_id,
+                idempotency_key=idempotency_key,
+                defaults={
+                    "label_format": label_format,
+                    "file_format": file_format,
+                    "total_count": total_count,
+                },
+            )
+
+        if (job.label_format, job.file_format) != (label_format, file_format):
+            return Response(
+                {
+                    "error": {
+                        "code": "IDEMPOTENCY_KEY_REUSED",
+                        "message": "Idempotency-Key was used for a different purchase",
+                    }
+                },
+                status=status.HTTP_409_CONFLICT,
             )
-            .exclude(selected_service="")
-            .filter(address_verification_status__in=verified_statuses)
-            .filter(
-                Q(from_address_is_preset=True)
-                | Q(from_address_verification_status__in=verified_statuses)
+
+        if job.status == PurchaseJob.Status.COMPLETED:
+            return Response(
+                PurchaseJobSerializer(job, context={"request": request}).data
             )
+
+        remaining = max(1, job.total_count - job.purchased_count)
+        workers = min(
+            settings.SHIPMENT_PURCHASE_WORKERS,
+            math.ceil(remaining / settings.SHIPMENT_PURCHASE_CHUNK_SIZE),
+        )
+        for _ in range(workers):
+            task_purchase_labels.delay(purchase_job_id=str(job.id))
+        logger.info(
+            "purchase.enqueued",
+            import_job_id=str(import_id),
+            purchase_job_id=str(job.id),
+            status=job.status,
+            workers=workers,
         )
-        if not eligible_shipments.exists():
+        return Response(
+            PurchaseJobSerializer(job, context={"request": request}).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class PurchaseJobDetailView(APIView):
+    @extend_schema(responses={200: PurchaseJobSerializer})
+    def get(self, request, import_id, purchase_id):
+        job = PurchaseJob.objects.filter(
+            import_job_id=import_id, id=purchase_id
+        ).first()
+        if not job:
+            return Response(
+                {"error": {"code": "NOT_FOUND", "message": "Purchase not found"}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(PurchaseJobSerializer(job, context={"request": request}).data)
+
+
+class PurchaseJobDownloadView(APIView):
+    """All of a purchase's labels as one file.
+
+    ``?bundle=merged`` (the default) is a single multi-page PDF, or the ZPL
+    formats back to back; ``?bundle=zip`` is a ZIP with one entry per
+    label. The first download streams the bundle while caching it on disk;
+    later ones, and any ``Range`` request, are served from that file.
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is a file whatever the client accepts; errors stay JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("bundle", str, enum=list(LABEL_BUNDLES), default="merged")
+        ],
+        responses={
+            (200, "application/octet-stream"): OpenApiTypes.BINARY,
+            (206, "application/octet-stream"): OpenApiTypes.BINARY,
+            400: OpenApiResponse(description="Unknown or unavailable bundle"),
+            404: OpenApiResponse(description="Purchase not found"),
+            409: OpenApiResponse(description="Purchase not completed"),
+            416: OpenApiResponse(description="Range not satisfiable"),
+        },
+    )
+    def get(self, request, import_id, purchase_id):
+        job = PurchaseJob.objects.filter(
+            import_job_id=import_id, id=purchase_id
+        ).first()
+        if not job:
+            return Response(
+                {"error": {"code": "NOT_FOUND", "message": "Purchase not found"}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        bundle_kind = request.query_params.get("bundle", "merged")
+        if bundle_kind not in LABEL_BUNDLES:
             return Response(
                 {
                     "error": {
-                        "code": "NOT_READY",
-                        "message": "No READY shipments with verified addresses and services",
+                        "code": "INVALID_BUNDLE",
+                        "message": "bundle must be one of: merged, zip",
                     }
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        purchase_id = str(uuid.uuid4())
-        for shipment in eligible_shipments:
-            shipment.label_status = Shipment.LabelStatus.PURCHASED
-            shipment.label_url = (
-                f"https://example.com/labels/{purchase_id}/{shipment.id}.pdf"
+        if job.status != PurchaseJob.Status.COMPLETED:
+            return Response(
+                {
+                    "error": {
+                        "code": "PURCHASE_NOT_COMPLETED",
+                        "message": "Labels can be downloaded once the purchase completes",
+                    }
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            bundle = label_bundle(job, bundle_kind)
+        except ValueError as exc:
+            return Response(
+                {"error": {"code": "BUNDLE_UNAVAILABLE", "message": str(exc)}},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            shipment.save(update_fields=["label_status", "label_url"])
 
-        return Response(
-            {
-                "purchase_id": purchase_id,
-                "label_format": label_format,
-                "label_download_url": f"https://example.com/labels/{purchase_id}.pdf",
-                "purchased_count": eligible_shipments.count(),
-                "skipped_count": shipments.count() - eligible_shipments.count(),
-            }
+        if not bundle.path.exists():
+            chunks = cache_to(bundle.path, bundle.chunks)
+            if "Range" not in request.headers:
+                response = StreamingHttpResponse(
+                    chunks, content_type=bundle.content_type
+                )
+                response["Content-Disposition"] = content_disposition_header(
+                    True, bundle.filename
+                )
+                return response
+            # A range of a bundle needs the whole bundle: build it first.
+            for _ in chunks:
+                pass
+        return ranged_file_response(
+            request, bundle.path, bundle.content_type, bundle.filename
         )
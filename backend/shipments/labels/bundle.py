@@ -0,0 +1,81 @@
+"""A purchase's labels as one download: a merged file or a ZIP.
+
+Both are generators that yield as each label is added, so an archive is
+never held in memory, and ``cache_to`` tees one onto disk as it streams.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+import zipfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from shipments.labels.pdf import content_stream
+
+
+def iter_merged(template, labels: Iterable[bytes]) -> Iterator[bytes]:
+    """One document of all ``labels``: a multi-page PDF, or ZPL formats
+    back to back. PNG labels have no merged form."""
+    if template.extension == "pdf":
+        yield from template.iter_document(content_stream(label) for label in labels)
+    elif template.extension == "zpl":
+        yield from labels
+    else:
+        raise ValueError(f"{template.extension} labels cannot be merged")
+
+
+class _Sink:
+    """A write-only file for ``zipfile`` whose contents are taken as written."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_zip(
+    entries: Iterable[tuple[str, bytes]], date_time: tuple[int, ...]
+) -> Iterator[bytes]:
+    """A ZIP of ``(name, data)`` entries, yielded entry by entry.
+
+    PNG entries are stored as they are; the others are deflated.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = (
+                zipfile.ZIP_STORED if name.endswith(".png") else zipfile.ZIP_DEFLATED
+            )
+            archive.writestr(info, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def cache_to(path: Path, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield ``chunks`` while writing them to ``path``.
+
+    The file only appears under ``path`` once every chunk was written; a
+    stream abandoned part way leaves nothing behind.
+    """
+    partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    try:
+        with open(partial, "wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                yield chunk
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
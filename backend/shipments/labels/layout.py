@@ -0,0 +1,150 @@
+"""The 4x6 shipping label layout and the fields printed on it.
+
+Positions and sizes are in points (1/72 in) from the label's top-left
+corner. A layout is data; each output format compiles it once per process
+(see ``shipments.labels.render.get_template``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from shipments.labels.barcode import tracking_number
+
+# Shipment fields a label is rendered from.
+LABEL_FIELDS = (
+    "id",
+    "row_number",
+    "external_order_number",
+    "from_name",
+    "from_company",
+    "from_street1",
+    "from_street2",
+    "from_city",
+    "from_state",
+    "from_postal_code",
+    "from_country",
+    "to_name",
+    "to_company",
+    "to_street1",
+    "to_street2",
+    "to_city",
+    "to_state",
+    "to_postal_code",
+    "to_country",
+    "weight_oz",
+    "length_in",
+    "width_in",
+    "height_in",
+    "selected_service",
+)
+
+
+@dataclass(frozen=True)
+class Box:
+    x: float
+    y: float
+    width: float
+    height: float
+    thickness: float = 1
+
+
+@dataclass(frozen=True)
+class Text:
+    """A line of text, or up to ``max_lines`` lines for list fields.
+
+    Exactly one of ``text`` (static) and ``field`` (from ``label_fields``)
+    is set.
+    """
+
+    x: float
+    y: float
+    size: float
+    max_chars: int
+    text: str | None = None
+    field: str | None = None
+    bold: bool = False
+    max_lines: int = 1
+    leading: float = 0
+
+
+@dataclass(frozen=True)
+class Barcode:
+    x: float
+    y: float
+    width: float
+    height: float
+    field: str
+
+
+@dataclass(frozen=True)
+class Layout:
+    width: float
+    height: float
+    elements: tuple[Box | Text | Barcode, ...]
+
+
+LABEL_4X6 = Layout(
+    width=288,
+    height=432,
+    elements=(
+        Box(6, 6, 276, 420, 2),
+        Text(14, 14, 8, 44, field="from_lines", max_lines=5, leading=10),
+        Text(200, 14, 8, 14, field="weight", bold=True),
+        Box(6, 72, 276, 0, 1.5),
+        Text(14, 82, 18, 22, field="service", bold=True),
+        Box(6, 110, 276, 0, 1.5),
+        Text(14, 118, 9, 10, text="SHIP TO:", bold=True),
+        Text(30, 134, 12, 32, field="to_lines", max_lines=6, leading=15),
+        Box(6, 236, 276, 0, 1.5),
+        Text(14, 244, 8, 16, text="TRACKING #", bold=True),
+        Barcode(24, 260, 240, 88, field="tracking"),
+        Text(24, 356, 10, 28, field="tracking_display", bold=True),
+        Box(6, 378, 276, 0, 1),
+        Text(14, 388, 8, 44, field="reference"),
+        Text(14, 404, 8, 44, field="package"),
+    ),
+)
+
+
+def _address_lines(row: dict, prefix: str) -> list[str]:
+    city_line = " ".join(
+        part
+        for part in (
+            f"{row[f'{prefix}_city']}," if row[f"{prefix}_city"] else "",
+            row[f"{prefix}_state"],
+            row[f"{prefix}_postal_code"],
+        )
+        if part
+    )
+    lines = [
+        row[f"{prefix}_name"],
+        row[f"{prefix}_company"],
+        row[f"{prefix}_street1"],
+        row[f"{prefix}_street2"],
+        city_line,
+    ]
+    if row[f"{prefix}_country"] and row[f"{prefix}_country"] != "US":
+        lines.append(row[f"{prefix}_country"])
+    return [line.upper() for line in lines if line]
+
+
+def label_fields(row: dict) -> dict[str, str | list[str]]:
+    """Printable values for a row of ``LABEL_FIELDS``."""
+    tracking = tracking_number(row["id"])
+    dims = [row["length_in"], row["width_in"], row["height_in"]]
+    reference = f"ROW {row['row_number']}"
+    if row["external_order_number"]:
+        reference = f"ORDER {row['external_order_number']}  {reference}"
+    return {
+        "from_lines": _address_lines(row, "from"),
+        "to_lines": _address_lines(row, "to"),
+        "service": (row["selected_service"] or "").replace("_", " ").upper(),
+        "weight": f"WT {row['weight_oz']} OZ" if row["weight_oz"] else "",
+        "tracking": tracking,
+        "tracking_display": " ".join(
+            tracking[i : i + 4] for i in range(0, len(tracking), 4)
+        ),
+        "reference": reference.upper(),
+        "package": " X ".join(str(dim) for dim in dims) + " IN" if all(dims) else "",
+    }
@@ -0,0 +1,185 @@
+"""PDF labels: one page per label, drawn with the standard Helvetica fonts."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+
+from shipments.labels.barcode import code128
+from shipments.labels.layout import Barcode, Box, Layout, Text
+
+HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+FONTS = (
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica"
+    b" /Encoding /WinAnsiEncoding >>",
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold"
+    b" /Encoding /WinAnsiEncoding >>",
+)
+STREAM = re.compile(rb"<< /Length (\d+) >>\nstream\n")
+# Distance from the top of a line of text to its baseline, per point of size.
+ASCENT = 0.8
+
+
+def _escape(text: str) -> bytes:
+    return (
+        text.encode("cp1252", "replace")
+        .replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+    )
+
+
+def _xref(offsets: list[int], position: int) -> bytes:
+    return b"".join(
+        [
+            b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1),
+            *(b"%010d 00000 n \n" % offset for offset in offsets),
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(offsets) + 1, position),
+        ]
+    )
+
+
+def stream(content: bytes) -> bytes:
+    return b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+
+
+def content_stream(document: bytes) -> bytes:
+    """The page content of a one-page PDF written by ``PdfTemplate``."""
+    match = STREAM.search(document)
+    if match is None:
+        raise ValueError("Not a label PDF")
+    start = match.end()
+    return document[start : start + int(match.group(1))]
+
+
+class PdfTemplate:
+    extension = "pdf"
+    content_type = "application/pdf"
+
+    def __init__(self, layout: Layout, page_size: tuple[float, float]):
+        self.layout = layout
+        self.page_width, self.page_height = page_size
+        # Labels sit centred at the top of larger pages, half an inch down.
+        offset_x = (self.page_width - layout.width) / 2
+        offset_y = self.page_height - layout.height
+        if offset_y:
+            offset_y -= 36
+        static = [b"q 1 0 0 1 %.2f %.2f cm\n" % (offset_x, offset_y)]
+        self._fields = []
+        for element in layout.elements:
+            if getattr(element, "field", None):
+                self._fields.append(element)
+            elif isinstance(element, Box):
+                static.append(self._box(element))
+            elif isinstance(element, Text):
+                static.append(self._text(element, [element.text]))
+        self._static = b"".join(static)
+        self._page = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f]"
+            b" /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >>"
+            b" /Contents %%d 0 R >>" % (self.page_width, self.page_height)
+        )
+
+    def _box(self, box: Box) -> bytes:
+        top = self.layout.height - box.y
+        if not box.height:
+            return b"%.2f w %.2f %.2f m %.2f %.2f l S\n" % (
+                box.thickness,
+                box.x,
+                top,
+                box.x + box.width,
+                top,
+            )
+        return b"%.2f w %.2f %.2f %.2f %.2f re S\n" % (
+            box.thickness,
+            box.x,
+            top - box.height,
+            box.width,
+            box.height,
+        )
+
+    def _text(self, text: Text, lines: list[str]) -> bytes:
+        font = b"F2" if text.bold else b"F1"
+        baseline = self.layout.height - text.y - text.size * ASCENT
+        return b"".join(
+            b"BT /%s %.2f Tf %.2f %.2f Td (%s) Tj ET\n"
+            % (
+                font,
+                text.size,
+                text.x,
+                baseline - index * text.leading,
+                _escape(line[: text.max_chars]),
+            )
+            for index, line in enumerate(lines[: text.max_lines])
+        )
+
+    def _barcode(self, barcode: Barcode, data: str) -> bytes:
+        widths = code128(data)
+        module = barcode.width / sum(widths)
+        bottom = self.layout.height - barcode.y - barcode.height
+        x = barcode.x
+        bars = []
+        for index, width in enumerate(widths):
+            if index % 2 == 0:
+                bars.append(
+                    b"%.3f %.2f %.3f %.2f re\n"
+                    % (x, bottom, width * module, barcode.height)
+                )
+            x += width * module
+        return b"".join(bars) + b"f\n"
+
+    def page_content(self, fields: dict) -> bytes:
+        """The content stream drawing one label."""
+        parts = [self._static]
+        for element in self._fields:
+            value = fields[element.field]
+            if isinstance(element, Barcode):
+                parts.append(self._barcode(element, value))
+            else:
+                parts.append(
+                    self._text(element, value if isinstance(value, list) else [value])
+                )
+        parts.append(b"Q\n")
+        return b"".join(parts)
+
+    def document(self, contents: list[bytes]) -> bytes:
+        """A PDF with one page per content stream."""
+        return b"".join(self.iter_document(contents))
+
+    def iter_document(self, contents: Iterable[bytes]) -> Iterator[bytes]:
+        """Stream a PDF with one page per content stream.
+
+        Pages are written as they arrive and the page tree after them, so
+        neither the page count nor the pages need to be known up front.
+        """
+        offsets: dict[int, int] = {}
+        position = 0
+
+        def write(number: int, body: bytes) -> bytes:
+            nonlocal position
+            part = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+            offsets[number] = position
+            position += len(part)
+            return part
+
+        position = len(HEADER)
+        yield HEADER + write(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        yield write(3, FONTS[0]) + write(4, FONTS[1])
+        number = 5
+        for content in contents:
+            yield write(number, self._page % (number + 1)) + write(
+                number + 1, stream(content)
+            )
+            number += 2
+        yield write(2, self._pages(range(5, number, 2)))
+        yield _xref([offsets[n] for n in range(1, number)], position)
+
+    def _pages(self, page_numbers: range) -> bytes:
+        return b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % n for n in page_numbers),
+            len(page_numbers),
+        )
+
+    def render(self, fields: dict) -> bytes:
+        return self.document([self.page_content(fields)])
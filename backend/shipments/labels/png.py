@@ -0,0 +1,145 @@
+"""PNG labels: 1-bit rasters at thermal printer resolution.
+
+Each scanline is held as an int of black pixels (leftmost pixel in the most
+significant bit), so drawing is OR-ing shifted masks. The static parts of
+the layout are drawn once into a base raster every label starts from, and
+glyph rows are cached per text scale.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+
+from shipments.labels.barcode import code128
+from shipments.labels.font import CELL_HEIGHT, CELL_WIDTH, HEIGHT, glyph
+from shipments.labels.layout import Barcode, Box, Layout, Text
+
+DPI = 203
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _px(points: float) -> int:
+    return round(points * DPI / 72)
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+class PngTemplate:
+    extension = "png"
+    content_type = "image/png"
+
+    def __init__(self, layout: Layout, compression: int = 6):
+        self.width = _px(layout.width)
+        self.height = _px(layout.height)
+        self.compression = compression
+        self._row_bytes = (self.width + 7) // 8
+        self._bits = self._row_bytes * 8
+        self._glyph_rows: dict[tuple[int, bool], dict[str, list[str]]] = {}
+        base = [0] * self.height
+        self._fields = []
+        for element in layout.elements:
+            if getattr(element, "field", None):
+                self._fields.append(element)
+            elif isinstance(element, Box):
+                self._box(base, element)
+            elif isinstance(element, Text):
+                self._text(base, element, [element.text])
+        self._base = base
+        self._header = SIGNATURE + _chunk(
+            b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 1, 0, 0, 0, 0)
+        )
+        self._end = _chunk(b"IEND", b"")
+
+    def _draw(self, raster: list[int], x: int, y: int, height: int, bits: str):
+        """OR a run of pixels (``"1"`` black) into ``height`` rows at x, y."""
+        bits = bits[: self.width - x]
+        if not bits or "1" not in bits:
+            return
+        mask = int(bits, 2) << (self._bits - x - len(bits))
+        for row in range(max(0, y), min(self.height, y + height)):
+            raster[row] |= mask
+
+    def _box(self, raster: list[int], box: Box) -> None:
+        thickness = max(1, _px(box.thickness))
+        x, y = _px(box.x), _px(box.y)
+        width, height = _px(box.width), _px(box.height)
+        self._draw(raster, x, y, thickness, "1" * width)
+        if height:
+            self._draw(raster, x, y + height - thickness, thickness, "1" * width)
+            side = "1" * thickness + "0" * (width - 2 * thickness) + "1" * thickness
+            self._draw(raster, x, y, height, side)
+
+    def _glyph(self, char: str, scale: int, bold: bool) -> list[str]:
+        glyphs = self._glyph_rows.setdefault((scale, bold), {})
+        rows = glyphs.get(char)
+        if rows is None:
+            rows = []
+            for bits in glyph(char):
+                # A cell is the glyph plus a spacing column on its right,
+                # which bold glyphs spread into.
+                cell = bits << 1 | bits if bold else bits << 1
+                rows.append(
+                    "".join(
+                        ("1" if cell >> shift & 1 else "0") * scale
+                        for shift in range(CELL_WIDTH - 1, -1, -1)
+                    )
+                )
+            glyphs[char] = rows
+        return rows
+
+    def _text(self, raster: list[int], text: Text, lines: list[str]) -> None:
+        scale = max(1, round(_px(text.size) / CELL_HEIGHT))
+        x = _px(text.x)
+        for index, line in enumerate(lines[: text.max_lines]):
+            top = _px(text.y + index * text.leading)
+            cells = [
+                self._glyph(char, scale, text.bold) for char in line[: text.max_chars]
+            ]
+            for glyph_row in range(HEIGHT):
+                self._draw(
+                    raster,
+                    x,
+                    top + glyph_row * scale,
+                    scale,
+                    "".join(cell[glyph_row] for cell in cells),
+                )
+
+    def _barcode(self, raster: list[int], barcode: Barcode, data: str) -> None:
+        widths = code128(data)
+        module = max(1, _px(barcode.width) // sum(widths))
+        bars = "".join(
+            ("0" if index % 2 else "1") * (width * module)
+            for index, width in enumerate(widths)
+        )
+        x = _px(barcode.x) + max(0, (_px(barcode.width) - len(bars)) // 2)
+        self._draw(raster, x, _px(barcode.y), _px(barcode.height), bars)
+
+    def render(self, fields: dict) -> bytes:
+        raster = list(self._base)
+        for element in self._fields:
+            value = fields[element.field]
+            if isinstance(element, Barcode):
+                self._barcode(raster, element, value)
+            else:
+                self._text(
+                    raster, element, value if isinstance(value, list) else [value]
+                )
+        # PNG greyscale: 1 is white. Each scanline starts with filter type 0.
+        white = (1 << self._bits) - 1
+        size = self._row_bytes
+        scanlines = b"".join(
+            b"\x00" + (row ^ white).to_bytes(size, "big") for row in raster
+        )
+        return (
+            self._header
+            + _chunk(b"IDAT", zlib.compress(scanlines, self.compression))
+            + self._end
+        )
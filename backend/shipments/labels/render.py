@@ -0,0 +1,76 @@
+"""Render labels, optionally in a process pool for large batches.
+
+Purchases render inside Celery tasks, and the prefork pool already runs one
+task per core, so by default labels render in the task's own process and the
+worker's ``--concurrency`` is the CPU budget shared by all purchases. A
+process pool (``LABEL_RENDER_WORKERS`` > 1) is for callers outside prefork
+workers, and is shared by everything rendering in that process.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+
+from django.conf import settings
+
+from shipments.labels.layout import LABEL_4X6, label_fields
+from shipments.labels.pdf import PdfTemplate
+from shipments.labels.png import PngTemplate
+from shipments.labels.zpl import ZplTemplate
+
+# PDF page sizes in points; ZPL and PNG labels are always 4x6.
+PAGE_SIZES = {"LABEL_4X6": (288, 432), "LETTER": (612, 792)}
+
+
+@cache
+def get_template(file_format: str, label_format: str = "LABEL_4X6"):
+    """The compiled layout for ``file_format``, built once per process."""
+    if file_format == "PDF":
+        return PdfTemplate(LABEL_4X6, PAGE_SIZES[label_format])
+    if file_format == "ZPL":
+        return ZplTemplate(LABEL_4X6)
+    if file_format == "PNG":
+        return PngTemplate(LABEL_4X6)
+    raise ValueError(f"Unknown label file format {file_format!r}")
+
+
+def render_label(row: dict, file_format: str, label_format: str = "LABEL_4X6") -> bytes:
+    return get_template(file_format, label_format).render(label_fields(row))
+
+
+def _render_batch(file_format: str, label_format: str, rows: list[dict]) -> list[bytes]:
+    template = get_template(file_format, label_format)
+    return [template.render(label_fields(row)) for row in rows]
+
+
+@cache
+def _pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def render_labels(
+    rows: list[dict],
+    file_format: str,
+    label_format: str = "LABEL_4X6",
+    workers: int | None = None,
+) -> list[bytes]:
+    """Render rows of ``LABEL_FIELDS``, in order.
+
+    Batches of ``LABEL_RENDER_BATCH_SIZE`` rows are spread over
+    ``LABEL_RENDER_WORKERS`` processes (0: one per core); a single batch, or
+    a single worker, renders in this process. So does a daemonic process,
+    such as a Celery prefork child, which may not start children.
+    """
+    if workers is None:
+        workers = settings.LABEL_RENDER_WORKERS or os.cpu_count() or 1
+    size = settings.LABEL_RENDER_BATCH_SIZE
+    if workers <= 1 or len(rows) <= size or multiprocessing.current_process().daemon:
+        return _render_batch(file_format, label_format, rows)
+    batches = [rows[start : start + size] for start in range(0, len(rows), size)]
+    rendered = _pool(workers).map(
+        partial(_render_batch, file_format, label_format), batches
+    )
+    return [label for batch in rendered for label in batch]
@@ -0,0 +1,335 @@
+"""Content-addressed label storage.
+
+A rendered label is stored once under the SHA-256 of its bytes, so
+re-rendering the same label (a resumed purchase, say) stores nothing new.
+Keys look like ``<sha256>.<extension>`` and are sharded two levels deep on
+their first four hex digits::
+
+    3f/a2/3fa2...c9.pdf
+
+Stores deliver labels without copying them through Python: the
+filesystem store hands the file to the server (``X-Accel-Redirect`` or
+``sendfile``), and the S3 store redirects to a short-lived presigned URL.
+``get_label_store`` builds a store once per process (per configuration), so
+the S3 store's pooled HTTP connections are reused across purchases and
+downloads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import httpx
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.http import content_disposition_header
+
+from core.ranges import ranged_file_response
+
+
+class LabelStoreError(Exception):
+    pass
+
+
+def label_key(data: bytes, extension: str) -> str:
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+
+def shard(key: str) -> str:
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+class FileSystemLabelStore:
+    name = "filesystem"
+
+    def __init__(self, root: Path | str, accel_redirect_prefix: str = ""):
+        self.root = Path(root)
+        self.accel_redirect_prefix = accel_redirect_prefix
+
+    def path(self, key: str) -> Path:
+        return self.root / shard(key)
+
+    def put(self, data: bytes, extension: str, content_type: str) -> str:
+        key = label_key(data, extension)
+        path = self.path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{key}.{uuid.uuid4().hex}.part")
+            partial.write_bytes(data)
+            # Concurrent writers of one key write identical bytes.
+            os.replace(partial, path)
+        return key
+
+    def put_many(
+        self, labels: list[bytes], extension: str, content_type: str
+    ) -> list[str]:
+        return [self.put(label, extension, content_type) for label in labels]
+
+    def read(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def response(
+        self, request, key: str, content_type: str, filename: str
+    ) -> HttpResponse:
+        if self.accel_redirect_prefix:
+            # nginx serves the file from an ``internal`` location.
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = f"{self.accel_redirect_prefix}{shard(key)}"
+            response["Content-Disposition"] = content_disposition_header(True, filename)
+            return response
+        return ranged_file_response(request, self.path(key), content_type, filename)
+
+
+class S3LabelStore:
+    """Labels in an S3-compatible bucket, addressed path-style so that a
+    local MinIO works as well as S3."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "labels/",
+        url_expires_seconds: int = 300,
+        timeout: float = 10.0,
+        concurrency: int = 8,
+        client: httpx.Client | None = None,
+    ):
+        self.base_url = f"{endpoint_url.rstrip('/')}/{bucket}/{prefix}"
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.url_expires_seconds = url_expires_seconds
+        self.concurrency = concurrency
+        self.client = client or httpx.Client(
+            timeout=timeout, limits=httpx.Limits(max_connections=concurrency)
+        )
+        self._uploads = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="label-upload"
+        )
+
+    def url(self, key: str) -> str:
+        return self.base_url + shard(key)
+
+    def _request(self, method: str, key: str, data: bytes = b"", headers=None):
+        url = self.url(key)
+        headers = sign_headers(
+            method,
+            url,
+            dict(headers or {}),
+            hashlib.sha256(data).hexdigest(),
+            self.access_key,
+            self.secret_key,
+            self.region,
+        )
+        try:
+            return self.client.request(method, url, content=data, headers=headers)
+        except httpx.RequestError as exc:
+            raise LabelStoreError(f"{method} {url} failed") from exc
+
+    def put(self, data: bytes, extension: str, content_type: str) -> str:
+        # No existence check first: a key names its content, so rewriting an
+        # object is harmless and saves a round trip for every new label.
+        key = label_key(data, extension)
+        response = self._request(
+            "PUT", key, data, headers={"Content-Type": content_type}
+        )
+        if response.status_code != 200:
+            raise LabelStoreError(f"PUT {key} returned {response.status_code}")
+        return key
+
+    def put_many(
+        self, labels: list[bytes], extension: str, content_type: str
+    ) -> list[str]:
+        """``put`` each distinct label, ``concurrency`` uploads at a time."""
+        distinct = {label_key(label, extension): label for label in labels}
+        list(
+            self._uploads.map(
+                lambda label: self.put(label, extension, content_type),
+                distinct.values(),
+            )
+        )
+        return [label_key(label, extension) for label in labels]
+
+    def read(self, key: str) -> bytes:
+        response = self._request("GET", key)
+        if response.status_code != 200:
+            raise LabelStoreError(f"GET {key} returned {response.status_code}")
+        return response.content
+
+    def response(
+        self, request, key: str, content_type: str, filename: str
+    ) -> HttpResponse:
+        return HttpResponseRedirect(
+            presign(
+                self.url(key),
+                self.access_key,
+                self.secret_key,
+                self.region,
+                self.url_expires_seconds,
+                query={
+                    "response-content-disposition": content_disposition_header(
+                        True, filename
+                    ),
+                    "response-content-type": content_type,
+                },
+            )
+        )
+
+
+# AWS Signature Version 4, for the few S3 calls made here.
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _canonical_query(query: dict[str, str]) -> str:
+    return "&".join(
+        f"{_quote(name)}={_quote(value)}" for name, value in sorted(query.items())
+    )
+
+
+def _signature(secret_key: str, region: str, stamp: str, canonical_request: str) -> str:
+    date = stamp[:8]
+    scope = f"{date}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        (
+            "AWS4-HMAC-SHA256",
+            stamp,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        )
+    )
+    key = f"AWS4{secret_key}".encode()
+    for part in (date, region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+
+def sign_headers(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    payload_sha256: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: datetime | None = None,
+) -> dict[str, str]:
+    """``headers`` plus the ``Authorization`` header for the request."""
+    parts = urlsplit(url)
+    stamp = (now or datetime.now(UTC)).strftime("%Y%m%dT%H%M%SZ")
+    headers = {
+        **headers,
+        "Host": parts.netloc,
+        "X-Amz-Date": stamp,
+        "X-Amz-Content-Sha256": payload_sha256,
+    }
+    signed = sorted(name.lower() for name in headers)
+    values = {name.lower(): str(value).strip() for name, value in headers.items()}
+    canonical_request = "\n".join(
+        (
+            method,
+            _quote(parts.path, safe="/-_.~"),
+            "",
+            "".join(f"{name}:{values[name]}\n" for name in signed),
+            ";".join(signed),
+            payload_sha256,
+        )
+    )
+    signature = _signature(secret_key, region, stamp, canonical_request)
+    headers["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{stamp[:8]}/{region}/s3/"
+        f"aws4_request, SignedHeaders={';'.join(signed)}, Signature={signature}"
+    )
+    return headers
+
+
+def presign(
+    url: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    expires_seconds: int,
+    query: dict[str, str] | None = None,
+    now: datetime | None = None,
+) -> str:
+    """A GET URL for ``url`` that is valid for ``expires_seconds``."""
+    parts = urlsplit(url)
+    stamp = (now or datetime.now(UTC)).strftime("%Y%m%dT%H%M%SZ")
+    query = {
+        **(query or {}),
+        "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+        "X-Amz-Credential": f"{access_key}/{stamp[:8]}/{region}/s3/aws4_request",
+        "X-Amz-Date": stamp,
+        "X-Amz-Expires": str(expires_seconds),
+        "X-Amz-SignedHeaders": "host",
+    }
+    canonical_request = "\n".join(
+        (
+            "GET",
+            _quote(parts.path, safe="/-_.~"),
+            _canonical_query(query),
+            f"host:{parts.netloc}\n",
+            "host",
+            "UNSIGNED-PAYLOAD",
+        )
+    )
+    signature = _signature(secret_key, region, stamp, canonical_request)
+    return (
+        f"{parts.scheme}://{parts.netloc}{parts.path}?"
+        f"{_canonical_query(query)}&X-Amz-Signature={signature}"
+    )
+
+
+LABEL_STORES = {
+    "filesystem": lambda: FileSystemLabelStore(
+        settings.LABEL_STORE_ROOT, settings.LABEL_STORE_ACCEL_REDIRECT
+    ),
+    "s3": lambda: S3LabelStore(
+        settings.LABEL_STORE_S3_ENDPOINT_URL,
+        settings.LABEL_STORE_S3_BUCKET,
+        settings.LABEL_STORE_S3_ACCESS_KEY,
+        settings.LABEL_STORE_S3_SECRET_KEY,
+        region=settings.LABEL_STORE_S3_REGION,
+        url_expires_seconds=settings.LABEL_STORE_URL_EXPIRES_SECONDS,
+        concurrency=settings.LABEL_STORE_S3_CONCURRENCY,
+    ),
+}
+_STORE_SETTINGS = (
+    "LABEL_STORE",
+    "LABEL_STORE_ROOT",
+    "LABEL_STORE_ACCEL_REDIRECT",
+    "LABEL_STORE_S3_ENDPOINT_URL",
+    "LABEL_STORE_S3_BUCKET",
+    "LABEL_STORE_S3_ACCESS_KEY",
+    "LABEL_STORE_S3_SECRET_KEY",
+    "LABEL_STORE_S3_REGION",
+    "LABEL_STORE_URL_EXPIRES_SECONDS",
+    "LABEL_STORE_S3_CONCURRENCY",
+)
+
+
+def get_label_store() -> FileSystemLabelStore | S3LabelStore:
+    """The process's store for the current ``LABEL_STORE*`` settings."""
+    return _configured_store(
+        tuple(str(getattr(settings, name)) for name in _STORE_SETTINGS)
+    )
+
+
+@lru_cache(maxsize=4)
+def _configured_store(_config: tuple) -> FileSystemLabelStore | S3LabelStore:
+    return LABEL_STORES[settings.LABEL_STORE]()
@@ -0,0 +1,73 @@
+"""ZPL II labels for 203 dpi thermal printers.
+
+The printer draws the barcode itself (``^BC``), so only its module width is
+chosen here.
+"""
+
+from __future__ import annotations
+
+from shipments.labels.barcode import code128
+from shipments.labels.layout import Barcode, Box, Layout, Text
+
+DPI = 203
+
+
+def _dots(points: float) -> int:
+    return round(points * DPI / 72)
+
+
+def _escape(text: str) -> str:
+    # ^ and ~ start ZPL commands; field data cannot contain them.
+    return text.replace("^", " ").replace("~", " ")
+
+
+class ZplTemplate:
+    extension = "zpl"
+    content_type = "application/zpl"
+
+    def __init__(self, layout: Layout):
+        static = [f"^XA^CI28^LH0,0^PW{_dots(layout.width)}^LL{_dots(layout.height)}\n"]
+        self._fields = []
+        for element in layout.elements:
+            if getattr(element, "field", None):
+                self._fields.append(element)
+            elif isinstance(element, Box):
+                static.append(self._box(element))
+            elif isinstance(element, Text):
+                static.append(self._text(element, [element.text]))
+        self._static = "".join(static)
+
+    def _box(self, box: Box) -> str:
+        thickness = max(1, _dots(box.thickness))
+        width = max(thickness, _dots(box.width))
+        height = max(thickness, _dots(box.height))
+        return f"^FO{_dots(box.x)},{_dots(box.y)}^GB{width},{height},{thickness}^FS\n"
+
+    def _text(self, text: Text, lines: list[str]) -> str:
+        height = _dots(text.size)
+        width = height * 9 // 10 if text.bold else height * 3 // 4
+        return "".join(
+            f"^FO{_dots(text.x)},{_dots(text.y + index * text.leading)}"
+            f"^A0N,{height},{width}^FD{_escape(line[: text.max_chars])}^FS\n"
+            for index, line in enumerate(lines[: text.max_lines])
+        )
+
+    def _barcode(self, barcode: Barcode, data: str) -> str:
+        module = max(1, min(10, _dots(barcode.width) // sum(code128(data))))
+        return (
+            f"^FO{_dots(barcode.x)},{_dots(barcode.y)}^BY{module}"
+            f"^BCN,{_dots(barcode.height)},N,N,N,A^FD{_escape(data)}^FS\n"
+        )
+
+    def render(self, fields: dict) -> bytes:
+        parts = [self._static]
+        for element in self._fields:
+            value = fields[element.field]
+            if isinstance(element, Barcode):
+                parts.append(self._barcode(element, value))
+            else:
+                parts.append(
+                    self._text(element, value if isinstance(value, list) else [value])
+                )
+        parts.append("^XZ\n")
+        return "".join(parts).encode("utf-8")
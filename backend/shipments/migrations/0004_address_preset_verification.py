@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipments", "0003_from_address_verification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedaddresspreset",
+            name="address_key",
+            field=models.CharField(blank=True, db_index=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="savedaddresspreset",
+            name="verification_details",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="savedaddresspreset",
+            name="verification_status",
+            field=models.CharField(
+                choices=[
+                    ("NOT_STARTED", "Not started"),
+                    ("VALID", "Valid"),
+                    ("CORRECTED", "Corrected"),
+                    ("INVALID", "Invalid"),
+                    ("FAILED", "Failed"),
+                ],
+                default="NOT_STARTED",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="savedaddresspreset",
+            name="verified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
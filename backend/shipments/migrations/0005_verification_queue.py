@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("imports", "0002_verify_progress"),
+        ("shipments", "0004_address_preset_verification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="verify_lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="verify_lease_owner",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="verify_requested_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=models.Index(
+                condition=models.Q(("verify_requested_at__isnull", False)),
+                fields=["verify_requested_at"],
+                name="shipment_verify_pending_idx",
+            ),
+        ),
+    ]
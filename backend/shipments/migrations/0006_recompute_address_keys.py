@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from shipments.migrations._canonical_v1 import canonical_address
+
+
+def recompute_address_keys(apps, _):
+    SavedAddressPreset = apps.get_model("shipments", "SavedAddressPreset")
+    presets = list(SavedAddressPreset.objects.exclude(address_key=""))
+    for preset in presets:
+        # Keys were unhashed until 0010_hash_address_keys.
+        preset.address_key = canonical_address(
+            preset.street1,
+            preset.street2,
+            preset.city,
+            preset.state,
+            preset.postal_code,
+            preset.country,
+        )
+    SavedAddressPreset.objects.bulk_update(presets, ["address_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipments", "0005_verification_queue"),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_address_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipments", "0006_recompute_address_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="quote_fingerprint",
+            field=models.CharField(blank=True, db_index=True, max_length=40),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("imports", "0004_purchase_job_file_format"),
+        ("shipments", "0007_quote_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="label_key",
+            field=models.CharField(blank=True, max_length=80),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="purchase_job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="shipments",
+                to="imports.purchasejob",
+            ),
+        ),
+    ]
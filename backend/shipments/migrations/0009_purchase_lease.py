@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipments", "0008_label_store"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shipment",
+            name="purchase_lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="purchase_lease_owner",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="shipment",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
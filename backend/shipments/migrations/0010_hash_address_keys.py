@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_address_keys(apps, _):
+    # Keys were the canonical address itself; they become its SHA-256.
+    SavedAddressPreset = apps.get_model("shipments", "SavedAddressPreset")
+    presets = list(SavedAddressPreset.objects.exclude(address_key=""))
+    for preset in presets:
+        preset.address_key = hashlib.sha256(preset.address_key.encode()).hexdigest()
+    SavedAddressPreset.objects.bulk_update(presets, ["address_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipments", "0009_purchase_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedaddresspreset",
+            name="verification_failures",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(hash_address_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="savedaddresspreset",
+            name="address_key",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:40
+
+from django.db import migrations
+
+from shipments.migrations._canonical_v1 import address_key
+
+
+def recompute_address_keys(apps, _):
+    # Street names that are also unit designators ("Pier Ave", "Front St")
+    # were parsed as units before.
+    SavedAddressPreset = apps.get_model("shipments", "SavedAddressPreset")
+    presets = list(SavedAddressPreset.objects.exclude(address_key=""))
+    for preset in presets:
+        preset.address_key = address_key(
+            preset.street1,
+            preset.street2,
+            preset.city,
+            preset.state,
+            preset.postal_code,
+            preset.country,
+        )
+    SavedAddressPreset.objects.bulk_update(presets, ["address_key"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipments", "0010_hash_address_keys"),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_address_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,393 @@
+"""Frozen copy of ``addresses.services.canonical`` for data migrations.
+
+Migrations must keep producing the keys they produced when they were
+written, so they use this snapshot instead of the live canonicalizer. Don't
+edit it; when the live rules change, add a new snapshot and a migration that
+recomputes the stored keys with it.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+
+_SUFFIX_VARIANTS = {
+    "ALY": ("ALLEY", "ALLEE", "ALLY", "ALY"),
+    "ANX": ("ANEX", "ANNEX", "ANNX", "ANX"),
+    "ARC": ("ARC", "ARCADE"),
+    "AVE": ("AV", "AVE", "AVEN", "AVENU", "AVENUE", "AVN", "AVNUE"),
+    "BYU": ("BAYOO", "BAYOU"),
+    "BCH": ("BCH", "BEACH"),
+    "BND": ("BEND", "BND"),
+    "BLF": ("BLF", "BLUF", "BLUFF"),
+    "BTM": ("BOT", "BTM", "BOTTM", "BOTTOM"),
+    "BLVD": ("BLVD", "BOUL", "BOULEVARD", "BOULV"),
+    "BR": ("BR", "BRNCH", "BRANCH"),
+    "BRG": ("BRDGE", "BRG", "BRIDGE"),
+    "BRK": ("BRK", "BROOK"),
+    "BYP": ("BYP", "BYPA", "BYPAS", "BYPASS", "BYPS"),
+    "CP": ("CAMP", "CP", "CMP"),
+    "CYN": ("CANYN", "CANYON", "CNYN", "CYN"),
+    "CPE": ("CAPE", "CPE"),
+    "CSWY": ("CAUSEWAY", "CAUSWA", "CSWY"),
+    "CTR": ("CEN", "CENT", "CENTER", "CENTR", "CENTRE", "CNTER", "CNTR", "CTR"),
+    "CIR": ("CIR", "CIRC", "CIRCL", "CIRCLE", "CRCL", "CRCLE"),
+    "CLF": ("CLF", "CLIFF"),
+    "CLB": ("CLB", "CLUB"),
+    "COR": ("COR", "CORNER"),
+    "CRSE": ("COURSE", "CRSE"),
+    "CT": ("COURT", "CT"),
+    "CTS": ("COURTS", "CTS"),
+    "CV": ("COVE", "CV"),
+    "CRK": ("CREEK", "CRK"),
+    "CRES": ("CRESCENT", "CRES", "CRSENT", "CRSNT"),
+    "XING": ("CROSSING", "CRSSNG", "XING"),
+    "DL": ("DALE", "DL"),
+    "DM": ("DAM", "DM"),
+    "DV": ("DIV", "DIVIDE", "DV", "DVD"),
+    "DR": ("DR", "DRIV", "DRIVE", "DRV"),
+    "DRS": ("DRIVES", "DRS"),
+    "EST": ("EST", "ESTATE"),
+    "ESTS": ("ESTATES", "ESTS"),
+    "EXPY": ("EXP", "EXPR", "EXPRESS", "EXPRESSWAY", "EXPW", "EXPY"),
+    "EXT": ("EXT", "EXTENSION", "EXTN", "EXTNSN"),
+    "FLS": ("FALLS", "FLS"),
+    "FRY": ("FERRY", "FRRY", "FRY"),
+    "FLD": ("FIELD", "FLD"),
+    "FLDS": ("FIELDS", "FLDS"),
+    "FLT": ("FLAT", "FLT"),
+    "FRD": ("FORD", "FRD"),
+    "FRST": ("FOREST", "FORESTS", "FRST"),
+    "FRG": ("FORG", "FORGE", "FRG"),
+    "FRK": ("FORK", "FRK"),
+    "FT": ("FORT", "FRT", "FT"),
+    "FWY": ("FREEWAY", "FREEWY", "FRWAY", "FRWY", "FWY"),
+    "GDN": ("GARDEN", "GARDN", "GRDEN", "GRDN", "GDN"),
+    "GDNS": ("GARDENS", "GDNS", "GRDNS"),
+    "GTWY": ("GATEWAY", "GATEWY", "GATWAY", "GTWAY", "GTWY"),
+    "GLN": ("GLEN", "GLN"),
+    "GRN": ("GREEN", "GRN"),
+    "GRV": ("GROV", "GROVE", "GRV"),
+    "HBR": ("HARB", "HARBOR", "HARBR", "HBR", "HRBOR"),
+    "HVN": ("HAVEN", "HVN"),
+    "HTS": ("HT", "HTS", "HEIGHTS"),
+    "HWY": ("HIGHWAY", "HIGHWY", "HIWAY", "HIWY", "HWAY", "HWY"),
+    "HL": ("HILL", "HL"),
+    "HLS": ("HILLS", "HLS"),
+    "HOLW": ("HLLW", "HOLLOW", "HOLLOWS", "HOLW", "HOLWS"),
+    "INLT": ("INLT",),
+    "IS": ("IS", "ISLAND", "ISLND"),
+    "JCT": ("JCT", "JCTION", "JCTN", "JUNCTION", "JUNCTN", "JUNCTON"),
+    "KY": ("KEY", "KY"),
+    "KNL": ("KNL", "KNOL", "KNOLL"),
+    "LK": ("LK", "LAKE"),
+    "LKS": ("LKS", "LAKES"),
+    "LNDG": ("LANDING", "LNDG", "LNDNG"),
+    "LN": ("LANE", "LN"),
+    "LGT": ("LGT", "LIGHT"),
+    "LOOP": ("LOOP", "LOOPS"),
+    "MNR": ("MANOR", "MNR"),
+    "MDWS": ("MDW", "MDWS", "MEADOWS", "MEDOWS"),
+    "ML": ("MILL", "ML"),
+    "MLS": ("MILLS", "MLS"),
+    "MSN": ("MISSN", "MSSN", "MSN", "MISSION"),
+    "MTWY": ("MOTORWAY", "MTWY"),
+    "MT": ("MNT", "MT", "MOUNT"),
+    "MTN": ("MNTAIN", "MNTN", "MOUNTAIN", "MOUNTIN", "MTIN", "MTN"),
+    "NCK": ("NCK", "NECK"),
+    "ORCH": ("ORCH", "ORCHARD", "ORCHRD"),
+    "OVAL": ("OVAL", "OVL"),
+    "PARK": ("PARK", "PRK", "PARKS"),
+    "PKWY": ("PARKWAY", "PARKWY", "PKWAY", "PKWY", "PKY", "PARKWAYS", "PKWYS"),
+    "PASS": ("PASS",),
+    "PATH": ("PATH", "PATHS"),
+    "PIKE": ("PIKE", "PIKES"),
+    "PNES": ("PINES", "PNES"),
+    "PL": ("PL", "PLACE"),
+    "PLN": ("PLAIN", "PLN"),
+    "PLZ": ("PLAZA", "PLZ", "PLZA"),
+    "PT": ("POINT", "PT"),
+    "PRT": ("PORT", "PRT"),
+    "PR": ("PR", "PRAIRIE", "PRR"),
+    "RADL": ("RAD", "RADIAL", "RADIEL", "RADL"),
+    "RNCH": ("RANCH", "RANCHES", "RNCH", "RNCHS"),
+    "RPD": ("RAPID", "RPD"),
+    "RST": ("REST", "RST"),
+    "RDG": ("RDG", "RDGE", "RIDGE"),
+    "RIV": ("RIV", "RIVER", "RVR", "RIVR"),
+    "RD": ("RD", "ROAD"),
+    "RDS": ("ROADS", "RDS"),
+    "RTE": ("ROUTE", "RTE"),
+    "ROW": ("ROW",),
+    "RUN": ("RUN",),
+    "SHR": ("SHOAR", "SHORE", "SHR"),
+    "SHRS": ("SHOARS", "SHORES", "SHRS"),
+    "SKWY": ("SKYWAY", "SKWY"),
+    "SPG": ("SPG", "SPNG", "SPRING", "SPRNG"),
+    "SPGS": ("SPGS", "SPNGS", "SPRINGS", "SPRNGS"),
+    "SQ": ("SQ", "SQR", "SQRE", "SQU", "SQUARE"),
+    "STA": ("STA", "STATION", "STATN", "STN"),
+    "STRA": ("STRA", "STRAV", "STRAVEN", "STRAVENUE", "STRAVN", "STRVN", "STRVNUE"),
+    "STRM": ("STREAM", "STREME", "STRM"),
+    "ST": ("STREET", "STRT", "ST", "STR"),
+    "STS": ("STREETS", "STS"),
+    "SMT": ("SMT", "SUMIT", "SUMITT", "SUMMIT"),
+    "TER": ("TER", "TERR", "TERRACE"),
+    "TRCE": ("TRACE", "TRACES", "TRCE"),
+    "TRAK": ("TRACK", "TRACKS", "TRAK", "TRK", "TRKS"),
+    "TRL": ("TRAIL", "TRAILS", "TRL", "TRLS"),
+    "TUNL": ("TUNEL", "TUNL", "TUNLS", "TUNNEL", "TUNNELS", "TUNNL"),
+    "TPKE": ("TRNPK", "TURNPIKE", "TURNPK", "TPKE"),
+    "UN": ("UN", "UNION"),
+    "VLY": ("VALLEY", "VALLY", "VLLY", "VLY"),
+    "VIA": ("VDCT", "VIA", "VIADCT", "VIADUCT"),
+    "VW": ("VIEW", "VW"),
+    "VLG": ("VILL", "VILLAG", "VILLAGE", "VILLG", "VILLIAGE", "VLG"),
+    "VL": ("VILLE", "VL"),
+    "VIS": ("VIS", "VIST", "VISTA", "VST", "VSTA"),
+    "WALK": ("WALK", "WALKS"),
+    "WAY": ("WY", "WAY"),
+    "WL": ("WELL", "WL"),
+    "WLS": ("WELLS", "WLS"),
+}
+STREET_SUFFIXES = {
+    variant: abbreviation
+    for abbreviation, variants in _SUFFIX_VARIANTS.items()
+    for variant in variants
+}
+_SUFFIX_ABBREVIATIONS = frozenset(_SUFFIX_VARIANTS)
+
+# Pub 28 Appendix B: directionals.
+DIRECTIONALS = {
+    "NORTH": "N",
+    "SOUTH": "S",
+    "EAST": "E",
+    "WEST": "W",
+    "NORTHEAST": "NE",
+    "NORTHWEST": "NW",
+    "SOUTHEAST": "SE",
+    "SOUTHWEST": "SW",
+    "N": "N",
+    "S": "S",
+    "E": "E",
+    "W": "W",
+    "NE": "NE",
+    "NW": "NW",
+    "SE": "SE",
+    "SW": "SW",
+}
+
+# Pub 28 Appendix C2: secondary unit designators. Those in
+# RANGED_DESIGNATORS take a unit number; the rest stand alone.
+_DESIGNATOR_VARIANTS = {
+    "APT": ("APARTMENT", "APT"),
+    "BLDG": ("BUILDING", "BLDG"),
+    "DEPT": ("DEPARTMENT", "DEPT"),
+    "FL": ("FLOOR", "FL"),
+    "HNGR": ("HANGAR", "HNGR"),
+    "KEY": ("KEY",),
+    "LOT": ("LOT",),
+    "OFC": ("OFFICE", "OFC"),
+    "PIER": ("PIER",),
+    "RM": ("ROOM", "RM"),
+    "SLIP": ("SLIP",),
+    "SPC": ("SPACE", "SPC"),
+    "STE": ("SUITE", "STE"),
+    "STOP": ("STOP",),
+    "TRLR": ("TRAILER", "TRLR"),
+    "UNIT": ("UNIT",),
+    "#": ("#", "NO", "NUM", "NUMBER"),
+    "BSMT": ("BASEMENT", "BSMT"),
+    "FRNT": ("FRONT", "FRNT"),
+    "LBBY": ("LOBBY", "LBBY"),
+    "LOWR": ("LOWER", "LOWR"),
+    "PH": ("PENTHOUSE", "PH"),
+    "REAR": ("REAR",),
+    "SIDE": ("SIDE",),
+    "UPPR": ("UPPER", "UPPR"),
+}
+UNIT_DESIGNATORS = {
+    variant: abbreviation
+    for abbreviation, variants in _DESIGNATOR_VARIANTS.items()
+    for variant in variants
+}
+_DESIGNATOR_WORDS = frozenset(UNIT_DESIGNATORS)
+RANGED_DESIGNATORS = frozenset(
+    {
+        "APT",
+        "BLDG",
+        "DEPT",
+        "FL",
+        "HNGR",
+        "KEY",
+        "LOT",
+        "OFC",
+        "PIER",
+        "RM",
+        "SLIP",
+        "SPC",
+        "STE",
+        "STOP",
+        "TRLR",
+        "UNIT",
+        "#",
+    }
+)
+
+# Drop punctuation Pub 28 omits, and split "#" off its unit number.
+_PUNCTUATION = str.maketrans(
+    {".": None, ",": " ", ";": " ", ":": " ", "'": None, '"': None, "#": " # "}
+)
+_NON_ALNUM_RE = re.compile(r"[^A-Z0-9]+")
+_CITY_ABBREVIATIONS = {"ST": "SAINT", "STE": "SAINTE", "FT": "FORT", "MT": "MOUNT"}
+_DIGITS = frozenset("0123456789")
+
+
+@lru_cache(maxsize=16384)
+def normalize_city(value: str) -> str:
+    words = _NON_ALNUM_RE.sub(" ", str(value or "").upper()).split()
+    return " ".join(_CITY_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def _numbered(tokens: list[str], index: int) -> bool:
+    """Whether ``tokens[index]`` looks like a unit number ("4", "12B", "P")."""
+    if index >= len(tokens):
+        return False
+    token = tokens[index]
+    return len(token) == 1 or not _DIGITS.isdisjoint(token)
+
+
+def _starts_secondary(tokens: list[str], index: int) -> bool:
+    # Many designators are also street names ("Pier Ave", "Front St", "Upper
+    # Ridge Rd"), so a designator only starts the secondary part after the
+    # street's suffix or trailing directional, or when a unit number follows
+    # a ranged one ("123 Main Apt 4").
+    designator = UNIT_DESIGNATORS.get(tokens[index])
+    if designator is None:
+        return False
+    previous = tokens[index - 1]
+    after_street = (index >= 2 and previous in STREET_SUFFIXES) or (
+        index >= 3 and previous in DIRECTIONALS
+    )
+    if designator not in RANGED_DESIGNATORS:
+        return after_street
+    return _numbered(tokens, index + 1) or (after_street and index + 1 < len(tokens))
+
+
+@lru_cache(maxsize=65536)
+def canonicalize_street(line: str) -> tuple[str, str]:
+    """Split one address line into ``(primary, secondary)`` Pub 28 form."""
+    tokens = line.upper().translate(_PUNCTUATION).split()
+    if not tokens:
+        return "", ""
+
+    secondary = ""
+    if not _DESIGNATOR_WORDS.isdisjoint(tokens):
+        if tokens[0] in UNIT_DESIGNATORS and _numbered(tokens, 1):
+            # A bare designator line such as "Apt 4" or "Suite 100".
+            return "", " ".join(
+                [UNIT_DESIGNATORS.get(token, token) for token in tokens]
+            )
+        for index in range(1, len(tokens)):
+            if _starts_secondary(tokens, index):
+                secondary = " ".join(
+                    [UNIT_DESIGNATORS.get(token, token) for token in tokens[index:]]
+                )
+                del tokens[index:]
+                break
+
+    # Trailing directional, then suffix, then the leading directional.
+    last = len(tokens) - 1
+    if last >= 2 and tokens[last] in DIRECTIONALS:
+        tokens[last] = DIRECTIONALS[tokens[last]]
+        last -= 1
+    if last >= 1 and tokens[last] in STREET_SUFFIXES:
+        tokens[last] = STREET_SUFFIXES[tokens[last]]
+    # "1 North St" keeps NORTH: it is the street name, not a directional.
+    if (
+        last >= 2
+        and tokens[1] in DIRECTIONALS
+        and tokens[0][:1] in _DIGITS
+        and (last > 2 or tokens[last] not in _SUFFIX_ABBREVIATIONS)
+    ):
+        tokens[1] = DIRECTIONALS[tokens[1]]
+
+    return " ".join(tokens), secondary
+
+
+def _split_zip(postal_code: str) -> tuple[str, str]:
+    if len(postal_code) == 5 and postal_code.isdigit():
+        return postal_code, ""
+    digits = "".join(char for char in postal_code if char in _DIGITS)
+    return digits[:5], digits[5:9]
+
+
+def _canonical_parts(
+    street1: str, street2: str, city: str, state: str, postal_code: str, country: str
+) -> tuple[str, str, str, str, str, str, str]:
+    street, secondary = canonicalize_street(street1)
+    if street2:
+        extra_street, extra_secondary = canonicalize_street(street2)
+        if extra_street[:1] in _DIGITS and street[:1] not in _DIGITS:
+            # "Acme Tower" / "123 Main St": the numbered line is the primary.
+            street, secondary, extra_street, extra_secondary = (
+                extra_street,
+                extra_secondary,
+                street,
+                secondary,
+            )
+        if not street:
+            street = extra_street
+        elif extra_street:
+            # A second line that isn't a unit (e.g. a building name) is kept.
+            extra_secondary = f"{extra_street} {extra_secondary}".rstrip()
+        if extra_secondary:
+            secondary = f"{secondary} {extra_secondary}".lstrip()
+    zip5, zip4 = _split_zip(postal_code.strip())
+    return (
+        street,
+        secondary,
+        normalize_city(city),
+        state.strip().upper(),
+        zip5,
+        zip4,
+        country.strip().upper() or "US",
+    )
+
+
+def _secondary_key(secondary: str) -> str:
+    # Unit designators are often swapped ("APT 4", "UNIT 4", "# 4"); the
+    # unit number is what identifies the delivery point.
+    tokens = secondary.split()
+    if len(tokens) > 1 and tokens[0] in RANGED_DESIGNATORS and _numbered(tokens, 1):
+        return "#" + "".join(tokens[1:])
+    return "".join(tokens)
+
+
+@lru_cache(maxsize=65536)
+def _canonical_address(
+    street1: str, street2: str, city: str, state: str, postal_code: str, country: str
+) -> str:
+    street, secondary, city, state, zip5, _zip4, country = _canonical_parts(
+        street1, street2, city, state, postal_code, country
+    )
+    return f"{street}|{_secondary_key(secondary)}|{city}|{state}|{zip5}|{country}"
+
+
+def canonical_address(
+    street1: str, street2: str, city: str, state: str, postal_code: str, country: str
+) -> str:
+    return _canonical_address(
+        street1 or "",
+        street2 or "",
+        city or "",
+        state or "",
+        str(postal_code or ""),
+        country or "US",
+    )
+
+
+def address_key(
+    street1: str, street2: str, city: str, state: str, postal_code: str, country: str
+) -> str:
+    canonical = canonical_address(street1, street2, city, state, postal_code, country)
+    return hashlib.sha256(canonical.encode()).hexdigest()
@@ -81,6 +81,13 @@ class Shipment(models.Model):
     )
     from_address_verification_details = models.JSONField(default=dict, blank=True)
     from_address_is_preset = models.BooleanField(default=False)
+    # Verification work queue: set while the shipment waits for a worker.
+    verify_requested_at = models.DateTimeField(null=True, blank=True)
+    verify_lease_owner = models.CharField(max_length=100, blank=True)
+    verify_lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    # shipping.PackageQuote holding this shipment's materialized quotes.
+    quote_fingerprint = models.CharField(max_length=40, blank=True, db_index=True)
 
     selected_service = models.CharField(max_length=100, blank=True)
     selected_service_price_cents = models.IntegerField(null=True, blank=True)
@@ -89,16 +96,42 @@ class Shipment(models.Model):
         max_length=20, choices=LabelStatus.choices, default=LabelStatus.NOT_PURCHASED
     )
     label_url = models.URLField(blank=True)
+    # Content key of the label in the label store (shipments.labels.store).
+    label_key = models.CharField(max_length=80, blank=True)
+    purchase_job = models.ForeignKey(
+        "imports.PurchaseJob",
+        on_delete=models.SET_NULL,
+        related_name="shipments",
+        null=True,
+        blank=True,
+    )
+    purchase_lease_owner = models.CharField(max_length=100, blank=True)
+    purchase_lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # Bumped by every edit; a purchase only commits labels rendered from the
+    # version it leased (see shipments.services.purchase).
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         indexes = [
             models.Index(fields=["import_job", "row_number"]),
             models.Index(fields=["import_job", "validation_status"]),
+            models.Index(
+                fields=["verify_requested_at"],
+                condition=models.Q(verify_requested_at__isnull=False),
+                name="shipment_verify_pending_idx",
+            ),
         ]
 
     def __str__(self) -> str:
         return f"Shipment {self.id}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version = models.F("version") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = [*kwargs["update_fields"], "version"]
+        super().save(*args, **kwargs)
+
 
 class SavedAddressPreset(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -111,6 +144,16 @@ class SavedAddressPreset(models.Model):
     state = models.CharField(max_length=2)
     postal_code = models.CharField(max_length=20)
     country = models.CharField(max_length=2, default="US")
+    address_key = models.CharField(max_length=64, blank=True, db_index=True)
+    verification_status = models.CharField(
+        max_length=20,
+        choices=Shipment.AddressVerificationStatus.choices,
+        default=Shipment.AddressVerificationStatus.NOT_STARTED,
+    )
+    verification_details = models.JSONField(default=dict, blank=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
+    # Consecutive FAILED verifications, for backing off retries.
+    verification_failures = models.PositiveIntegerField(default=0)
 
     def __str__(self) -> str:
         return self.name
@@ -6,7 +6,18 @@ from shipments.models import SavedAddressPreset, SavedPackagePreset, Shipment
 class ShipmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shipment
-        fields = "__all__"
+        # Bookkeeping for the verification queue, quoting, label storage and
+        # purchase leases; not part of the API.
+        exclude = (
+            "verify_requested_at",
+            "verify_lease_owner",
+            "verify_lease_expires_at",
+            "quote_fingerprint",
+            "label_key",
+            "purchase_lease_owner",
+            "purchase_lease_expires_at",
+            "version",
+        )
 
 
 class ShipmentUpdateSerializer(serializers.ModelSerializer):
@@ -61,6 +72,12 @@ class SavedAddressPresetSerializer(serializers.ModelSerializer):
     class Meta:
         model = SavedAddressPreset
         fields = "__all__"
+        read_only_fields = (
+            "address_key",
+            "verification_status",
+            "verification_details",
+            "verified_at",
+        )
 
 
 class SavedPackagePresetSerializer(serializers.ModelSerializer):
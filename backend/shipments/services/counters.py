@@ -0,0 +1,123 @@
+"""Per-import shipment counts, stored on ``ImportJob``.
+
+Every write that can change a shipment's status fields runs inside
+``counting(shipments)``, which counts the written rows by import before and
+after the write and adds the difference to their imports in the same
+transaction. Keeping the counters costs work in proportion to the rows
+written, and reading an import's counts is a single-row read.
+``reconcile_counters`` recounts imports from scratch to correct any drift,
+e.g. from a write that bypassed ``counting``; such a write leaves the import's
+``updated_at`` alone, so a periodic sweep recounts every import.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.utils import timezone
+
+from imports.models import ImportJob
+from shipments.models import Shipment
+from shipments.services.purchase import VERIFIED_STATUSES
+
+READY = Q(validation_status=Shipment.ValidationStatus.READY)
+READY_WITH_SERVICE = READY & ~Q(selected_service="") & Q(selected_service__isnull=False)
+
+COUNTERS = {
+    "total_rows": None,
+    "ready_count": READY,
+    "needs_info_count": Q(validation_status=Shipment.ValidationStatus.NEEDS_INFO),
+    "invalid_count": Q(validation_status=Shipment.ValidationStatus.INVALID),
+    "address_unverified_count": READY
+    & (
+        ~Q(address_verification_status__in=VERIFIED_STATUSES)
+        | (
+            Q(from_address_is_preset=False)
+            & ~Q(from_address_verification_status__in=VERIFIED_STATUSES)
+        )
+    ),
+    "ready_with_service_count": READY_WITH_SERVICE,
+    "purchasable_count": READY_WITH_SERVICE
+    & Q(address_verification_status__in=VERIFIED_STATUSES)
+    & (
+        Q(from_address_is_preset=True)
+        | Q(from_address_verification_status__in=VERIFIED_STATUSES)
+    ),
+}
+
+
+def counter_aggregates() -> dict[str, Count]:
+    return {name: Count("pk", filter=condition) for name, condition in COUNTERS.items()}
+
+
+def count_by_import(shipments: QuerySet) -> dict:
+    """``{import_job_id: {counter: count}}`` over ``shipments``."""
+    return {
+        row.pop("import_job_id"): row
+        for row in shipments.order_by()
+        .values("import_job_id")
+        .annotate(**counter_aggregates())
+    }
+
+
+def _add_differences(before: dict, after: dict) -> None:
+    for import_job_id in before.keys() | after.keys():
+        old = before.get(import_job_id, {})
+        new = after.get(import_job_id, {})
+        changes = {
+            name: F(name) + new.get(name, 0) - old.get(name, 0)
+            for name in COUNTERS
+            if new.get(name, 0) != old.get(name, 0)
+        }
+        if changes:
+            ImportJob.objects.filter(id=import_job_id).update(
+                **changes, updated_at=timezone.now()
+            )
+
+
+@contextmanager
+def counting(shipments: QuerySet):
+    """Keep the counters of the imports of ``shipments`` current across a
+    write to them, atomically with the write.
+
+    ``shipments`` must select the same rows before and after the write, so
+    filter it on ids or imports, not on the fields being written. The rows are
+    locked before they are first counted, so a concurrent ``counting`` write
+    to any of them waits rather than being counted into both differences.
+    """
+    with transaction.atomic():
+        list(shipments.order_by("pk").select_for_update().values_list("pk"))
+        before = count_by_import(shipments)
+        yield
+        _add_differences(before, count_by_import(shipments))
+
+
+def reconcile_counters(updated_since: datetime | None = None) -> int:
+    """Recount the counters of imports updated since ``updated_since`` (all
+    imports by default); returns how many had drifted.
+
+    Each import is recounted under its row lock, which ``counting`` also
+    takes to apply a difference, so a concurrent write is counted exactly
+    once.
+    """
+    jobs = ImportJob.objects.all()
+    if updated_since is not None:
+        jobs = jobs.filter(updated_at__gte=updated_since)
+    drifted = 0
+    for import_job_id in jobs.values_list("id", flat=True).iterator():
+        with transaction.atomic():
+            job = (
+                ImportJob.objects.select_for_update()
+                .only("id", *COUNTERS)
+                .get(id=import_job_id)
+            )
+            counts = count_by_import(
+                Shipment.objects.filter(import_job_id=import_job_id)
+            ).get(import_job_id, dict.fromkeys(COUNTERS, 0))
+            if any(getattr(job, name) != counts[name] for name in COUNTERS):
+                ImportJob.objects.filter(id=import_job_id).update(**counts)
+                drifted += 1
+    return drifted
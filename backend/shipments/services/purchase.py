@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.urls import reverse
+
+from core.leasing import claim_rows
+from shipments.labels.bundle import iter_merged, iter_zip
+from shipments.labels.layout import LABEL_FIELDS
+from shipments.labels.render import get_template, render_labels
+from shipments.labels.store import get_label_store
+from shipments.models import Shipment
+
+VERIFIED_STATUSES = (
+    Shipment.AddressVerificationStatus.VALID,
+    Shipment.AddressVerificationStatus.CORRECTED,
+)
+
+
+def purchasable(queryset: QuerySet) -> QuerySet:
+    """READY shipments with a service, verified addresses and no label yet."""
+    return (
+        queryset.filter(
+            validation_status=Shipment.ValidationStatus.READY,
+            selected_service__isnull=False,
+            address_verification_status__in=VERIFIED_STATUSES,
+        )
+        .exclude(selected_service="")
+        .exclude(label_status=Shipment.LabelStatus.PURCHASED)
+        .filter(
+            Q(from_address_is_preset=True)
+            | Q(from_address_verification_status__in=VERIFIED_STATUSES)
+        )
+    )
+
+
+def bundle_directory(purchase_id: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / "labels" / purchase_id
+
+
+def label_url(shipment_id) -> str:
+    return reverse("shipment_label", kwargs={"pk": shipment_id})
+
+
+def claim_purchasable(shipments: QuerySet, owner: str, chunk_size: int) -> list[dict]:
+    """Lease the next ``chunk_size`` purchasable rows of ``shipments`` to
+    ``owner``; returns their label fields and versions in row order.
+
+    Rows leased to other purchase workers are skipped, not waited for.
+    """
+    ids = claim_rows(
+        purchasable(shipments),
+        owner=owner,
+        owner_field="purchase_lease_owner",
+        expires_field="purchase_lease_expires_at",
+        batch_size=chunk_size,
+        lease_seconds=settings.SHIPMENT_PURCHASE_LEASE_SECONDS,
+        order_by=("row_number", "pk"),
+    )
+    if not ids:
+        return []
+    return list(
+        Shipment.objects.filter(id__in=ids, purchase_lease_owner=owner)
+        .order_by("row_number")
+        .values(*LABEL_FIELDS, "version")
+    )
+
+
+def store_labels(
+    rows: list[dict], label_format: str = "LABEL_4X6", file_format: str = "PDF"
+) -> list[str]:
+    """Render ``rows`` and put the labels in the label store; returns their
+    keys. Holds no locks, so call it outside any transaction."""
+    template = get_template(file_format, label_format)
+    return get_label_store().put_many(
+        render_labels(rows, file_format, label_format),
+        template.extension,
+        template.content_type,
+    )
+
+
+def commit_purchases(
+    rows: list[dict], keys: list[str], owner: str, purchase_id: str
+) -> int:
+    """Mark leased ``rows`` purchased with their stored labels.
+
+    A row is only purchased if it is still leased to ``owner``, still
+    purchasable and still at the version its label was rendered from;
+    the others changed meanwhile and are released to be claimed again.
+    Call it inside the transaction that records the progress. Returns how
+    many were purchased.
+    """
+    ids = [row["id"] for row in rows]
+    current = dict(
+        purchasable(Shipment.objects.filter(id__in=ids, purchase_lease_owner=owner))
+        .select_for_update()
+        .values_list("id", "version")
+    )
+    purchased = [
+        Shipment(
+            id=row["id"],
+            label_status=Shipment.LabelStatus.PURCHASED,
+            label_url=label_url(row["id"]),
+            label_key=key,
+            purchase_job_id=purchase_id,
+            purchase_lease_owner="",
+            purchase_lease_expires_at=None,
+            version=row["version"] + 1,
+        )
+        for row, key in zip(rows, keys, strict=True)
+        if current.get(row["id"]) == row["version"]
+    ]
+    Shipment.objects.bulk_update(
+        purchased,
+        [
+            "label_status",
+            "label_url",
+            "label_key",
+            "purchase_job",
+            "purchase_lease_owner",
+            "purchase_lease_expires_at",
+            "version",
+        ],
+    )
+    release_purchase_leases(Shipment.objects.filter(id__in=ids), owner)
+    return len(purchased)
+
+
+def release_purchase_leases(shipments: QuerySet, owner: str) -> int:
+    return shipments.filter(purchase_lease_owner=owner).update(
+        purchase_lease_owner="", purchase_lease_expires_at=None
+    )
+
+
+LABEL_BUNDLES = ("merged", "zip")
+
+
+@dataclass(frozen=True)
+class LabelBundle:
+    """A purchase's labels as one download, cached at ``path``."""
+
+    path: Path
+    content_type: str
+    filename: str
+    chunks: Iterator[bytes]
+
+
+def label_bundle(purchase, bundle: str) -> LabelBundle:
+    """The ``"merged"`` document or ``"zip"`` of a completed purchase's labels.
+
+    ``chunks`` builds it lazily, reading one label at a time from the label
+    store in row order. Raises ``ValueError`` for PNG purchases, which have
+    no merged form.
+    """
+    purchase_id = str(purchase.id)
+    template = get_template(purchase.file_format, purchase.label_format)
+    store = get_label_store()
+    directory = bundle_directory(purchase_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    rows = (
+        Shipment.objects.filter(purchase_job_id=purchase.id)
+        .order_by("row_number")
+        .values_list("id", "row_number", "label_key")
+        .iterator(chunk_size=500)
+    )
+
+    if bundle == "zip":
+        return LabelBundle(
+            path=directory / "bundle.zip",
+            content_type="application/zip",
+            filename=f"labels-{purchase_id}.zip",
+            chunks=iter_zip(
+                (
+                    (
+                        f"{row_number:05d}-{shipment_id}.{template.extension}",
+                        store.read(key),
+                    )
+                    for shipment_id, row_number, key in rows
+                ),
+                date_time=purchase.updated_at.timetuple()[:6],
+            ),
+        )
+    if template.extension == "png":
+        raise ValueError("PNG labels have no merged download")
+    return LabelBundle(
+        path=directory / f"bundle.{template.extension}",
+        content_type=template.content_type,
+        filename=f"labels-{purchase_id}.{template.extension}",
+        chunks=iter_merged(template, (store.read(key) for _, _, key in rows)),
+    )
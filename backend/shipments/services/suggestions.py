@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import F, QuerySet, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce, Left, NullIf
+
+from shipments.models import Shipment
+from shipments.services.validation import revalidate_shipments
+from shipping.services import materialize_quotes
+
+SUGGESTED_FIELDS = ("street1", "street2", "city", "state", "postal_code", "country")
+
+
+def _prefixes(address_type: str) -> tuple[str, str]:
+    """Return the (address field prefix, verification field prefix)."""
+    if address_type == "from":
+        return "from_", "from_address_verification"
+    return "to_", "address_verification"
+
+
+def accept_suggested_addresses(queryset: QuerySet, address_type: str = "to") -> int:
+    """Copy provider-suggested addresses onto CORRECTED shipments.
+
+    The suggestion is read out of ``*_verification_details`` by the database,
+    so every matching row is rewritten by a single UPDATE; the affected rows
+    are then revalidated in batches. A suggested address is the provider's
+    verified form, so accepted rows become VALID. Their quotes are priced
+    once the outermost transaction commits, so no carrier call is made while
+    the rows are locked.
+    """
+    prefix, verification = _prefixes(address_type)
+    details = f"{verification}_details"
+    corrected = queryset.filter(
+        **{
+            f"{verification}_status": Shipment.AddressVerificationStatus.CORRECTED,
+            f"{details}__suggested_address__isnull": False,
+        }
+    )
+
+    updates = {}
+    for name in SUGGESTED_FIELDS:
+        field = f"{prefix}{name}"
+        max_length = Shipment._meta.get_field(field).max_length
+        current = Value("") if name == "street2" else F(field)
+        # SQLite renders a JSON null as the text "null" where PostgreSQL's
+        # ->> gives SQL NULL; treat both as "not suggested".
+        suggested = NullIf(KT(f"{details}__suggested_address__{name}"), Value("null"))
+        updates[field] = Left(Coalesce(suggested, current), max_length)
+    updates[f"{verification}_status"] = Value(Shipment.AddressVerificationStatus.VALID)
+    if address_type == "from":
+        updates["from_address_is_preset"] = Value(False)
+    updates["version"] = F("version") + 1
+
+    with transaction.atomic():
+        ids = list(corrected.select_for_update().values_list("id", flat=True))
+        if not ids:
+            return 0
+        Shipment.objects.filter(id__in=ids).update(**updates)
+        revalidate_shipments(Shipment.objects.filter(id__in=ids))
+        transaction.on_commit(
+            lambda: materialize_quotes(Shipment.objects.filter(id__in=ids))
+        )
+    return len(ids)
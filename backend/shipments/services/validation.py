@@ -4,6 +4,7 @@ import re
 from decimal import Decimal
 from typing import Any
 
+from addresses.services.zip_index import check_address
 from shipments.models import Shipment
 
 US_STATES = {
@@ -129,6 +130,21 @@ def validate_shipment(shipment: Shipment) -> dict:
                 }
             )
 
+    for prefix in ("to_", "from_"):
+        postal_code = getattr(shipment, f"{prefix}postal_code")
+        state = getattr(shipment, f"{prefix}state")
+        if (
+            not _missing(postal_code)
+            and ZIP_RE.match(str(postal_code).strip())
+            and not _missing(state)
+            and state.upper() in US_STATES
+        ):
+            errors.extend(
+                check_address(
+                    getattr(shipment, f"{prefix}city"), state, postal_code, prefix
+                )
+            )
+
     if not _missing(shipment.weight_oz):
         if not _is_positive_number(shipment.weight_oz):
             errors.append(
@@ -223,6 +239,7 @@ def validate_shipment(shipment: Shipment) -> dict:
         in {
             "invalid_state",
             "invalid_postal_code",
+            "postal_code_state_mismatch",
             "invalid_weight",
             "invalid_dimension",
             "address_invalid",
@@ -239,3 +256,26 @@ def validate_shipment(shipment: Shipment) -> dict:
         )
 
     return {"status": status, "errors": errors}
+
+
+def revalidate_shipments(queryset, batch_size: int = 500) -> int:
+    """Re-run ``validate_shipment`` over ``queryset`` and save in batches."""
+    revalidated = 0
+    batch: list[Shipment] = []
+    for shipment in queryset.order_by("pk").iterator(chunk_size=batch_size):
+        result = validate_shipment(shipment)
+        shipment.validation_status = result["status"]
+        shipment.validation_errors = result["errors"]
+        batch.append(shipment)
+        if len(batch) >= batch_size:
+            revalidated += _save_validation(batch)
+            batch = []
+    return revalidated + _save_validation(batch)
+
+
+def _save_validation(batch: list[Shipment]) -> int:
+    if batch:
+        Shipment.objects.bulk_update(
+            batch, ["validation_status", "validation_errors"], batch_size=len(batch)
+        )
+    return len(batch)
@@ -1,5 +1,6 @@
 import pytest
 
+from addresses.services.zip_index import BUNDLED_INDEX_PATH
 from imports.models import ImportJob
 from shipments.models import Shipment
 from shipments.services.validation import validate_shipment
@@ -118,3 +119,36 @@ def test_validate_shipment_address_verification_invalid():
 
     assert result["status"] == Shipment.ValidationStatus.INVALID
     assert any(error["code"] == "address_invalid" for error in result["errors"])
+
+
+@pytest.mark.django_db
+def test_validate_shipment_flags_zip_reference_mismatches(settings):
+    settings.ADDRESS_ZIP_INDEX_PATH = str(BUNDLED_INDEX_PATH)
+    job = ImportJob.objects.create(original_filename="test.csv")
+    shipment = Shipment(
+        import_job=job,
+        row_number=1,
+        to_name="Jane Doe",
+        to_street1="123 Main St",
+        to_city="Los Angeles",
+        to_state="NY",
+        to_postal_code="90001",
+        from_name="Warehouse",
+        from_street1="500 Market St",
+        from_city="Oakland",
+        from_state="CA",
+        from_postal_code="94105",
+        weight_oz=16,
+    )
+
+    result = validate_shipment(shipment)
+
+    assert result["status"] == Shipment.ValidationStatus.INVALID
+    codes = {error["field"]: error["code"] for error in result["errors"]}
+    assert codes["to_postal_code"] == "postal_code_state_mismatch"
+    assert codes["from_city"] == "postal_code_city_mismatch"
+
+    # An unlisted city alone only needs review.
+    shipment.to_state = "CA"
+    result = validate_shipment(shipment)
+    assert result["status"] == Shipment.ValidationStatus.NEEDS_INFO
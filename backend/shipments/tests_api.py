@@ -1,8 +1,12 @@
 import pytest
 from rest_framework.test import APIClient
 
+from addresses.services.canonical import address_key
+from addresses.services.presets import preset_address
 from imports.models import ImportJob
 from shipments.models import SavedAddressPreset, Shipment
+from shipping import services as shipping_services
+from shipping.carriers.base import CarrierError
 
 
 @pytest.mark.django_db
@@ -26,6 +30,18 @@ def test_import_shipments_list_filters():
 
     assert response.status_code == 200
     assert response.json()["count"] == 1
+    (shipment,) = response.json()["results"]
+    assert shipment["to_name"] == "Alice"
+    assert (
+        not {
+            "version",
+            "label_key",
+            "quote_fingerprint",
+            "verify_lease_owner",
+            "purchase_lease_owner",
+        }
+        & shipment.keys()
+    )
 
 
 @pytest.mark.django_db
@@ -96,3 +112,222 @@ def test_bulk_apply_saved_address():
     assert response.status_code == 200
     shipment.refresh_from_db()
     assert shipment.from_city == "Los Angeles"
+
+
+@pytest.mark.django_db
+def test_bulk_apply_saved_address_inherits_preset_verification():
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    preset = SavedAddressPreset.objects.create(
+        name="Warehouse",
+        contact_name="Warehouse",
+        street1="123 Main",
+        city="Los Angeles",
+        state="CA",
+        postal_code="90001",
+        verification_status=Shipment.AddressVerificationStatus.VALID,
+        verification_details={"provider": "smarty"},
+    )
+    shipment = Shipment.objects.create(import_job=job, row_number=1)
+
+    response = client.post(
+        f"/api/v1/imports/{job.id}/shipments/bulk/",
+        {
+            "shipment_ids": [str(shipment.id)],
+            "action": "apply_saved_address",
+            "payload": {"preset_id": str(preset.id)},
+        },
+        format="json",
+    )
+
+    assert response.status_code == 200
+    shipment.refresh_from_db()
+    assert (
+        shipment.from_address_verification_status
+        == Shipment.AddressVerificationStatus.VALID
+    )
+    assert shipment.from_address_verification_details["preset_id"] == str(preset.id)
+
+
+@pytest.mark.django_db
+def test_bulk_manual_from_address_matches_verified_preset():
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    preset = SavedAddressPreset.objects.create(
+        name="Warehouse",
+        street1="123 Main St",
+        city="Los Angeles",
+        state="CA",
+        postal_code="90001",
+        verification_status=Shipment.AddressVerificationStatus.VALID,
+    )
+    preset.address_key = address_key(preset_address(preset))
+    preset.save()
+    shipments = [
+        Shipment.objects.create(import_job=job, row_number=row_number)
+        for row_number in (1, 2)
+    ]
+
+    response = client.post(
+        f"/api/v1/imports/{job.id}/shipments/bulk/",
+        {
+            "shipment_ids": [str(shipment.id) for shipment in shipments],
+            "action": "apply_saved_address",
+            "payload": {
+                "from_street1": "123 MAIN STREET",
+                "from_city": "Los Angeles",
+                "from_state": "CA",
+                "from_postal_code": "90001",
+            },
+        },
+        format="json",
+    )
+
+    assert response.status_code == 200
+    for shipment in shipments:
+        shipment.refresh_from_db()
+        assert not shipment.from_address_is_preset
+        assert (
+            shipment.from_address_verification_status
+            == Shipment.AddressVerificationStatus.VALID
+        )
+        assert shipment.from_address_verification_details["preset_id"] == str(preset.id)
+
+
+@pytest.mark.django_db
+def test_bulk_accept_suggested_address_for_all_matching(
+    django_capture_on_commit_callbacks,
+):
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    suggestion = {
+        "street1": "123 MAIN ST",
+        "street2": None,
+        "city": "LOS ANGELES",
+        "state": "CA",
+        "postal_code": "90001-1234",
+        "country": "US",
+    }
+    corrected = Shipment.objects.create(
+        import_job=job,
+        row_number=1,
+        to_name="Jane Doe",
+        to_street1="123 Main",
+        to_street2="Rear",
+        to_city="Los Angelos",
+        to_state="CA",
+        to_postal_code="90001",
+        address_verification_status=Shipment.AddressVerificationStatus.CORRECTED,
+        address_verification_details={"suggested_address": suggestion},
+    )
+    invalid = Shipment.objects.create(
+        import_job=job,
+        row_number=2,
+        to_street1="1 Nowhere",
+        address_verification_status=Shipment.AddressVerificationStatus.INVALID,
+        address_verification_details={"suggested_address": suggestion},
+    )
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = client.post(
+            f"/api/v1/imports/{job.id}/shipments/bulk/",
+            {
+                "shipment_ids": [],
+                "action": "accept_suggested_address",
+                "payload": {"all_matching": True},
+            },
+            format="json",
+        )
+
+    assert response.status_code == 200
+    assert response.json()["updated_count"] == 1
+    # Quotes are priced after the commit, not under the row locks.
+    assert len(callbacks) == 1
+    corrected.refresh_from_db()
+    invalid.refresh_from_db()
+    assert corrected.to_street1 == "123 MAIN ST"
+    assert corrected.to_street2 == ""
+    assert corrected.to_city == "LOS ANGELES"
+    assert corrected.to_postal_code == "90001-1234"
+    assert (
+        corrected.address_verification_status
+        == Shipment.AddressVerificationStatus.VALID
+    )
+    assert not any(error["field"] == "to_city" for error in corrected.validation_errors)
+    assert invalid.to_street1 == "1 Nowhere"
+
+
+@pytest.mark.django_db
+def test_bulk_auto_select_cheapest_prices_each_shipment():
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    light, heavy, incomplete = (
+        Shipment.objects.create(
+            import_job=job,
+            row_number=row_number,
+            weight_oz=weight_oz,
+            from_postal_code="91773",
+            to_postal_code="10001",
+            validation_status=validation_status,
+        )
+        for row_number, weight_oz, validation_status in (
+            (1, 4, Shipment.ValidationStatus.READY),
+            (2, 80, Shipment.ValidationStatus.READY),
+            (3, None, Shipment.ValidationStatus.NEEDS_INFO),
+        )
+    )
+
+    response = client.post(
+        f"/api/v1/imports/{job.id}/shipments/bulk/",
+        {"action": "auto_select_cheapest", "payload": {"all_matching": True}},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.json()["updated_count"] == 2
+    quotes = client.post(
+        "/api/v1/shipping/quote/", {"import_id": str(job.id)}, format="json"
+    ).json()["results"]
+    for shipment, result in zip((light, heavy), quotes, strict=False):
+        shipment.refresh_from_db()
+        cheapest = min(result["quotes"], key=lambda quote: quote["price_cents"])
+        assert shipment.selected_service == cheapest["service"]
+        assert shipment.selected_service_price_cents == cheapest["price_cents"]
+    assert light.selected_service_price_cents < heavy.selected_service_price_cents
+    incomplete.refresh_from_db()
+    assert incomplete.selected_service == ""
+
+
+@pytest.mark.django_db
+def test_bulk_auto_select_cheapest_fails_when_a_carrier_is_down(monkeypatch):
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    shipment = Shipment.objects.create(
+        import_job=job,
+        row_number=1,
+        weight_oz=4,
+        from_postal_code="91773",
+        to_postal_code="10001",
+        validation_status=Shipment.ValidationStatus.READY,
+    )
+    request = {"action": "auto_select_cheapest", "payload": {"all_matching": True}}
+    url = f"/api/v1/imports/{job.id}/shipments/bulk/"
+    assert client.post(url, request, format="json").status_code == 200
+    shipment.refresh_from_db()
+    selected = (shipment.selected_service, shipment.selected_service_price_cents)
+
+    def fail(*_args):
+        raise CarrierError("carrier down", retryable=True)
+
+    monkeypatch.setattr(shipping_services, "_price", fail)
+    # The stored quotes are for the old weight, so they must not be used.
+    Shipment.objects.filter(id=shipment.id).update(weight_oz=80)
+    response = client.post(url, request, format="json")
+
+    assert response.status_code == 503
+    assert response.json()["error"]["code"] == "CARRIER_UNAVAILABLE"
+    shipment.refresh_from_db()
+    assert (
+        shipment.selected_service,
+        shipment.selected_service_price_cents,
+    ) == selected
@@ -6,6 +6,7 @@ from shipments.views import (
     SavedAddressPresetViewSet,
     SavedPackagePresetViewSet,
     ShipmentDetailView,
+    ShipmentLabelView,
 )
 
 router = DefaultRouter()
@@ -19,5 +20,10 @@ router.register(
 urlpatterns = [
     path("imports/<uuid:import_id>/shipments/", ImportShipmentListView.as_view()),
     path("shipments/<uuid:pk>/", ShipmentDetailView.as_view()),
+    path(
+        "shipments/<uuid:pk>/label/",
+        ShipmentLabelView.as_view(),
+        name="shipment_label",
+    ),
     path("", include(router.urls)),
 ]
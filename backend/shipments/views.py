@@ -1,5 +1,10 @@
+import math
+
 import structlog
-from django.db.models import Q
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import status, viewsets
 from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView
@@ -7,8 +12,18 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from addresses.tasks import verify_shipments_task
+from addresses.services.canonical import address_key
+from addresses.services.presets import (
+    find_verified_preset,
+    preset_address,
+    preset_outcome,
+)
+from addresses.services.verify import address_from_shipment
+from addresses.services.work_queue import request_verification
+from addresses.tasks import drain_verification_queue_task, verify_address_preset_task
 from imports.serializers import ImportBulkResponseSerializer
+from shipments.labels.render import get_template
+from shipments.labels.store import get_label_store
 from shipments.models import SavedAddressPreset, SavedPackagePreset, Shipment
 from shipments.serializers import (
     SavedAddressPresetSerializer,
@@ -16,7 +31,11 @@ from shipments.serializers import (
     ShipmentSerializer,
     ShipmentUpdateSerializer,
 )
+from shipments.services.counters import counting
+from shipments.services.suggestions import accept_suggested_addresses
 from shipments.services.validation import validate_shipment
+from shipping.carriers.base import CarrierError
+from shipping.services import materialize_quotes, select_cheapest_services
 
 logger = structlog.get_logger(__name__)
 
@@ -60,13 +79,14 @@ class ShipmentDetailView(RetrieveUpdateDestroyAPIView):
         return ShipmentSerializer
 
     def perform_update(self, serializer):
+        with counting(Shipment.objects.filter(pk=serializer.instance.pk)):
+            shipment = self._save(serializer)
+        materialize_quotes(Shipment.objects.filter(pk=shipment.pk))
+
+    def _save(self, serializer) -> Shipment:
         shipment = serializer.save()
         if any(field.startswith("from_") for field in serializer.validated_data.keys()):
-            shipment.from_address_is_preset = False
-            shipment.from_address_verification_status = (
-                Shipment.AddressVerificationStatus.NOT_STARTED
-            )
-            shipment.from_address_verification_details = {}
+            reset_from_verification(shipment)
         result = validate_shipment(shipment)
         shipment.validation_status = result["status"]
         shipment.validation_errors = result["errors"]
@@ -79,6 +99,72 @@ class ShipmentDetailView(RetrieveUpdateDestroyAPIView):
                 "validation_errors",
             ]
         )
+        return shipment
+
+    def perform_destroy(self, instance):
+        with counting(Shipment.objects.filter(pk=instance.pk)):
+            instance.delete()
+
+
+def reset_from_verification(shipment: Shipment, presets: dict | None = None) -> None:
+    """Mark an edited from-address as unverified, or as verified if it
+    matches a verified preset. ``presets`` memoizes preset lookups by address
+    key across a batch of shipments."""
+    shipment.from_address_is_preset = False
+    address = address_from_shipment(shipment, "from")
+    if presets is None:
+        preset = find_verified_preset(address)
+    else:
+        key = address_key(address)
+        if key not in presets:
+            presets[key] = find_verified_preset(address)
+        preset = presets[key]
+    if preset is not None:
+        (
+            shipment.from_address_verification_status,
+            shipment.from_address_verification_details,
+        ) = preset_outcome(preset)
+    else:
+        shipment.from_address_verification_status = (
+            Shipment.AddressVerificationStatus.NOT_STARTED
+        )
+        shipment.from_address_verification_details = {}
+
+
+class ShipmentLabelView(APIView):
+    """The purchased label, delivered by the label store."""
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        responses={
+            (200, "application/octet-stream"): OpenApiTypes.BINARY,
+            302: OpenApiResponse(description="Redirect to the stored label"),
+            404: OpenApiResponse(description="No label purchased"),
+        }
+    )
+    def get(self, request, pk):
+        shipment = (
+            Shipment.objects.select_related("purchase_job")
+            .filter(pk=pk)
+            .exclude(label_key="")
+            .first()
+        )
+        if not shipment or not shipment.purchase_job:
+            return Response(
+                {"error": {"code": "NOT_FOUND", "message": "Label not found"}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        template = get_template(
+            shipment.purchase_job.file_format, shipment.purchase_job.label_format
+        )
+        return get_label_store().response(
+            request,
+            shipment.label_key,
+            template.content_type,
+            f"label-{shipment.row_number}.{template.extension}",
+        )
 
 
 class ImportShipmentBulkView(APIView):
@@ -86,6 +172,7 @@ class ImportShipmentBulkView(APIView):
         responses={
             200: OpenApiResponse(response=ImportBulkResponseSerializer),
             400: OpenApiResponse(description="Invalid bulk action"),
+            503: OpenApiResponse(description="A carrier could not be reached"),
         }
     )
     def post(self, request, import_id):
@@ -124,28 +211,28 @@ class ImportShipmentBulkView(APIView):
                     "from_postal_code": preset.postal_code,
                     "from_country": preset.country,
                     "from_address_is_preset": True,
-                    "from_address_verification_status": (
-                        Shipment.AddressVerificationStatus.NOT_STARTED
-                    ),
-                    "from_address_verification_details": {},
                 }
+                (
+                    update_data["from_address_verification_status"],
+                    update_data["from_address_verification_details"],
+                ) = preset_outcome(preset)
             else:
                 update_data = dict(payload)
-                update_data["from_address_is_preset"] = False
-                update_data["from_address_verification_status"] = (
-                    Shipment.AddressVerificationStatus.NOT_STARTED
-                )
-                update_data["from_address_verification_details"] = {}
-
-            for shipment in shipments:
-                for key, value in update_data.items():
-                    if hasattr(shipment, key):
-                        setattr(shipment, key, value)
-                result = validate_shipment(shipment)
-                shipment.validation_status = result["status"]
-                shipment.validation_errors = result["errors"]
-                shipment.save()
-                updated_count += 1
+
+            matched_presets: dict = {}
+            with counting(shipments):
+                for shipment in shipments:
+                    for key, value in update_data.items():
+                        if hasattr(shipment, key):
+                            setattr(shipment, key, value)
+                    if not preset_id:
+                        reset_from_verification(shipment, matched_presets)
+                    result = validate_shipment(shipment)
+                    shipment.validation_status = result["status"]
+                    shipment.validation_errors = result["errors"]
+                    shipment.save()
+                    updated_count += 1
+            materialize_quotes(shipments)
 
         elif action == "apply_saved_package":
             preset_id = payload.get("preset_id")
@@ -170,19 +257,22 @@ class ImportShipmentBulkView(APIView):
             else:
                 update_data = payload
 
-            for shipment in shipments:
-                for key, value in update_data.items():
-                    if hasattr(shipment, key):
-                        setattr(shipment, key, value)
-                result = validate_shipment(shipment)
-                shipment.validation_status = result["status"]
-                shipment.validation_errors = result["errors"]
-                shipment.save()
-                updated_count += 1
+            with counting(shipments):
+                for shipment in shipments:
+                    for key, value in update_data.items():
+                        if hasattr(shipment, key):
+                            setattr(shipment, key, value)
+                    result = validate_shipment(shipment)
+                    shipment.validation_status = result["status"]
+                    shipment.validation_errors = result["errors"]
+                    shipment.save()
+                    updated_count += 1
+            materialize_quotes(shipments)
 
         elif action == "delete":
             deleted_count = shipments.count()
-            shipments.delete()
+            with counting(shipments):
+                shipments.delete()
 
         elif action == "set_shipping_service":
             service = payload.get("service")
@@ -197,13 +287,52 @@ class ImportShipmentBulkView(APIView):
                     },
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            updated_count = shipments.update(
-                selected_service=service, selected_service_price_cents=price_cents
-            )
+            with counting(shipments):
+                updated_count = shipments.update(
+                    selected_service=service,
+                    selected_service_price_cents=price_cents,
+                    version=F("version") + 1,
+                )
+
+        elif action == "auto_select_cheapest":
+            if payload.get("all_matching"):
+                shipments = Shipment.objects.filter(import_job_id=import_id)
+            try:
+                materialize_quotes(shipments, strict=True)
+            except CarrierError as exc:
+                return Response(
+                    {"error": {"code": "CARRIER_UNAVAILABLE", "message": str(exc)}},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+            with counting(shipments):
+                updated_count = select_cheapest_services(shipments)
+
+        elif action == "accept_suggested_address":
+            address_type = payload.get("address_type", "to")
+            if address_type not in {"to", "from"}:
+                return Response(
+                    {
+                        "error": {
+                            "code": "INVALID_ADDRESS_TYPE",
+                            "message": "address_type must be 'to' or 'from'",
+                        }
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if payload.get("all_matching"):
+                shipments = Shipment.objects.filter(import_job_id=import_id)
+            with counting(shipments):
+                updated_count = accept_suggested_addresses(shipments, address_type)
 
         elif action == "verify_addresses":
-            verify_shipments_task.delay([str(s.id) for s in shipments])
-            updated_count = shipments.count()
+            updated_count = request_verification(shipments)
+            batch_size = settings.ADDRESS_VERIFY_QUEUE_BATCH_SIZE
+            workers = min(
+                settings.ADDRESS_VERIFY_QUEUE_WORKERS,
+                math.ceil(updated_count / batch_size),
+            )
+            for _ in range(workers):
+                drain_verification_queue_task.delay(import_job_id=str(import_id))
 
         else:
             errors.append({"code": "INVALID_ACTION", "message": "Unsupported action"})
@@ -221,6 +350,27 @@ class SavedAddressPresetViewSet(viewsets.ModelViewSet):
     queryset = SavedAddressPreset.objects.all()
     serializer_class = SavedAddressPresetSerializer
 
+    def perform_create(self, serializer):
+        self._reverify(serializer.save())
+
+    def perform_update(self, serializer):
+        self._reverify(serializer.save())
+
+    def _reverify(self, preset):
+        preset.address_key = address_key(preset_address(preset))
+        preset.verification_status = Shipment.AddressVerificationStatus.NOT_STARTED
+        preset.verification_details = {}
+        preset.verified_at = None
+        preset.save(
+            update_fields=[
+                "address_key",
+                "verification_status",
+                "verification_details",
+                "verified_at",
+            ]
+        )
+        transaction.on_commit(lambda: verify_address_preset_task.delay(str(preset.id)))
+
 
 class SavedPackagePresetViewSet(viewsets.ModelViewSet):
     queryset = SavedPackagePreset.objects.all()
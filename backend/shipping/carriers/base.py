@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol
+
+
+@dataclass(frozen=True)
+class RateService:
+    code: str
+    name: str
+
+
+@dataclass(frozen=True)
+class RateRequest:
+    origin_zip3: str
+    dest_zip3: str
+    # Billable weight for ``service``, in hundredths of an ounce.
+    weight_hundredths: int
+    service: str
+
+    @property
+    def weight_oz(self) -> str:
+        return f"{self.weight_hundredths // 100}.{self.weight_hundredths % 100:02d}"
+
+    @property
+    def key(self) -> str:
+        return "|".join(
+            (self.origin_zip3, self.dest_zip3, self.weight_oz, self.service)
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "origin_zip3": self.origin_zip3,
+            "dest_zip3": self.dest_zip3,
+            "weight_oz": self.weight_oz,
+            "service": self.service,
+        }
+
+
+class CarrierError(Exception):
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CarrierProvider(Protocol):
+    name: str
+    # Part of the quote fingerprint; changes when the carrier's rates do.
+    version: str
+    max_batch_size: int
+    # Whether responses go through the CarrierRate cache.
+    cacheable: bool
+
+    def services(self) -> tuple[RateService, ...]:
+        raise NotImplementedError
+
+    async def rate_many(self, requests: list[RateRequest]) -> list[int | None]:
+        """Price in cents per request, ``None`` where the service isn't offered."""
+        raise NotImplementedError
@@ -0,0 +1,111 @@
+"""Carriers rated over HTTP in batches.
+
+The wire protocol (also served by ``stub.py``)::
+
+    GET  {base_url}/services  -> {"version": "...",
+                                  "services": [{"code": "...", "name": "..."}]}
+    POST {base_url}/rates     {"requests": [{"origin_zip3", "dest_zip3",
+                                             "weight_oz", "service"}, ...]}
+                              -> {"rates": [price_cents | null, ...]}
+
+``rates`` are in request order. A quoting pass sends its batches through
+one pooled client opened by ``session``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from functools import partial
+
+import httpx
+
+from shipping.carriers.base import CarrierError, RateRequest, RateService
+
+
+class HttpCarrier:
+    cacheable = True
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        max_batch_size: int = 500,
+        timeout: float = 10.0,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._catalog: dict | None = None
+
+    def _get_catalog(self) -> dict:
+        if self._catalog is None:
+            try:
+                response = httpx.get(f"{self.base_url}/services", timeout=self.timeout)
+            except httpx.RequestError as exc:
+                raise CarrierError(
+                    f"{self.name} request error", retryable=True
+                ) from exc
+            self._catalog = _json(self.name, response)
+        return self._catalog
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}@{self._get_catalog().get('version', 'live')}"
+
+    def services(self) -> tuple[RateService, ...]:
+        return tuple(
+            RateService(code=service["code"], name=service["name"])
+            for service in self._get_catalog()["services"]
+        )
+
+    async def rate_many(self, requests: list[RateRequest]) -> list[int | None]:
+        async with self.session() as rate_many:
+            return await rate_many(requests)
+
+    @asynccontextmanager
+    async def session(
+        self,
+    ) -> AsyncIterator[Callable[[list[RateRequest]], Awaitable[list[int | None]]]]:
+        """``rate_many`` over one pooled client, for the batches of a pass."""
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            yield partial(self._rate_many, client)
+
+    async def _rate_many(
+        self, client: httpx.AsyncClient, requests: list[RateRequest]
+    ) -> list[int | None]:
+        payload = {"requests": [request.as_dict() for request in requests]}
+        try:
+            response = await client.post(f"{self.base_url}/rates", json=payload)
+        except httpx.TimeoutException as exc:
+            raise CarrierError(f"{self.name} timeout", retryable=True) from exc
+        except httpx.RequestError as exc:
+            raise CarrierError(f"{self.name} request error", retryable=True) from exc
+
+        rates = _json(self.name, response).get("rates", [])
+        if not isinstance(rates, list):
+            raise CarrierError(f"{self.name} returned an unexpected response")
+        if len(rates) != len(requests):
+            raise CarrierError(f"{self.name} returned {len(rates)} rates")
+        return rates
+
+
+def _json(name: str, response: httpx.Response) -> dict:
+    _raise_for_status(name, response)
+    try:
+        body = response.json()
+    except ValueError as exc:
+        raise CarrierError(f"{name} returned invalid JSON", retryable=True) from exc
+    if not isinstance(body, dict):
+        raise CarrierError(f"{name} returned an unexpected response")
+    return body
+
+
+def _raise_for_status(name: str, response: httpx.Response) -> None:
+    if response.status_code == 429 or response.status_code >= 500:
+        raise CarrierError(
+            f"{name} service unavailable ({response.status_code})", retryable=True
+        )
+    if response.status_code >= 400:
+        raise CarrierError(f"{name} request rejected ({response.status_code})")
@@ -0,0 +1,149 @@
+"""Local stub carrier for tests and benchmarks.
+
+Serves the ``http.py`` protocol from the compiled rate tables, with optional
+synthetic latency per call, and counts the batches it receives::
+
+    with StubCarrierServer(latency_ms=50) as server:
+        settings.SHIPPING_CARRIERS = ["stub"]
+        settings.SHIPPING_STUB_CARRIER_URL = server.url
+
+or run it standalone with ``manage.py run_stub_carrier``.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from shipping.carriers.base import RateRequest
+from shipping.carriers.table import TableCarrier
+from shipping.services.billable import hundredths
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+
+    def do_GET(self):
+        if self.path != "/services":
+            self._reply(404, {"error": "not found"})
+            return
+        carrier = self.server.carrier
+        with self.server.lock:
+            self.server.catalogs += 1
+        self._reply(
+            200,
+            {
+                "version": carrier.version,
+                "services": [
+                    {"code": service.code, "name": service.name}
+                    for service in carrier.services()
+                ],
+            },
+        )
+
+    def do_POST(self):
+        if self.path != "/rates":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        items = json.loads(self.rfile.read(length) or b"{}").get("requests", [])
+        if len(items) > self.server.max_batch_size:
+            self._reply(413, {"error": "batch too large"})
+            return
+        requests = [
+            RateRequest(
+                origin_zip3=item["origin_zip3"],
+                dest_zip3=item["dest_zip3"],
+                weight_hundredths=hundredths(item["weight_oz"]),
+                service=item["service"],
+            )
+            for item in items
+        ]
+        with self.server.lock:
+            self.server.batches += 1
+            self.server.requests += len(requests)
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+        self._reply(200, {"rates": self.server.carrier.price_requests(requests)})
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, carrier, latency_ms, max_batch_size):
+        super().__init__(address, _Handler)
+        self.carrier = carrier
+        self.latency_ms = latency_ms
+        self.max_batch_size = max_batch_size
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.catalogs = 0
+
+
+class StubCarrierServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: int = 0,
+        max_batch_size: int = 1000,
+        carrier: TableCarrier | None = None,
+    ):
+        self._server = _Server(
+            (host, port),
+            carrier or TableCarrier.from_settings(),
+            latency_ms,
+            max_batch_size,
+        )
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def batches(self) -> int:
+        return self._server.batches
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    @property
+    def catalogs(self) -> int:
+        return self._server.catalogs
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> StubCarrierServer:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> StubCarrierServer:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
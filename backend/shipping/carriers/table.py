@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from django.conf import settings
+
+from shipping.carriers.base import RateRequest, RateService
+from shipping.services.rate_table import (
+    RateTable,
+    ZoneChart,
+    get_rate_table,
+    get_zone_chart,
+)
+
+# Flat per-ounce pricing used when no compiled rate card is configured.
+FLAT_SERVICES = [
+    {"code": "priority_mail", "name": "Priority Mail", "base_cents": 500, "per_oz": 10},
+    {
+        "code": "ground_shipping",
+        "name": "Ground Shipping",
+        "base_cents": 250,
+        "per_oz": 5,
+    },
+]
+
+FLAT_BY_CODE = {service["code"]: service for service in FLAT_SERVICES}
+
+
+class TableCarrier:
+    """Prices from the compiled zone/weight rate tables, in process.
+
+    Besides ``rate_many`` it offers ``price_column``, which ``price_columns``
+    uses to price whole columns without building per-row requests.
+    """
+
+    name = "table"
+    max_batch_size = 100_000
+    cacheable = False
+
+    def __init__(
+        self, table: RateTable | None, chart: ZoneChart | None, default_zone: int
+    ):
+        self.table = table
+        self.chart = chart
+        self.default_zone = default_zone
+        self._indexes = (
+            {service.code: i for i, service in enumerate(table.services)}
+            if table
+            else {}
+        )
+        self.version = (
+            ":".join(
+                (table.version, chart.version if chart else "-", str(default_zone))
+            )
+            if table
+            else "flat"
+        )
+
+    @classmethod
+    def from_settings(cls) -> TableCarrier:
+        return cls(get_rate_table(), get_zone_chart(), settings.SHIPPING_DEFAULT_ZONE)
+
+    def services(self) -> tuple[RateService, ...]:
+        if self.table is None:
+            return tuple(
+                RateService(code=service["code"], name=service["name"])
+                for service in FLAT_SERVICES
+            )
+        return self.table.services
+
+    def zone(self, origin_zip3: str, dest_zip3: str) -> int:
+        return (
+            self.chart.zone(origin_zip3, dest_zip3) if self.chart else None
+        ) or self.default_zone
+
+    def price_column(
+        self, service: str, lanes: list[tuple[str, str]], weights: list[int | None]
+    ) -> list[int | None]:
+        """Prices of ``service`` for columns of ZIP3 lanes and billable weights
+        (in hundredths of an ounce)."""
+        if self.table is None:
+            flat = FLAT_BY_CODE.get(service)
+            if flat is None:
+                return [None] * len(weights)
+            return [
+                flat["base_cents"] + flat["per_oz"] * weight // 100
+                if weight and weight > 0
+                else None
+                for weight in weights
+            ]
+
+        index = self._indexes.get(service)
+        if index is None:
+            return [None] * len(weights)
+        zones = {lane: self.zone(*lane) for lane in set(lanes)}
+        return self.table.price_column(index, [zones[lane] for lane in lanes], weights)
+
+    def price_requests(self, requests: list[RateRequest]) -> list[int | None]:
+        by_service: dict[str, list[int]] = {}
+        for position, request in enumerate(requests):
+            by_service.setdefault(request.service, []).append(position)
+        prices: list[int | None] = [None] * len(requests)
+        for service, positions in by_service.items():
+            column = self.price_column(
+                service,
+                [(requests[p].origin_zip3, requests[p].dest_zip3) for p in positions],
+                [requests[p].weight_hundredths for p in positions],
+            )
+            for position, price in zip(positions, column, strict=True):
+                prices[position] = price
+        return prices
+
+    async def rate_many(self, requests: list[RateRequest]) -> list[int | None]:
+        return self.price_requests(requests)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shipping.services.rate_table import (
+    build_rate_card,
+    build_zone_chart,
+    open_rate_table,
+    open_zone_chart,
+)
+from shipping.services.rating import configured_carriers
+
+
+class Command(BaseCommand):
+    help = "Compile the rate card and ZIP3 zone chart CSVs into lookup tables."
+
+    def add_arguments(self, parser):
+        data_dir = settings.BASE_DIR / "shipping" / "data"
+        parser.add_argument(
+            "--rate-card",
+            default=str(data_dir / "rate_card.csv"),
+            help="CSV with service,name,max_weight_oz,zone_1..zone_N columns",
+        )
+        parser.add_argument(
+            "--zone-chart",
+            default=str(data_dir / "zone_chart.csv"),
+            help="CSV with origin_zip3,dest_zip3_start,dest_zip3_end,zone columns",
+        )
+
+    def handle(self, *args, **options):
+        services = build_rate_card(
+            options["rate_card"], settings.SHIPPING_RATE_CARD_PATH
+        )
+        origins = build_zone_chart(
+            options["zone_chart"], settings.SHIPPING_ZONE_CHART_PATH
+        )
+        open_rate_table.cache_clear()
+        open_zone_chart.cache_clear()
+        configured_carriers.cache_clear()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {services} services to {settings.SHIPPING_RATE_CARD_PATH} "
+                f"and {origins} origin ZIP3s to {settings.SHIPPING_ZONE_CHART_PATH}"
+            )
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from shipping.carriers.stub import StubCarrierServer
+
+
+class Command(BaseCommand):
+    help = "Serve the compiled rate tables as a local HTTP carrier."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency-ms",
+            type=int,
+            default=0,
+            help="Synthetic delay added to every rate batch",
+        )
+        parser.add_argument("--max-batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        server = StubCarrierServer(
+            host=options["host"],
+            port=options["port"],
+            latency_ms=options["latency_ms"],
+            max_batch_size=options["max_batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stub carrier listening on {server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
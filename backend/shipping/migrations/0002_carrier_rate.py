@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shipping", "0001_package_quote"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CarrierRate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("carrier", models.CharField(max_length=50)),
+                ("rate_key", models.CharField(max_length=200)),
+                ("price_cents", models.IntegerField(blank=True, null=True)),
+                ("fetched_at", models.DateTimeField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("carrier", "rate_key"), name="uniq_carrier_rate_key"
+                    )
+                ],
+            },
+        ),
+    ]
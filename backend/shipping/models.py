@@ -1 +1,39 @@
-# Create your models here.
+from django.db import models
+
+
+class PackageQuote(models.Model):
+    """Quotes for one package fingerprint, shared by every matching shipment.
+
+    The fingerprint covers everything a quote depends on (rate table version,
+    weight, dimensions, origin and destination ZIP3), so a row never goes
+    stale; changed inputs simply map to a different fingerprint.
+    """
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    zone = models.PositiveSmallIntegerField(null=True, blank=True)
+    quotes = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.fingerprint
+
+
+class CarrierRate(models.Model):
+    """Cached carrier response for one (lane, billable weight, service)."""
+
+    carrier = models.CharField(max_length=50)
+    # "origin_zip3|dest_zip3|weight_oz|service", see RateRequest.key.
+    rate_key = models.CharField(max_length=200)
+    price_cents = models.IntegerField(null=True, blank=True)
+    fetched_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["carrier", "rate_key"], name="uniq_carrier_rate_key"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.carrier}:{self.rate_key}"
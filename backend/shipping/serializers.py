@@ -1,5 +1,11 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from shipments.services.validation import ZIP_RE
+
 
 class ShippingQuoteRequestSerializer(serializers.Serializer):
     import_id = serializers.UUIDField(required=False)
@@ -16,15 +22,132 @@ class ShippingQuoteRequestSerializer(serializers.Serializer):
 
 
 class ShippingQuoteItemSerializer(serializers.Serializer):
+    carrier = serializers.CharField()
     service = serializers.CharField()
     name = serializers.CharField()
     price_cents = serializers.IntegerField()
+    billable_weight_oz = serializers.DecimalField(max_digits=10, decimal_places=2)
+    surcharge_cents = serializers.IntegerField()
 
 
 class ShippingQuoteResponseSerializer(serializers.Serializer):
     shipment_id = serializers.UUIDField()
+    zone = serializers.IntegerField(allow_null=True)
     quotes = ShippingQuoteItemSerializer(many=True)
 
 
 class ShippingQuoteListResponseSerializer(serializers.Serializer):
     results = ShippingQuoteResponseSerializer(many=True)
+
+
+# Largest weight (oz) or dimension (in) accepted by the rate endpoint; bounds
+# the integer arithmetic of billable weights.
+MAX_MEASURE = 10**6
+
+
+def _is_measure(value) -> bool:
+    """Whether ``value`` is a number in ``(0, MAX_MEASURE]``."""
+    if type(value) in (int, float):
+        return 0 < value <= MAX_MEASURE
+    if not isinstance(value, str):
+        return False
+    try:
+        return 0 < Decimal(value) <= MAX_MEASURE
+    except InvalidOperation:
+        return False
+
+
+@extend_schema_field(
+    {
+        "oneOf": [
+            {"type": "array", "items": {"type": ["string", "number", "null"]}},
+            {"type": ["string", "number", "null"]},
+        ]
+    }
+)
+class ColumnField(serializers.Field):
+    """A column of values, or one value for every row.
+
+    Items are checked in bulk rather than through a child field, as columns
+    can be very long but hold few distinct values, and each distinct value
+    is checked once. ``"postal_code"`` columns hold ZIP codes and
+    ``"measure"`` columns positive numbers up to ``MAX_MEASURE``, or null.
+    """
+
+    messages = {
+        "postal_code": "Expected a ZIP code or a list of them.",
+        "measure": f"Expected a number in (0, {MAX_MEASURE}] or a list of them.",
+    }
+
+    def __init__(self, kind: str, **kwargs):
+        self.kind = kind
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        values = data if isinstance(data, list) else [data]
+        try:
+            distinct = set(values)
+        except TypeError:
+            raise serializers.ValidationError(self.messages[self.kind]) from None
+        if self.kind == "postal_code":
+            valid = all(
+                isinstance(value, str) and ZIP_RE.match(value.strip())
+                for value in distinct
+            )
+        else:
+            valid = all(value is None or _is_measure(value) for value in distinct)
+        if not valid:
+            raise serializers.ValidationError(self.messages[self.kind])
+        return data
+
+    def to_representation(self, value):
+        return value
+
+
+class ShippingRateRequestSerializer(serializers.Serializer):
+    from_postal_code = ColumnField("postal_code")
+    to_postal_code = ColumnField("postal_code")
+    weight_oz = ColumnField("measure")
+    length_in = ColumnField("measure", required=False, default=None)
+    width_in = ColumnField("measure", required=False, default=None)
+    height_in = ColumnField("measure", required=False, default=None)
+
+    def validate(self, attrs):
+        lengths = {len(value) for value in attrs.values() if isinstance(value, list)}
+        if len(lengths) > 1:
+            raise serializers.ValidationError("All columns must have the same length.")
+        count = lengths.pop() if lengths else 1
+        if not 1 <= count <= settings.SHIPPING_RATE_MAX_PACKAGES:
+            raise serializers.ValidationError(
+                f"Between 1 and {settings.SHIPPING_RATE_MAX_PACKAGES} packages "
+                "are allowed."
+            )
+        columns = {
+            name: value if isinstance(value, list) else [value] * count
+            for name, value in attrs.items()
+        }
+        sizes = zip(
+            columns["length_in"], columns["width_in"], columns["height_in"], strict=True
+        )
+        if any(None in size and size != (None, None, None) for size in sizes):
+            raise serializers.ValidationError(
+                "Give length_in, width_in and height_in for a package, or none of them."
+            )
+        return columns
+
+
+class ShippingRateServiceSerializer(serializers.Serializer):
+    carrier = serializers.CharField()
+    service = serializers.CharField()
+    name = serializers.CharField()
+    price_cents = serializers.ListField(child=serializers.IntegerField(allow_null=True))  # type: ignore[assignment]
+    billable_weight_oz = serializers.ListField(
+        child=serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    )  # type: ignore[assignment]
+    surcharge_cents = serializers.ListField(child=serializers.IntegerField())  # type: ignore[assignment]
+
+
+class ShippingRateResponseSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    zone = serializers.ListField(child=serializers.IntegerField(allow_null=True))  # type: ignore[assignment]
+    services = ShippingRateServiceSerializer(many=True)
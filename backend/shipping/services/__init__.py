@@ -0,0 +1,365 @@
+import hashlib
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import islice
+
+import structlog
+from django.conf import settings
+from django.db.models import Case, CharField, F, IntegerField, Value, When
+
+from shipments.models import Shipment
+from shipping.carriers.base import CarrierError, RateRequest
+from shipping.models import PackageQuote
+from shipping.services.billable import (
+    RULES_VERSION,
+    PackageColumns,
+    billable_weights,
+    format_hundredths,
+    oversize_surcharges,
+    package_columns,
+    service_rules,
+)
+from shipping.services.rate_table import get_zone_chart
+from shipping.services.rating import get_carriers, rate
+
+logger = structlog.get_logger(__name__)
+
+QUOTE_FIELDS = (
+    "id",
+    "from_postal_code",
+    "to_postal_code",
+    "weight_oz",
+    "length_in",
+    "width_in",
+    "height_in",
+    "quote_fingerprint",
+)
+
+
+def rates_version(carriers: list | None = None) -> str:
+    """Identify the pricing inputs, so new rates mean new fingerprints."""
+    carriers = get_carriers() if carriers is None else carriers
+    return ":".join(
+        (
+            *(carrier.version for carrier in carriers),
+            RULES_VERSION,
+            str(settings.SHIPPING_DEFAULT_ZONE),
+        )
+    )
+
+
+def _normalized(value) -> str:
+    return "" if value is None else str(Decimal(str(value)).normalize())
+
+
+def package_fingerprint(
+    version: str,
+    from_postal_code: str,
+    to_postal_code: str,
+    weight_oz,
+    length_in,
+    width_in,
+    height_in,
+) -> str:
+    """Hash of everything a quote depends on; zones only use the ZIP3."""
+    raw = "|".join(
+        (
+            version,
+            str(from_postal_code or "").strip()[:3],
+            str(to_postal_code or "").strip()[:3],
+            _normalized(weight_oz),
+            _normalized(length_in),
+            _normalized(width_in),
+            _normalized(height_in),
+        )
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _zip3(postal_code) -> str:
+    return str(postal_code or "").strip()[:3]
+
+
+@dataclass
+class ServicePrices:
+    """One carrier service priced across a column of packages."""
+
+    carrier: str
+    service: str
+    name: str
+    # Including surcharges; None where the service isn't offered.
+    price_cents: list[int | None]
+    billable_weight_oz: list[str | None]
+    surcharge_cents: list[int]
+
+
+def _rate_columns(
+    carrier, services: list, lanes: list, weights: list, use_cache: bool
+) -> list[list[int | None]]:
+    """Price columns through one batched ``rating.rate`` call.
+
+    Rows of any service that share a lane and billable weight share one
+    request.
+    """
+    positions: dict[tuple, int] = {}
+    requests: list[RateRequest] = []
+    columns = []
+    for service, service_weights in zip(services, weights, strict=True):
+        column = []
+        for lane, weight in zip(lanes, service_weights, strict=True):
+            if not weight or weight <= 0:
+                column.append(None)
+                continue
+            key = (lane, weight, service.code)
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(requests)
+                requests.append(RateRequest(*lane, weight, service.code))
+            column.append(position)
+        columns.append(column)
+
+    prices = rate(carrier, requests, use_cache=use_cache)
+    return [
+        [None if position is None else prices[position] for position in column]
+        for column in columns
+    ]
+
+
+def price_columns(
+    from_postal_codes: list,
+    to_postal_codes: list,
+    packages: PackageColumns,
+    carriers: list | None = None,
+    use_cache: bool = True,
+) -> tuple[list[int | None], list[ServicePrices]]:
+    """Zones and per-service prices for columns of packages.
+
+    Each service is rated at its billable weight, plus oversize surcharges
+    (see ``billable.py``). In-process carriers price whole columns; remote
+    ones get one batched ``rating.rate`` call per pass. Zones come from the
+    ZIP3 zone chart (``SHIPPING_DEFAULT_ZONE`` for lanes it doesn't cover).
+    """
+    carriers = get_carriers() if carriers is None else carriers
+    zip3s = {
+        postal_code: _zip3(postal_code)
+        for postal_code in {*from_postal_codes, *to_postal_codes}
+    }
+    lanes = [
+        (zip3s[origin], zip3s[dest])
+        for origin, dest in zip(from_postal_codes, to_postal_codes, strict=True)
+    ]
+    chart = get_zone_chart()
+    lane_zones: dict[tuple[str, str], int | None] = {}
+    for lane in set(lanes):
+        lane_zones[lane] = (
+            (chart.zone(*lane) or settings.SHIPPING_DEFAULT_ZONE) if chart else None
+        )
+    zones = [lane_zones[lane] for lane in lanes]
+
+    priced = []
+    for carrier in carriers:
+        services = [
+            (service, service_rules(service.code)) for service in carrier.services()
+        ]
+        weights = [billable_weights(rules, packages) for _, rules in services]
+        if hasattr(carrier, "price_column"):
+            prices = [
+                carrier.price_column(service.code, lanes, column)
+                for (service, _), column in zip(services, weights, strict=True)
+            ]
+        else:
+            prices = _rate_columns(
+                carrier, [service for service, _ in services], lanes, weights, use_cache
+            )
+
+        for (service, rules), service_weights, service_prices in zip(
+            services, weights, prices, strict=True
+        ):
+            surcharges = oversize_surcharges(rules, packages)
+            labels = {
+                weight: format_hundredths(weight)
+                for weight in set(service_weights)
+                if weight
+            }
+            priced.append(
+                ServicePrices(
+                    carrier=carrier.name,
+                    service=service.code,
+                    name=service.name,
+                    price_cents=[
+                        None if price is None else price + surcharge
+                        for price, surcharge in zip(
+                            service_prices, surcharges, strict=True
+                        )
+                    ],
+                    billable_weight_oz=[
+                        None if price is None else labels[weight]
+                        for price, weight in zip(
+                            service_prices, service_weights, strict=True
+                        )
+                    ],
+                    surcharge_cents=surcharges,
+                )
+            )
+    return zones, priced
+
+
+def _price(
+    rows: list[tuple], carriers: list | None = None
+) -> list[tuple[int | None, list[dict]]]:
+    """Price ``QUOTE_FIELDS`` rows, as ``(zone, quotes)`` per row."""
+    zones, priced = price_columns(
+        [row[1] for row in rows],
+        [row[2] for row in rows],
+        package_columns([row[3:7] for row in rows]),
+        carriers,
+    )
+    results: list[list[dict]] = [[] for _ in rows]
+    for column in priced:
+        for quotes, price, weight_oz, surcharge in zip(
+            results,
+            column.price_cents,
+            column.billable_weight_oz,
+            column.surcharge_cents,
+            strict=True,
+        ):
+            if price is not None:
+                quotes.append(
+                    {
+                        "carrier": column.carrier,
+                        "service": column.service,
+                        "name": column.name,
+                        "price_cents": price,
+                        "billable_weight_oz": weight_oz,
+                        "surcharge_cents": surcharge,
+                    }
+                )
+    return list(zip(zones, results, strict=True))
+
+
+def quote_rows(rows: list[tuple]) -> list[dict]:
+    """Materialized quotes for ``QUOTE_FIELDS`` rows.
+
+    Quotes are read from ``PackageQuote`` by fingerprint. Fingerprints with
+    no stored quotes are priced once and stored, and shipments whose stored
+    fingerprint is out of date are relinked, so later reads are lookups.
+    """
+    carriers = get_carriers()
+    version = rates_version(carriers)
+    fingerprints = [package_fingerprint(version, *row[1:7]) for row in rows]
+    stored = {
+        package.fingerprint: package
+        for package in PackageQuote.objects.filter(fingerprint__in=set(fingerprints))
+    }
+
+    missing = {}
+    for fingerprint, row in zip(fingerprints, rows, strict=True):
+        if fingerprint not in stored:
+            missing.setdefault(fingerprint, row)
+    if missing:
+        created = [
+            PackageQuote(fingerprint=fingerprint, zone=zone, quotes=quotes)
+            for fingerprint, (zone, quotes) in zip(
+                missing, _price(list(missing.values()), carriers), strict=True
+            )
+        ]
+        PackageQuote.objects.bulk_create(created, ignore_conflicts=True)
+        stored.update((package.fingerprint, package) for package in created)
+
+    relinked = [
+        Shipment(id=row[0], quote_fingerprint=fingerprint)
+        for fingerprint, row in zip(fingerprints, rows, strict=True)
+        if row[7] != fingerprint
+    ]
+    if relinked:
+        Shipment.objects.bulk_update(relinked, ["quote_fingerprint"], batch_size=500)
+
+    return [
+        {
+            "shipment_id": str(row[0]),
+            "zone": stored[fingerprint].zone,
+            "quotes": stored[fingerprint].quotes,
+        }
+        for fingerprint, row in zip(fingerprints, rows, strict=True)
+    ]
+
+
+def materialize_quotes(queryset, chunk_size: int = 2000, strict: bool = False) -> int:
+    """Compute and store quotes for the READY shipments in ``queryset``.
+
+    Carrier failures are logged rather than raised, unless ``strict``;
+    whatever is left unquoted is priced when quotes are next read.
+    """
+    rows = (
+        queryset.filter(validation_status=Shipment.ValidationStatus.READY)
+        .values_list(*QUOTE_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    materialized = 0
+    while chunk := list(islice(rows, chunk_size)):
+        try:
+            quote_rows(chunk)
+        except CarrierError as exc:
+            logger.warning("shipping.materialize_failed", error=str(exc))
+            if strict:
+                raise
+            break
+        materialized += len(chunk)
+    return materialized
+
+
+def cheapest_quote(quotes: list[dict]) -> dict | None:
+    return min(quotes, key=lambda quote: quote["price_cents"], default=None)
+
+
+def select_cheapest_services(queryset, batch_size: int = 500) -> int:
+    """Set each READY shipment in ``queryset`` to its cheapest quoted service.
+
+    Shipments are updated by package fingerprint with ``Case``/``When`` over
+    the distinct (service, price) cells, so one UPDATE covers ``batch_size``
+    packages however many shipments share them. Shipments without a quote
+    are left unchanged. No carrier is called: materialize the quotes first,
+    outside any transaction that locks the shipments.
+    """
+    ready = queryset.filter(validation_status=Shipment.ValidationStatus.READY)
+    fingerprints = list(
+        ready.exclude(quote_fingerprint="")
+        .order_by()
+        .values_list("quote_fingerprint", flat=True)
+        .distinct()
+    )
+
+    updated = 0
+    for start in range(0, len(fingerprints), batch_size):
+        cells: dict[tuple[str, int], list[str]] = {}
+        for fingerprint, quotes in PackageQuote.objects.filter(
+            fingerprint__in=fingerprints[start : start + batch_size]
+        ).values_list("fingerprint", "quotes"):
+            cheapest = cheapest_quote(quotes)
+            if cheapest:
+                cells.setdefault(
+                    (cheapest["service"], cheapest["price_cents"]), []
+                ).append(fingerprint)
+        if not cells:
+            continue
+
+        updated += ready.filter(
+            quote_fingerprint__in=[fp for group in cells.values() for fp in group]
+        ).update(
+            selected_service=Case(
+                *(
+                    When(quote_fingerprint__in=group, then=Value(service))
+                    for (service, _), group in cells.items()
+                ),
+                output_field=CharField(),
+            ),
+            selected_service_price_cents=Case(
+                *(
+                    When(quote_fingerprint__in=group, then=Value(price_cents))
+                    for (_, price_cents), group in cells.items()
+                ),
+                output_field=IntegerField(),
+            ),
+            version=F("version") + 1,
+        )
+    return updated
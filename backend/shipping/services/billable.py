@@ -0,0 +1,180 @@
+"""Billable weight and oversize surcharges.
+
+Carriers bill the greater of the actual weight and the dimensional weight
+(``length x width x height / divisor``, rounded up to whole pounds), and add
+flat fees for packages over their size limits. Both depend only on the
+package, so they are computed a column at a time over the packages being
+quoted, once per service.
+
+Weights and lengths are integer hundredths (of an ounce, of an inch), which
+is exact for the two-decimal model fields and much cheaper than ``Decimal``;
+volumes are therefore in millionths of a cubic inch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass, field
+from decimal import ROUND_CEILING, Decimal
+from functools import cached_property
+
+OUNCES_PER_POUND = 16
+# Integer units per inch / ounce (``length``, ``length_girth``, ``weight``)
+# and per cubic inch (``volume``).
+SCALE = {"weight": 100, "length": 100, "length_girth": 100, "volume": 100**3}
+
+
+@dataclass(frozen=True)
+class Surcharge:
+    """Flat fee for the highest tier ``measure`` exceeds.
+
+    ``measure`` is a ``PackageColumns`` column; ``tiers`` are
+    ``(over, cents)`` pairs in ascending order.
+    """
+
+    code: str
+    measure: str
+    tiers: tuple[tuple[Decimal, int], ...]
+
+    @cached_property
+    def scaled_tiers(self) -> tuple[tuple[int, int], ...]:
+        scale = SCALE[self.measure]
+        return tuple((int(over * scale), cents) for over, cents in self.tiers)
+
+    def fee(self, value: int | None) -> int:
+        """Fee for ``value`` in ``SCALE`` units."""
+        if value is None:
+            return 0
+        for over, cents in reversed(self.scaled_tiers):
+            if value > over:
+                return cents
+        return 0
+
+
+@dataclass(frozen=True)
+class ServiceRules:
+    # Cubic inches per pound.
+    dim_divisor: int
+    # Dimensional weight only applies to packages larger than this.
+    dim_min_volume: Decimal = Decimal(0)
+    surcharges: tuple[Surcharge, ...] = field(default_factory=tuple)
+
+
+DEFAULT_RULES = ServiceRules(dim_divisor=139)
+SERVICE_RULES = {
+    "priority_mail": ServiceRules(
+        dim_divisor=166,
+        dim_min_volume=Decimal(1728),
+        surcharges=(
+            Surcharge(
+                "nonstandard_length",
+                "length",
+                ((Decimal(22), 400), (Decimal(30), 1500)),
+            ),
+            Surcharge("nonstandard_volume", "volume", ((Decimal(3456), 1500),)),
+        ),
+    ),
+    "ground_shipping": ServiceRules(
+        dim_divisor=139,
+        surcharges=(
+            Surcharge("additional_handling", "length", ((Decimal(48), 2500),)),
+            Surcharge("large_package", "length_girth", ((Decimal(130), 9500),)),
+        ),
+    ),
+}
+# Part of the quote fingerprint, so stored quotes are repriced when rules change.
+_rules_repr = repr(sorted(SERVICE_RULES.items())).encode()
+RULES_VERSION = hashlib.sha1(_rules_repr).hexdigest()[:12]
+
+
+def service_rules(code: str) -> ServiceRules:
+    return SERVICE_RULES.get(code, DEFAULT_RULES)
+
+
+@dataclass(frozen=True)
+class PackageColumns:
+    weight: list[int | None]
+    volume: list[int | None]
+    length: list[int | None]
+    length_girth: list[int | None]
+
+
+def hundredths(value) -> int | None:
+    """``value`` in integer hundredths, rounded up past two decimals."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        # Absorbs float noise such as 1.1 * 100 == 110.00000000000001.
+        return math.ceil(value * 100 - 1e-6)
+    return int((Decimal(value) * 100).to_integral_value(ROUND_CEILING))
+
+
+def format_hundredths(value: int) -> str:
+    return f"{value // 100}.{value % 100:02d}"
+
+
+def package_columns(rows: list[tuple]) -> PackageColumns:
+    """Columns for ``(weight_oz, length_in, width_in, height_in)`` rows.
+
+    Size columns are ``None`` unless all three dimensions are known.
+    """
+    # Packages repeat the same few weights and sizes, so convert each once.
+    weights: dict = {}
+    sizes: dict = {}
+    weight, volume, length, length_girth = [], [], [], []
+    for weight_oz, *dims in rows:
+        converted = weights.get(weight_oz)
+        if converted is None:
+            converted = weights[weight_oz] = hundredths(weight_oz)
+        weight.append(converted)
+        dims = tuple(dims)
+        size = sizes.get(dims)
+        if size is None:
+            size = sizes[dims] = _size(dims)
+        volume.append(size[0])
+        length.append(size[1])
+        length_girth.append(size[2])
+    return PackageColumns(weight, volume, length, length_girth)
+
+
+def _size(dims: tuple) -> tuple[int | None, int | None, int | None]:
+    """``(volume, length, length_girth)`` of ``(length, width, height)``."""
+    if None in dims:
+        return None, None, None
+    longest, middle, shortest = sorted(map(hundredths, dims), reverse=True)
+    return (
+        longest * middle * shortest,
+        longest,
+        longest + 2 * (middle + shortest),
+    )
+
+
+def billable_weights(rules: ServiceRules, packages: PackageColumns) -> list[int | None]:
+    """Greater of actual and dimensional weight, in hundredths of an ounce."""
+    divisor = rules.dim_divisor * SCALE["volume"]
+    minimum = int(rules.dim_min_volume * SCALE["volume"])
+    pound = OUNCES_PER_POUND * SCALE["weight"]
+    return [
+        max(weight, -(-volume // divisor) * pound)
+        if weight and volume is not None and volume > minimum
+        else weight
+        for weight, volume in zip(packages.weight, packages.volume, strict=True)
+    ]
+
+
+def oversize_surcharges(rules: ServiceRules, packages: PackageColumns) -> list[int]:
+    totals = [0] * len(packages.weight)
+    for surcharge in rules.surcharges:
+        floor = surcharge.scaled_tiers[0][0]
+        totals = [
+            total + surcharge.fee(value)
+            if value is not None and value > floor
+            else total
+            for total, value in zip(
+                totals, getattr(packages, surcharge.measure), strict=True
+            )
+        ]
+    return totals
@@ -0,0 +1,226 @@
+"""Compiled zone/weight rate tables.
+
+Carrier rate cards and the ZIP3 zone chart are compiled into two read-only
+binary files that are memory-mapped, so every worker process shares the same
+pages and a quote is a handful of index calculations. Layouts (little
+endian)::
+
+    rate card  b"RATECRD1"  uint16 services  uint16 zones  uint16 breaks
+               uint16 pad   uint32 strings_offset
+               breaks   x uint32 max weight in 1/100 oz, ascending
+               services x zones x breaks x int32 price in cents (-1: none)
+               strings  uint16 length + UTF-8 "code|name" per service
+
+    zone chart b"ZONECHT1"  1000 x 1000 uint8 zone for [origin ZIP3][dest ZIP3]
+               (0: unknown)
+
+A shipment is priced at the first weight break at or above its weight, as
+carriers round up. Build both files with ``manage.py build_rate_tables``.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import math
+import mmap
+import struct
+from bisect import bisect_left
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from shipping.carriers.base import RateService
+
+RATE_MAGIC = b"RATECRD1"
+RATE_HEADER = struct.Struct("<8sHHHxxI")
+BREAK = struct.Struct("<I")
+LENGTH = struct.Struct("<H")
+ZONE_MAGIC = b"ZONECHT1"
+ZIP3_COUNT = 1000
+UNAVAILABLE = -1
+
+
+def _hundredths(weight_oz) -> int:
+    return math.ceil(Decimal(str(weight_oz)) * 100)
+
+
+class RateTable:
+    def __init__(self, path: Path | str):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, service_count, self.zone_count, break_count, strings_offset = (
+            RATE_HEADER.unpack_from(self._map, 0)
+        )
+        if magic != RATE_MAGIC:
+            raise ValueError(f"{path} is not a compiled rate card")
+        self.version = hashlib.sha1(self._map).hexdigest()[:12]
+
+        breaks_end = RATE_HEADER.size + break_count * BREAK.size
+        self.breaks = memoryview(self._map)[RATE_HEADER.size : breaks_end].cast("I")
+        self._prices = memoryview(self._map)[breaks_end:strings_offset].cast("i")
+        self._break_count = break_count
+        self._zone_stride = break_count
+        self._service_stride = self.zone_count * break_count
+
+        services = []
+        offset = strings_offset
+        for _ in range(service_count):
+            (length,) = LENGTH.unpack_from(self._map, offset)
+            offset += LENGTH.size
+            code, name = self._map[offset : offset + length].decode("utf-8").split("|")
+            offset += length
+            services.append(RateService(code=code, name=name))
+        self.services = tuple(services)
+
+    def _bucket(self, weight_hundredths: int | None) -> int | None:
+        if not weight_hundredths or weight_hundredths <= 0:
+            return None
+        index = bisect_left(self.breaks, weight_hundredths)
+        return index if index < self._break_count else None
+
+    def price(self, service_index: int, zone: int, bucket: int) -> int | None:
+        price = self._prices[
+            service_index * self._service_stride
+            + (zone - 1) * self._zone_stride
+            + bucket
+        ]
+        return None if price == UNAVAILABLE else price
+
+    def price_column(
+        self, service_index: int, zones: list[int], weights: list[int | None]
+    ) -> list[int | None]:
+        """Prices of one service for columns of zones and weights (in
+        hundredths of an ounce)."""
+        # Many weights share a break and many packages a cell, so look each
+        # distinct break and cell up once.
+        buckets = {weight: self._bucket(weight) for weight in set(weights)}
+        cells = list(zip(zones, map(buckets.__getitem__, weights), strict=True))
+        prices = {
+            (zone, bucket): self.price(service_index, zone, bucket)
+            if bucket is not None and 1 <= zone <= self.zone_count
+            else None
+            for zone, bucket in set(cells)
+        }
+        return list(map(prices.__getitem__, cells))
+
+
+class ZoneChart:
+    def __init__(self, path: Path | str):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(ZONE_MAGIC)] != ZONE_MAGIC:
+            raise ValueError(f"{path} is not a compiled zone chart")
+        self.version = hashlib.sha1(self._map).hexdigest()[:12]
+
+    def zone(self, origin_postal_code: str, dest_postal_code: str) -> int | None:
+        origin = _zip3(origin_postal_code)
+        dest = _zip3(dest_postal_code)
+        if origin is None or dest is None:
+            return None
+        return self._map[len(ZONE_MAGIC) + origin * ZIP3_COUNT + dest] or None
+
+
+def _zip3(postal_code: str | None) -> int | None:
+    prefix = str(postal_code or "").strip()[:3]
+    return int(prefix) if len(prefix) == 3 and prefix.isdigit() else None
+
+
+def build_rate_card(source: Path | str, destination: Path | str) -> int:
+    """Compile a ``service,name,max_weight_oz,zone_1..zone_N`` CSV.
+
+    Rows are weight breaks; an empty zone cell means the service is not
+    offered there. Services with different breaks are merged onto one
+    break axis, each priced at its own next break up.
+    """
+    cards: dict[str, dict] = {}
+    with open(source, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        zone_columns = [name for name in reader.fieldnames if name.startswith("zone_")]
+        zone_count = len(zone_columns)
+        for row in reader:
+            card = cards.setdefault(row["service"], {"name": row["name"], "rows": {}})
+            card["rows"][_hundredths(row["max_weight_oz"])] = [
+                int(row[column]) if row[column].strip() else UNAVAILABLE
+                for column in zone_columns
+            ]
+
+    breaks = sorted({weight for card in cards.values() for weight in card["rows"]})
+    prices = bytearray()
+    strings = bytearray()
+    price = struct.Struct(f"<{len(breaks)}i")
+    for code, card in cards.items():
+        own_breaks = sorted(card["rows"])
+        for zone_index in range(zone_count):
+            column = []
+            for weight in breaks:
+                position = bisect_left(own_breaks, weight)
+                column.append(
+                    card["rows"][own_breaks[position]][zone_index]
+                    if position < len(own_breaks)
+                    else UNAVAILABLE
+                )
+            prices += price.pack(*column)
+        encoded = f"{code}|{card['name']}".encode()
+        strings += LENGTH.pack(len(encoded)) + encoded
+
+    strings_offset = RATE_HEADER.size + len(breaks) * BREAK.size + len(prices)
+    with open(destination, "wb") as handle:
+        handle.write(
+            RATE_HEADER.pack(
+                RATE_MAGIC, len(cards), zone_count, len(breaks), strings_offset
+            )
+        )
+        handle.write(struct.pack(f"<{len(breaks)}I", *breaks))
+        handle.write(prices)
+        handle.write(strings)
+    return len(cards)
+
+
+def build_zone_chart(source: Path | str, destination: Path | str) -> int:
+    """Compile an ``origin_zip3,dest_zip3_start,dest_zip3_end,zone`` CSV.
+
+    Ranges are inclusive and later rows override earlier ones.
+    """
+    matrix = bytearray(ZIP3_COUNT * ZIP3_COUNT)
+    origins = set()
+    with open(source, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            origin = int(row["origin_zip3"])
+            start = origin * ZIP3_COUNT
+            first, last = int(row["dest_zip3_start"]), int(row["dest_zip3_end"])
+            matrix[start + first : start + last + 1] = bytes([int(row["zone"])]) * (
+                last - first + 1
+            )
+            origins.add(origin)
+
+    with open(destination, "wb") as handle:
+        handle.write(ZONE_MAGIC)
+        handle.write(matrix)
+    return len(origins)
+
+
+def get_rate_table() -> RateTable | None:
+    path = getattr(settings, "SHIPPING_RATE_CARD_PATH", None)
+    if not path or not Path(path).exists():
+        return None
+    return open_rate_table(str(path))
+
+
+@lru_cache(maxsize=4)
+def open_rate_table(path: str) -> RateTable:
+    return RateTable(path)
+
+
+def get_zone_chart() -> ZoneChart | None:
+    path = getattr(settings, "SHIPPING_ZONE_CHART_PATH", None)
+    if not path or not Path(path).exists():
+        return None
+    return open_zone_chart(str(path))
+
+
+@lru_cache(maxsize=4)
+def open_zone_chart(path: str) -> ZoneChart:
+    return ZoneChart(path)
@@ -0,0 +1,160 @@
+"""Batched carrier rating.
+
+Each carrier gets one ``rate`` call per quoting pass with its distinct
+requests, which are answered from ``CarrierRate`` where possible, and the
+misses are sent in batches of the carrier's ``max_batch_size`` with at most
+``SHIPPING_CARRIER_CONCURRENCY`` batches in flight. Carriers are built once
+per process for their settings, so whatever they cache (the HTTP carrier's
+service catalog) lasts across passes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import nullcontext
+from datetime import timedelta
+from functools import lru_cache
+
+import structlog
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.utils import timezone
+
+from shipping.carriers.base import CarrierProvider, RateRequest
+from shipping.carriers.http import HttpCarrier
+from shipping.carriers.table import TableCarrier
+from shipping.models import CarrierRate
+
+logger = structlog.get_logger(__name__)
+
+CARRIER_FACTORIES = {
+    "table": TableCarrier.from_settings,
+    "stub": lambda: HttpCarrier(
+        "stub",
+        settings.SHIPPING_STUB_CARRIER_URL,
+        max_batch_size=settings.SHIPPING_CARRIER_BATCH_SIZE,
+        timeout=settings.SHIPPING_CARRIER_TIMEOUT_SECONDS,
+    ),
+}
+
+
+_CARRIER_SETTINGS = (
+    "SHIPPING_CARRIERS",
+    "SHIPPING_STUB_CARRIER_URL",
+    "SHIPPING_CARRIER_BATCH_SIZE",
+    "SHIPPING_CARRIER_TIMEOUT_SECONDS",
+    "SHIPPING_RATE_CARD_PATH",
+    "SHIPPING_ZONE_CHART_PATH",
+    "SHIPPING_DEFAULT_ZONE",
+)
+
+
+def get_carriers() -> list[CarrierProvider]:
+    """The process's carriers for the current ``SHIPPING_*`` settings."""
+    return list(
+        configured_carriers(
+            tuple(str(getattr(settings, name, None)) for name in _CARRIER_SETTINGS)
+        )
+    )
+
+
+@lru_cache(maxsize=4)
+def configured_carriers(_config: tuple) -> tuple[CarrierProvider, ...]:
+    names = getattr(settings, "SHIPPING_CARRIERS", None) or ["table"]
+    return tuple(CARRIER_FACTORIES[name]() for name in names)
+
+
+def cached_rates(carrier: CarrierProvider, keys: list[str]) -> dict[str, int | None]:
+    return dict(
+        CarrierRate.objects.filter(
+            carrier=carrier.name, rate_key__in=keys, expires_at__gt=timezone.now()
+        ).values_list("rate_key", "price_cents")
+    )
+
+
+def store_rates(carrier: CarrierProvider, prices: dict[str, int | None]) -> None:
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.SHIPPING_CARRIER_RATE_TTL_SECONDS)
+    CarrierRate.objects.bulk_create(
+        [
+            CarrierRate(
+                carrier=carrier.name,
+                rate_key=key,
+                price_cents=price,
+                fetched_at=now,
+                expires_at=expires_at,
+            )
+            for key, price in prices.items()
+        ],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["carrier", "rate_key"],
+        update_fields=["price_cents", "fetched_at", "expires_at"],
+    )
+
+
+async def _rate_batches(
+    carrier: CarrierProvider, batches: list[list[RateRequest]], concurrency: int
+) -> list[list[int | None]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    # Carriers with a ``session`` share one client across the pass's batches.
+    session = getattr(carrier, "session", None)
+    async with session() if session else nullcontext(carrier.rate_many) as rate_many:
+
+        async def rate_batch(batch: list[RateRequest]) -> list[int | None]:
+            async with semaphore:
+                return await rate_many(batch)
+
+        return await asyncio.gather(*(rate_batch(batch) for batch in batches))
+
+
+def rate(
+    carrier: CarrierProvider, requests: list[RateRequest], use_cache: bool = True
+) -> list[int | None]:
+    """Prices for distinct ``requests``, in the same order.
+
+    With ``use_cache=False`` the ``CarrierRate`` cache is neither read nor
+    written. Raises ``CarrierError`` if any batch fails.
+    """
+    use_cache = use_cache and carrier.cacheable
+    prices: list[int | None] = [None] * len(requests)
+    missing = range(len(requests))
+    if use_cache:
+        keys = [request.key for request in requests]
+        hits = cached_rates(carrier, keys)
+        missing = []
+        for position, key in enumerate(keys):
+            if key in hits:
+                prices[position] = hits[key]
+            else:
+                missing.append(position)
+
+    size = carrier.max_batch_size
+    batches = [missing[start : start + size] for start in range(0, len(missing), size)]
+    if batches:
+        results = async_to_sync(_rate_batches)(
+            carrier,
+            [[requests[position] for position in batch] for batch in batches],
+            settings.SHIPPING_CARRIER_CONCURRENCY,
+        )
+        for batch, batch_prices in zip(batches, results, strict=True):
+            for position, price in zip(batch, batch_prices, strict=True):
+                prices[position] = price
+        if use_cache:
+            store_rates(
+                carrier,
+                {
+                    keys[position]: prices[position]
+                    for batch in batches
+                    for position in batch
+                },
+            )
+
+    logger.info(
+        "shipping.carrier_rated",
+        carrier=carrier.name,
+        requests=len(requests),
+        cached=len(requests) - len(missing),
+        batches=len(batches),
+    )
+    return prices
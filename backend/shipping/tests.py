@@ -1 +1,115 @@
-# Create your tests here.
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from shipping.carriers.base import CarrierError
+from shipping.carriers.http import HttpCarrier
+from shipping.services.billable import (
+    billable_weights,
+    oversize_surcharges,
+    package_columns,
+    service_rules,
+)
+from shipping.services.rate_table import (
+    RateTable,
+    ZoneChart,
+    build_rate_card,
+    build_zone_chart,
+    get_rate_table,
+)
+
+
+def test_rate_table_prices_by_zone_and_next_weight_break(tmp_path):
+    source = tmp_path / "rates.csv"
+    source.write_text(
+        "service,name,max_weight_oz,zone_1,zone_2\n"
+        "express,Express,8,900,1000\n"
+        "express,Express,16,1100,1200\n"
+        "ground,Ground,16,400,\n",
+        encoding="utf-8",
+    )
+    build_rate_card(source, tmp_path / "rates.bin")
+
+    table = RateTable(tmp_path / "rates.bin")
+
+    assert [service.code for service in table.services] == ["express", "ground"]
+    # 8.01 oz rounds up to the 16 oz break; there is no break above 16 oz.
+    assert table.price_column(0, [1, 1, 2, 3, 1], [400, 500, 801, 400, 1700]) == [
+        900,
+        900,
+        1200,
+        None,
+        None,
+    ]
+    # Ground isn't offered in zone 2.
+    assert table.price_column(1, [1, 2], [800, 800]) == [400, None]
+
+
+def test_rate_table_follows_the_configured_path(settings, tmp_path):
+    source = tmp_path / "rates.csv"
+    source.write_text(
+        "service,name,max_weight_oz,zone_1\nground,Ground,16,400\n", encoding="utf-8"
+    )
+    build_rate_card(source, tmp_path / "a.bin")
+    build_rate_card(source, tmp_path / "b.bin")
+
+    settings.SHIPPING_RATE_CARD_PATH = str(tmp_path / "a.bin")
+    table = get_rate_table()
+    assert get_rate_table() is table
+    settings.SHIPPING_RATE_CARD_PATH = str(tmp_path / "b.bin")
+    assert get_rate_table() is not table
+    settings.SHIPPING_RATE_CARD_PATH = str(tmp_path / "missing.bin")
+    assert get_rate_table() is None
+
+
+def test_zone_chart_lookup(tmp_path):
+    source = tmp_path / "zones.csv"
+    source.write_text(
+        "origin_zip3,dest_zip3_start,dest_zip3_end,zone\n"
+        "917,000,999,8\n"
+        "917,900,935,2\n"
+        "917,917,917,1\n",
+        encoding="utf-8",
+    )
+    build_zone_chart(source, tmp_path / "zones.bin")
+
+    chart = ZoneChart(tmp_path / "zones.bin")
+
+    assert chart.zone("91773", "91773-1234") == 1
+    assert chart.zone("91773", "90001") == 2
+    assert chart.zone("91773", "10001") == 8
+    assert chart.zone("10001", "91773") is None
+    assert chart.zone("91773", "") is None
+
+
+def test_billable_weight_and_oversize_surcharges_per_service():
+    packages = package_columns(
+        [
+            (Decimal("16"), 4, 4, 4),  # small: actual weight
+            (Decimal("16"), 10, 10, 10),  # 1000 cu in
+            (Decimal("16"), 24, 12, 12),  # 3456 cu in, 24" long
+            (Decimal("16"), None, 10, 10),  # unknown size
+        ]
+    )
+    priority = service_rules("priority_mail")
+    ground = service_rules("ground_shipping")
+
+    # In hundredths of an ounce. Priority only applies dim weight over
+    # 1 cu ft: 3456 / 166 -> 21 lb.
+    assert billable_weights(priority, packages) == [1600, 1600, 21 * 1600, 1600]
+    # Ground always does: 1000 / 139 -> 8 lb, 3456 / 139 -> 25 lb.
+    assert billable_weights(ground, packages) == [1600, 8 * 1600, 25 * 1600, 1600]
+    assert oversize_surcharges(priority, packages) == [0, 0, 400, 0]
+    assert oversize_surcharges(ground, packages) == [0, 0, 0, 0]
+
+
+def test_http_carrier_rejects_a_body_that_is_not_json(monkeypatch):
+    monkeypatch.setattr(
+        httpx, "get", lambda *_args, **_kwargs: httpx.Response(200, content=b"<html>")
+    )
+    carrier = HttpCarrier("stub", "http://carrier.invalid")
+
+    with pytest.raises(CarrierError, match="invalid JSON") as excinfo:
+        carrier.services()
+    assert excinfo.value.retryable
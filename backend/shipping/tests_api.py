@@ -1,15 +1,27 @@
+import json
+
 import pytest
 from rest_framework.test import APIClient
 
 from imports.models import ImportJob
 from shipments.models import Shipment
+from shipping import services as shipping_services
+from shipping.carriers.stub import StubCarrierServer
+from shipping.models import PackageQuote
+from shipping.services import materialize_quotes
 
 
 @pytest.mark.django_db
 def test_shipping_quote_by_import_id():
     client = APIClient()
     job = ImportJob.objects.create(original_filename="test.csv")
-    Shipment.objects.create(import_job=job, row_number=1, weight_oz=16)
+    Shipment.objects.create(
+        import_job=job,
+        row_number=1,
+        weight_oz=16,
+        from_postal_code="91773",
+        to_postal_code="10001",
+    )
 
     response = client.post(
         "/api/v1/shipping/quote/",
@@ -19,4 +31,210 @@ def test_shipping_quote_by_import_id():
 
     assert response.status_code == 200
     payload = response.json()
+    assert payload["results"][0]["zone"] == 8
     assert payload["results"][0]["quotes"]
+
+
+@pytest.mark.django_db
+def test_shipping_quote_streams_ndjson(settings):
+    settings.SHIPPING_QUOTE_STREAM_CHUNK_SIZE = 2
+    client = APIClient()
+    job = ImportJob.objects.create(original_filename="test.csv")
+    for row_number in range(1, 6):
+        Shipment.objects.create(import_job=job, row_number=row_number, weight_oz=16)
+
+    response = client.post(
+        "/api/v1/shipping/quote/",
+        {"import_id": str(job.id)},
+        format="json",
+        HTTP_ACCEPT="application/x-ndjson",
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    results = [json.loads(line) for line in lines]
+    assert len(results) == 5
+    assert all(result["quotes"] for result in results)
+
+
+@pytest.mark.django_db
+def test_shipping_quote_ndjson_errors_are_json_lines():
+    response = APIClient().post(
+        "/api/v1/shipping/quote/",
+        {},
+        format="json",
+        HTTP_ACCEPT="application/x-ndjson",
+    )
+
+    assert response.status_code == 400
+    assert json.loads(response.content)["error"]["code"] == "VALIDATION_ERROR"
+
+
+@pytest.mark.django_db
+def test_quotes_are_materialized_per_package_fingerprint(monkeypatch):
+    job = ImportJob.objects.create(original_filename="test.csv")
+    shipments = [
+        Shipment.objects.create(
+            import_job=job,
+            row_number=row_number,
+            weight_oz=16,
+            from_postal_code="91773",
+            to_postal_code=f"1000{row_number}",
+            validation_status=Shipment.ValidationStatus.READY,
+        )
+        for row_number in (1, 2)
+    ]
+
+    assert materialize_quotes(Shipment.objects.filter(import_job=job)) == 2
+    assert PackageQuote.objects.count() == 1
+    fingerprints = set(
+        Shipment.objects.values_list("quote_fingerprint", flat=True).distinct()
+    )
+    assert fingerprints == {PackageQuote.objects.get().fingerprint}
+
+    def fail(_rows):
+        raise AssertionError("quotes should be read, not recomputed")
+
+    monkeypatch.setattr(shipping_services, "_price", fail)
+    response = APIClient().post(
+        "/api/v1/shipping/quote/", {"import_id": str(job.id)}, format="json"
+    )
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+
+    monkeypatch.undo()
+    Shipment.objects.filter(id=shipments[0].id).update(weight_oz=32)
+    response = APIClient().post(
+        "/api/v1/shipping/quote/", {"import_id": str(job.id)}, format="json"
+    )
+    first, second = response.json()["results"]
+    assert first["quotes"][0]["price_cents"] > second["quotes"][0]["price_cents"]
+    assert PackageQuote.objects.count() == 2
+    shipments[0].refresh_from_db()
+    assert shipments[0].quote_fingerprint not in fingerprints
+
+
+@pytest.mark.django_db
+def test_quotes_rate_remote_carrier_in_cached_batches(settings):
+    job = ImportJob.objects.create(original_filename="test.csv")
+    Shipment.objects.bulk_create(
+        Shipment(
+            import_job=job,
+            row_number=row_number,
+            weight_oz=row_number,
+            from_postal_code="91773",
+            to_postal_code="10001",
+            validation_status=Shipment.ValidationStatus.READY,
+        )
+        for row_number in range(1, 301)
+    )
+    client = APIClient()
+
+    def quote():
+        response = client.post(
+            "/api/v1/shipping/quote/", {"import_id": str(job.id)}, format="json"
+        )
+        assert response.status_code == 200
+        return {
+            result["shipment_id"]: {
+                (item["service"], item["price_cents"]) for item in result["quotes"]
+            }
+            for result in response.json()["results"]
+        }
+
+    table_quotes = quote()
+    with StubCarrierServer() as server:
+        settings.SHIPPING_CARRIERS = ["stub"]
+        settings.SHIPPING_STUB_CARRIER_URL = server.url
+        settings.SHIPPING_CARRIER_BATCH_SIZE = 100
+
+        # 300 packages x 2 services, rated 100 at a time.
+        assert quote() == table_quotes
+        assert (server.requests, server.batches) == (600, 6)
+
+        PackageQuote.objects.all().delete()
+        assert quote() == table_quotes
+        assert server.batches == 6
+        # The carrier, and so its service catalog, is reused across passes.
+        assert server.catalogs == 1
+
+
+@pytest.mark.django_db
+def test_rate_endpoint_prices_columns_without_database(django_assert_num_queries):
+    client = APIClient()
+    payload = {
+        "from_postal_code": "91773",
+        "to_postal_code": ["10001", "90001", "10001"],
+        "weight_oz": [16, "16", 4.5],
+        "length_in": [None, 24, 6],
+        "width_in": [None, 12, 6],
+        "height_in": [None, 12, 6],
+    }
+
+    with django_assert_num_queries(0):
+        response = client.post("/api/v1/shipping/rate/", payload, format="json")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3
+    assert body["zone"][0] == 8
+    priority = next(s for s in body["services"] if s["service"] == "priority_mail")
+    # Row 2 is over 22" long and bills at dimensional weight (3456 / 166 -> 21 lb).
+    assert priority["billable_weight_oz"] == ["16.00", "336.00", "4.50"]
+    assert priority["surcharge_cents"] == [0, 400, 0]
+
+    job = ImportJob.objects.create(original_filename="test.csv")
+    shipment = Shipment.objects.create(
+        import_job=job,
+        row_number=1,
+        weight_oz=16,
+        from_postal_code="91773",
+        to_postal_code="10001",
+    )
+    quote = client.post(
+        "/api/v1/shipping/quote/", {"shipment_ids": [str(shipment.id)]}, format="json"
+    ).json()["results"][0]
+    assert [item["price_cents"] for item in quote["quotes"]] == [
+        service["price_cents"][0] for service in body["services"]
+    ]
+
+
+@pytest.mark.django_db
+def test_rate_endpoint_rejects_ragged_columns():
+    response = APIClient().post(
+        "/api/v1/shipping/rate/",
+        {
+            "from_postal_code": "91773",
+            "to_postal_code": ["10001", "90001"],
+            "weight_oz": [16],
+        },
+        format="json",
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "columns",
+    [
+        {"weight_oz": [16, 1e308]},
+        {"weight_oz": "1e5000"},
+        {"weight_oz": [0]},
+        {"weight_oz": "NaN"},
+        {"to_postal_code": ["10001", "1"]},
+        {"from_postal_code": "x"},
+        {"length_in": [12, None], "width_in": 12, "height_in": 12},
+    ],
+)
+def test_rate_endpoint_rejects_out_of_range_and_partial_columns(columns):
+    payload = {
+        "from_postal_code": "91773",
+        "to_postal_code": ["10001", "90001"],
+        "weight_oz": 16,
+        **columns,
+    }
+    response = APIClient().post("/api/v1/shipping/rate/", payload, format="json")
+
+    assert response.status_code == 400
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from shipping.views import ShippingQuoteView
+from shipping.views import ShippingQuoteView, ShippingRateView
 
 urlpatterns = [
     path("shipping/quote/", ShippingQuoteView.as_view(), name="shipping_quote"),
+    path("shipping/rate/", ShippingRateView.as_view(), name="shipping_rate"),
 ]
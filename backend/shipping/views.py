@@ -1,19 +1,59 @@
-from drf_spectacular.utils import extend_schema
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import status
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.renderers import NDJSON_MEDIA_TYPE, NDJSONRenderer, ndjson_line, wants_ndjson
 from shipments.models import Shipment
+from shipping.carriers.base import CarrierError
 from shipping.serializers import (
     ShippingQuoteListResponseSerializer,
     ShippingQuoteRequestSerializer,
+    ShippingQuoteResponseSerializer,
+    ShippingRateRequestSerializer,
+    ShippingRateResponseSerializer,
 )
-from shipping.services import quote_for_weight
+from shipping.services import QUOTE_FIELDS, price_columns, quote_rows
+from shipping.services.billable import package_columns
+
+
+def _carrier_error(exc: CarrierError) -> dict:
+    return {"error": {"code": "CARRIER_UNAVAILABLE", "message": str(exc)}}
+
+
+def _stream_quotes(rows, chunk_size: int):
+    """Yield one NDJSON line per shipment, quoting ``chunk_size`` at a time.
+
+    A carrier failure ends the stream with an error line.
+    """
+    while chunk := list(islice(rows, chunk_size)):
+        try:
+            results = quote_rows(chunk)
+        except CarrierError as exc:
+            yield ndjson_line(_carrier_error(exc))
+            return
+        for result in results:
+            yield ndjson_line(result)
 
 
 class ShippingQuoteView(APIView):
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, NDJSONRenderer]
+
     @extend_schema(
         request=ShippingQuoteRequestSerializer,
-        responses={200: ShippingQuoteListResponseSerializer},
+        responses={
+            200: ShippingQuoteListResponseSerializer,
+            (200, NDJSON_MEDIA_TYPE): OpenApiResponse(
+                response=ShippingQuoteResponseSerializer,
+                description="One object per line",
+            ),
+            503: OpenApiResponse(description="A carrier could not be reached"),
+        },
     )
     def post(self, request):
         serializer = ShippingQuoteRequestSerializer(data=request.data)
@@ -26,14 +66,72 @@ class ShippingQuoteView(APIView):
         else:
             shipments = Shipment.objects.filter(id__in=shipment_ids)
 
-        results = []
-        for shipment in shipments:
-            quotes = quote_for_weight(shipment.weight_oz)
-            results.append(
-                {
-                    "shipment_id": str(shipment.id),
-                    "quotes": quotes,
-                }
+        shipments = shipments.order_by("row_number")
+
+        if wants_ndjson(request):
+            # Rows are read through a server-side cursor and quoted a chunk at
+            # a time, so memory and time to first byte don't grow with the
+            # import.
+            chunk_size = settings.SHIPPING_QUOTE_STREAM_CHUNK_SIZE
+            rows = shipments.values_list(*QUOTE_FIELDS).iterator(chunk_size=chunk_size)
+            return StreamingHttpResponse(
+                _stream_quotes(rows, chunk_size), content_type=NDJSON_MEDIA_TYPE
             )
 
+        try:
+            results = quote_rows(list(shipments.values_list(*QUOTE_FIELDS)))
+        except CarrierError as exc:
+            return Response(
+                _carrier_error(exc), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         return Response({"results": results})
+
+
+class ShippingRateView(APIView):
+    """Price hypothetical packages without touching the database.
+
+    Request and response are columnar: the i-th entry of every column
+    describes the i-th package, and scalar request columns apply to all
+    packages.
+    """
+
+    @extend_schema(
+        request=ShippingRateRequestSerializer,
+        responses={
+            200: ShippingRateResponseSerializer,
+            503: OpenApiResponse(description="A carrier could not be reached"),
+        },
+    )
+    def post(self, request):
+        serializer = ShippingRateRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        columns = serializer.validated_data
+
+        try:
+            zones, priced = price_columns(
+                columns["from_postal_code"],
+                columns["to_postal_code"],
+                package_columns(
+                    list(
+                        zip(
+                            columns["weight_oz"],
+                            columns["length_in"],
+                            columns["width_in"],
+                            columns["height_in"],
+                            strict=True,
+                        )
+                    )
+                ),
+                use_cache=False,
+            )
+        except CarrierError as exc:
+            return Response(
+                _carrier_error(exc), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response(
+            {
+                "count": len(zones),
+                "zone": zones,
+                "services": [vars(column) for column in priced],
+            }
+        )
@@ -5,6 +5,7 @@ import type {
   PresetAddress,
   PresetPackage,
   Paginated,
+  PurchaseJob,
 } from "./types";
 
 type ImportJobResponse = Omit<ImportJob, "id"> & {
@@ -118,10 +119,20 @@ export function quoteShipping(payload: QuoteRequest) {
 
 export function purchase(
   importId: string,
-  payload: { label_format: "LETTER" | "LABEL_4X6"; agree_to_terms: boolean },
+  payload: {
+    label_format: "LETTER" | "LABEL_4X6";
+    file_format: "PDF" | "ZPL" | "PNG";
+    agree_to_terms: boolean;
+  },
+  idempotencyKey: string,
 ) {
-  return apiFetch(`/imports/${importId}/purchase/`, {
+  return apiFetch<PurchaseJob>(`/imports/${importId}/purchase/`, {
     method: "POST",
     body: payload,
+    headers: { "Idempotency-Key": idempotencyKey },
   });
 }
+
+export function getPurchase(importId: string, purchaseId: string) {
+  return apiFetch<PurchaseJob>(`/imports/${importId}/purchases/${purchaseId}/`);
+}
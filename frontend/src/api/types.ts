@@ -15,6 +15,8 @@ export type ImportJob = {
   status: ImportStatus;
   progress_total: number;
   progress_done: number;
+  verify_progress_total?: number;
+  verify_progress_done?: number;
   error_summary?: string | null;
   meta?: Record<string, unknown> | null;
   ready_count?: number;
@@ -64,6 +66,21 @@ export type Shipment = {
   label_url?: string | null;
 };
 
+export type PurchaseJob = {
+  purchase_id: string;
+  import_job_id: string;
+  status: "PENDING" | "PROCESSING" | "COMPLETED" | "FAILED";
+  label_format: "LETTER" | "LABEL_4X6";
+  file_format: "PDF" | "ZPL" | "PNG";
+  label_download_url: string;
+  total_count: number;
+  purchased_count: number;
+  skipped_count: number;
+  error_summary?: string | null;
+  created_at: string;
+  updated_at: string;
+};
+
 export type PresetAddress = {
   id: string;
   name: string;
@@ -75,6 +92,8 @@ export type PresetAddress = {
   state: string;
   postal_code: string;
   country?: string | null;
+  verification_status?: AddressVerificationStatus;
+  verified_at?: string | null;
 };
 
 export type PresetPackage = {
@@ -1,8 +1,14 @@
 import { useEffect, useRef, useState } from "react";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { useNavigate, useParams } from "@tanstack/react-router";
-import { purchase, getImport, listShipments } from "@/api/endpoints";
+import {
+  purchase,
+  getImport,
+  getPurchase,
+  listShipments,
+} from "@/api/endpoints";
 import { ApiClientError } from "@/api/errors";
+import type { PurchaseJob } from "@/api/types";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Checkbox } from "@/components/ui/checkbox";
@@ -22,8 +28,13 @@ export default function CheckoutPage() {
   const [labelFormat, setLabelFormat] = useState<"LETTER" | "LABEL_4X6">(
     "LABEL_4X6",
   );
+  const [fileFormat, setFileFormat] = useState<"PDF" | "ZPL" | "PNG">("PDF");
   const [agree, setAgree] = useState(false);
+  const [progress, setProgress] = useState<PurchaseJob | null>(null);
   const redirectedRef = useRef(false);
+  // One key per purchase attempt: retrying after an error resumes the same
+  // purchase job instead of starting another.
+  const idempotencyKeyRef = useRef<string | null>(null);
 
   const importQuery = useQuery({
     queryKey: ["importJob", importId],
@@ -69,26 +80,38 @@ export default function CheckoutPage() {
     importQuery.data?.address_unverified_count ?? 0;
 
   const purchaseMutation = useMutation({
-    mutationFn: () =>
-      purchase(importId, {
-        label_format: labelFormat,
-        agree_to_terms: agree,
-      }) as Promise<{
-        purchase_id: string;
-        label_download_url: string;
-        purchased_count: number;
-        skipped_count: number;
-      }>,
-    onSuccess: (data) => {
+    mutationFn: async () => {
+      idempotencyKeyRef.current ??= crypto.randomUUID();
+      let job = await purchase(
+        importId,
+        {
+          label_format: labelFormat,
+          file_format: fileFormat,
+          agree_to_terms: agree,
+        },
+        idempotencyKeyRef.current,
+      );
+      while (job.status === "PENDING" || job.status === "PROCESSING") {
+        setProgress(job);
+        await new Promise((resolve) => window.setTimeout(resolve, 1500));
+        job = await getPurchase(importId, job.purchase_id);
+      }
+      if (job.status === "FAILED") {
+        throw new Error("Purchase failed");
+      }
+      return job;
+    },
+    onSuccess: (job: PurchaseJob) => {
+      idempotencyKeyRef.current = null;
       queryClient.invalidateQueries({ queryKey: ["importJob", importId] });
       toast.success("Purchase complete");
       navigate({
         to: `/success/${importId}`,
         search: {
-          purchaseId: data.purchase_id,
-          labelUrl: data.label_download_url,
-          purchasedCount: data.purchased_count,
-          skippedCount: data.skipped_count,
+          purchaseId: job.purchase_id,
+          labelUrl: job.label_download_url,
+          purchasedCount: job.purchased_count,
+          skippedCount: job.skipped_count,
         },
       });
     },
@@ -99,6 +122,7 @@ export default function CheckoutPage() {
       }
       toast.error("Purchase failed");
     },
+    onSettled: () => setProgress(null),
   });
 
   const canPurchase = purchasableCount > 0 && agree;
@@ -166,9 +190,10 @@ export default function CheckoutPage() {
             <label className="text-sm font-medium">Label format</label>
             <Select
               value={labelFormat}
-              onValueChange={(value) =>
-                setLabelFormat(value as "LETTER" | "LABEL_4X6")
-              }
+              onValueChange={(value) => {
+                idempotencyKeyRef.current = null;
+                setLabelFormat(value as "LETTER" | "LABEL_4X6");
+              }}
             >
               <SelectTrigger className="w-[200px]">
                 <SelectValue placeholder="Select format" />
@@ -180,6 +205,26 @@ export default function CheckoutPage() {
             </Select>
           </div>
 
+          <div className="space-y-2">
+            <label className="text-sm font-medium">File type</label>
+            <Select
+              value={fileFormat}
+              onValueChange={(value) => {
+                idempotencyKeyRef.current = null;
+                setFileFormat(value as "PDF" | "ZPL" | "PNG");
+              }}
+            >
+              <SelectTrigger className="w-[200px]">
+                <SelectValue placeholder="Select file type" />
+              </SelectTrigger>
+              <SelectContent>
+                <SelectItem value="PDF">PDF</SelectItem>
+                <SelectItem value="ZPL">ZPL (thermal printer)</SelectItem>
+                <SelectItem value="PNG">PNG</SelectItem>
+              </SelectContent>
+            </Select>
+          </div>
+
           <div className="flex items-center gap-2 text-sm">
             <Checkbox
               checked={agree}
@@ -193,7 +238,11 @@ export default function CheckoutPage() {
               onClick={() => purchaseMutation.mutate()}
               disabled={!canPurchase || purchaseMutation.isPending}
             >
-              {purchaseMutation.isPending ? "Purchasing..." : "Purchase labels"}
+              {purchaseMutation.isPending
+                ? progress && progress.total_count > 0
+                  ? `Purchasing... ${progress.purchased_count}/${progress.total_count}`
+                  : "Purchasing..."
+                : "Purchase labels"}
             </Button>
           </div>
         </CardContent>
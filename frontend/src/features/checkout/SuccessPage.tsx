@@ -64,6 +64,11 @@ export default function SuccessPage() {
             ) : (
               <Button disabled>Download labels</Button>
             )}
+            {labelUrl && !labelUrl.includes("bundle=zip") ? (
+              <Button asChild variant="outline">
+                <a href={`${labelUrl}?bundle=zip`}>Download ZIP</a>
+              </Button>
+            ) : null}
             <Button asChild variant="outline">
               <Link to="/upload">Start new upload</Link>
             </Button>
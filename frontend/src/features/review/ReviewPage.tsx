@@ -120,8 +120,10 @@ export default function ReviewPage() {
   const error =
     importQuery.error instanceof ApiClientError ? importQuery.error : null;
   const importJob = importQuery.data;
-  const progressTotal = importJob?.progress_total ?? 0;
-  const progressDone = importJob?.progress_done ?? 0;
+  const progressTotal =
+    (importJob?.progress_total ?? 0) + (importJob?.verify_progress_total ?? 0);
+  const progressDone =
+    (importJob?.progress_done ?? 0) + (importJob?.verify_progress_done ?? 0);
   const progressValue =
     progressTotal > 0 ? Math.min(100, (progressDone / progressTotal) * 100) : 0;
 
@@ -651,6 +653,20 @@ export default function ReviewPage() {
                 >
                   Verify addresses
                 </Button>
+                <Button
+                  variant="outline"
+                  onClick={() =>
+                    bulkMutation.mutate({
+                      action: "accept_suggested_address",
+                      shipment_ids: selectedIdsArray,
+                    })
+                  }
+                  disabled={
+                    selectedIdsArray.length === 0 || bulkMutation.isPending
+                  }
+                >
+                  Accept suggestions
+                </Button>
                 <Button
                   variant="destructive"
                   onClick={() => openDeleteConfirm(Object.keys(selectedIds))}
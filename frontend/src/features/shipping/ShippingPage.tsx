@@ -171,21 +171,11 @@ export default function ShippingPage() {
   });
 
   const autoAssignMutation = useMutation({
-    mutationFn: (
-      groups: Array<{ service: string; price: number; ids: string[] }>,
-    ) =>
-      Promise.all(
-        groups.map((group) =>
-          bulkShipments(importId, {
-            action: "set_shipping_service",
-            shipment_ids: group.ids,
-            payload: {
-              service: group.service,
-              price_cents: group.price,
-            },
-          }),
-        ),
-      ),
+    mutationFn: (ids: string[]) =>
+      bulkShipments(importId, {
+        action: "auto_select_cheapest",
+        shipment_ids: ids,
+      }),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["shipments", importId] });
     },
@@ -203,37 +193,12 @@ export default function ShippingPage() {
     );
     if (missingService.length === 0) return;
 
-    const grouped = missingService.reduce<
-      Record<string, { price: number; ids: string[] }>
-    >((acc, shipment) => {
-      const quotes = quotesByShipment.get(shipment.id) ?? [];
-      const cheapest = quotes.reduce<QuoteItem | null>((prev, quote) => {
-        if (!prev || quote.price_cents < prev.price_cents) return quote;
-        return prev;
-      }, null);
-      if (!cheapest) return acc;
-      const key = cheapest.service;
-      if (!acc[key]) {
-        acc[key] = { price: cheapest.price_cents, ids: [] };
-      }
-      acc[key].ids.push(shipment.id);
-      return acc;
-    }, {});
-
-    const groups = Object.entries(grouped).map(([service, data]) => ({
-      service,
-      price: data.price,
-      ids: data.ids,
-    }));
-
-    if (groups.length === 0) return;
     autoAssignedRef.current = true;
-    autoAssignMutation.mutate(groups);
+    autoAssignMutation.mutate(missingService.map((shipment) => shipment.id));
   }, [
     shipmentsQuery.isLoading,
     quoteQuery.isLoading,
     readyShipments,
-    quotesByShipment,
     autoAssignMutation,
   ]);
 
@@ -338,53 +303,12 @@ export default function ShippingPage() {
                 <Button
                   variant="outline"
                   disabled={bulkMutation.isPending}
-                  onClick={() => {
-                    const selection = readyShipments.filter(
-                      (shipment) => selectedIds[shipment.id],
-                    );
-                    const cheapestSelections = selection
-                      .map((shipment) => {
-                        const quotes = quotesByShipment.get(shipment.id) ?? [];
-                        const cheapest = quotes.reduce<QuoteItem | null>(
-                          (acc, quote) => {
-                            if (!acc || quote.price_cents < acc.price_cents) {
-                              return quote;
-                            }
-                            return acc;
-                          },
-                          null,
-                        );
-                        return cheapest
-                          ? { shipmentId: shipment.id, quote: cheapest }
-                          : null;
-                      })
-                      .filter(Boolean) as Array<{
-                      shipmentId: string;
-                      quote: QuoteItem;
-                    }>;
-
-                    const grouped = cheapestSelections.reduce<
-                      Record<string, { price: number; ids: string[] }>
-                    >((acc, entry) => {
-                      const key = entry.quote.service;
-                      if (!acc[key]) {
-                        acc[key] = { price: entry.quote.price_cents, ids: [] };
-                      }
-                      acc[key].ids.push(entry.shipmentId);
-                      return acc;
-                    }, {});
-
-                    Object.entries(grouped).forEach(([service, data]) => {
-                      bulkMutation.mutate({
-                        action: "set_shipping_service",
-                        shipment_ids: data.ids,
-                        payload: {
-                          service,
-                          price_cents: data.price,
-                        },
-                      });
-                    });
-                  }}
+                  onClick={() =>
+                    bulkMutation.mutate({
+                      action: "auto_select_cheapest",
+                      shipment_ids: selectedIdsArray,
+                    })
+                  }
                 >
                   Cheapest available
                 </Button>